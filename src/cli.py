@@ -0,0 +1,461 @@
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TextIO
+
+from .config import AppConfig
+from .core.comparator import DuplicateGroup
+from .core.database import FingerprintDatabase
+from .core.lookup import lookup_similar
+from .core.portable import (
+    PortableFormatError,
+    export_fingerprints,
+    import_fingerprints,
+    prefix_remap,
+)
+from .core.sharding import ShardFilter, read_file_list
+from .utils.video_info import VideoDecodeError
+from .workers.compare_worker import build_duplicate_groups
+from .workers.scan_engine import ScanEngine, ScanSink
+
+# 命令行入口不依赖 PySide6，可在无图形界面的服务器上运行
+
+
+def build_parser() -> argparse.ArgumentParser:
+    defaults = AppConfig()
+    parser = argparse.ArgumentParser(prog="video-duplicate-check")
+    parser.add_argument("--cache-db", type=Path, default=defaults.cache_db)
+    parser.add_argument("--threshold", type=float, default=defaults.similarity_threshold)
+    parser.add_argument(
+        "--duration-tolerance",
+        type=float,
+        default=defaults.duration_tolerance_seconds,
+    )
+    parser.add_argument("--frame-interval", type=int, default=defaults.frame_interval_seconds)
+    parser.add_argument(
+        "--profile",
+        choices=["low", "medium", "high"],
+        default=defaults.performance_profile,
+    )
+    parser.add_argument(
+        "--extensions",
+        default=",".join(sorted(defaults.supported_extensions)),
+        help="逗号分隔的扩展名列表",
+    )
+    parser.add_argument(
+        "--extraction-timeout",
+        type=float,
+        default=defaults.extraction_timeout_seconds,
+        help="单文件提取的基础时间预算（秒），0 表示不限制",
+    )
+    parser.add_argument(
+        "--extraction-timeout-per-second",
+        type=float,
+        default=defaults.extraction_timeout_per_media_second,
+        help="每秒视频时长追加的时间预算（秒）",
+    )
+    parser.add_argument("--max-frames", type=int, default=defaults.extraction_max_frames)
+    parser.add_argument("--retry-failed", action="store_true")
+    parser.add_argument(
+        "--fixed-workers",
+        action="store_true",
+        help="关闭自适应并发，按性能档位固定解码线程数",
+    )
+    parser.add_argument(
+        "--order",
+        choices=["path", "longest_first", "likely_duplicates"],
+        default=defaults.scan_order,
+        help="待提取文件的提交顺序",
+    )
+    parser.add_argument(
+        "--background",
+        action="store_true",
+        help="后台模式：降低优先级并限制 CPU 占用，机器空闲时自动提速",
+    )
+    parser.add_argument(
+        "--background-cpu-share",
+        type=float,
+        default=defaults.background_cpu_share,
+        help="后台模式下本进程可用的 CPU 比例（0~1）",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        default=defaults.memory_budget_mb,
+        metavar="MB",
+        help="解码任务的内存预算，0 表示物理内存的一半，负数表示不限制",
+    )
+    parser.add_argument(
+        "--io-limit",
+        action="append",
+        default=[],
+        metavar="PATH=N",
+        help="限制该路径下同时解码的文件数，可重复指定；0 表示不限",
+    )
+    parser.add_argument(
+        "--no-checkpoint",
+        action="store_true",
+        help="不保存扫描检查点，中断后下次从头扫描",
+    )
+    parser.add_argument(
+        "--no-directory-index",
+        action="store_true",
+        help="不复用目录索引，每次完整遍历目录",
+    )
+    parser.add_argument(
+        "--cache-maintenance",
+        action="store_true",
+        help="扫描完成后清理已删除文件的缓存记录并整理缓存库",
+    )
+    parser.add_argument(
+        "--cache-max-age",
+        type=float,
+        default=defaults.cache_max_age_days,
+        metavar="DAYS",
+        help="缓存维护时同时删除扫描根目录之外超过该天数未更新的记录，0 表示不删除",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scan = commands.add_parser("scan", help="扫描目录并以 JSON Lines 输出重复组")
+    scan.add_argument("roots", type=Path, nargs="+")
+    scan.add_argument("--output", type=Path, help="输出文件，默认写到标准输出")
+
+    shard = commands.add_parser(
+        "shard",
+        help="只提取属于某个分片的文件，写入 --cache-db 指定的分片缓存库",
+    )
+    shard.add_argument("roots", type=Path, nargs="+")
+    shard.add_argument("--index", type=int, default=0, help="本分片编号，从 0 开始")
+    shard.add_argument("--count", type=int, default=1, help="分片总数")
+    shard.add_argument(
+        "--file-list",
+        type=Path,
+        help="按文件列表分片：每行一个路径（绝对路径或相对第一个根目录），忽略 --index/--count",
+    )
+
+    merge = commands.add_parser(
+        "merge",
+        help="把分片缓存库合并进 --cache-db，再对全部指纹统一分组，以 JSON Lines 输出",
+    )
+    merge.add_argument("shards", type=Path, nargs="+")
+    merge.add_argument("--roots", type=Path, nargs="*", help="只对这些目录下的文件分组")
+    merge.add_argument("--output", type=Path, help="输出文件，默认写到标准输出")
+
+    export = commands.add_parser(
+        "export",
+        help="把缓存库中某个根目录下的指纹导出为便携格式，路径保存为相对根目录",
+    )
+    export.add_argument("root", type=Path)
+    export.add_argument("--output", type=Path, required=True)
+
+    import_ = commands.add_parser("import", help="导入便携格式的指纹到缓存库")
+    import_.add_argument("source", type=Path)
+    import_.add_argument("--root", type=Path, help="本机对应的根目录，默认沿用导出时的根目录")
+    import_.add_argument(
+        "--remap",
+        action="append",
+        default=[],
+        metavar="PREFIX=DIR",
+        help="把相对路径以 PREFIX 开头的记录放到本机目录 DIR 下，可重复；"
+        "其余记录放到 --root 下，未指定 --root 时跳过",
+    )
+    import_.add_argument(
+        "--trust-size",
+        action="store_true",
+        help="本地文件大小一致即视为同一文件并改用本地 mtime（复制时没有保留 mtime 时使用）",
+    )
+
+    lookup = commands.add_parser("lookup", help="在缓存库中查找与指定视频相似的视频")
+    lookup.add_argument("video", type=Path)
+    lookup.add_argument("--limit", type=int, default=0, help="最多输出的结果数，0 表示不限制")
+    return parser
+
+
+def _parse_io_limits(values: list[str]) -> dict[str, int]:
+    limits: dict[str, int] = {}
+    for value in values:
+        path, separator, limit = value.rpartition("=")
+        if not separator or not path or not limit.isdigit():
+            raise SystemExit(f"无效的 --io-limit 参数: {value}（应为 路径=数量）")
+        limits[path] = int(limit)
+    return limits
+
+
+def _parse_remaps(values: list[str]) -> list[tuple[str, Path]]:
+    remaps: list[tuple[str, Path]] = []
+    for value in values:
+        prefix, separator, target = value.partition("=")
+        if not separator or not prefix.strip("/") or not target:
+            raise SystemExit(f"无效的 --remap 参数: {value}（应为 相对路径前缀=本机目录）")
+        remaps.append((prefix, Path(target)))
+    return remaps
+
+
+def _config_from_args(args: argparse.Namespace) -> AppConfig:
+    config = AppConfig(
+        cache_db=args.cache_db,
+        frame_interval_seconds=args.frame_interval,
+        similarity_threshold=args.threshold,
+        duration_tolerance_seconds=args.duration_tolerance,
+        performance_profile=args.profile,
+        retry_failed_files=args.retry_failed,
+        extraction_timeout_seconds=args.extraction_timeout,
+        extraction_timeout_per_media_second=args.extraction_timeout_per_second,
+        extraction_max_frames=args.max_frames,
+        adaptive_concurrency_enabled=not args.fixed_workers,
+        device_io_limits=_parse_io_limits(args.io_limit),
+        scan_order=args.order,
+        memory_budget_mb=args.memory_budget,
+        background_mode=args.background,
+        background_cpu_share=args.background_cpu_share,
+        scan_checkpoint_enabled=not args.no_checkpoint,
+        directory_index_enabled=not args.no_directory_index,
+        cache_maintenance_enabled=args.cache_maintenance,
+        cache_max_age_days=args.cache_max_age,
+    )
+    config.supported_extensions = {
+        ext if ext.startswith(".") else f".{ext}"
+        for ext in (part.strip().lower() for part in args.extensions.split(","))
+        if ext
+    }
+    return config
+
+
+def _log(text: str) -> None:
+    # 进度写到标准错误，标准输出只留给 JSON Lines
+    sys.stderr.write(text + "\n")
+
+
+def _group_to_dict(group: DuplicateGroup) -> dict[str, object]:
+    return {
+        "similarity": round(group.similarity, 4),
+        "alias": group.is_alias,
+        "recommended_keep": str(group.recommended_keep.path),
+        "items": [
+            {
+                "path": str(item.path),
+                "duration_seconds": item.duration_seconds,
+                "width": item.width,
+                "height": item.height,
+                "bitrate": item.bitrate,
+                "size_bytes": item.size_bytes,
+            }
+            for item in group.items
+        ],
+    }
+
+
+class _StderrSink(ScanSink):
+    def on_status(self, text: str) -> None:
+        _log(text)
+
+
+class _StreamingSink(_StderrSink):
+    # 每个组生成后立即写出，比较阶段很长时下游可以边读边处理
+    def __init__(self, output: TextIO) -> None:
+        self._output = output
+
+    def on_group(self, group: DuplicateGroup) -> None:
+        _write_group(self._output, group)
+
+
+@contextmanager
+def _open_output(output_path: Path | None) -> Iterator[TextIO]:
+    if output_path is None:
+        yield sys.stdout
+        return
+    with output_path.open("w", encoding="utf-8") as output:
+        yield output
+
+
+def _write_group(output: TextIO, group: DuplicateGroup) -> None:
+    output.write(json.dumps(_group_to_dict(group), ensure_ascii=False) + "\n")
+    output.flush()
+
+
+def _write_groups(groups: list[DuplicateGroup], output_path: Path | None) -> None:
+    with _open_output(output_path) as output:
+        for group in groups:
+            _write_group(output, group)
+
+
+def _run_engine(engine: ScanEngine) -> tuple[list[DuplicateGroup] | None, bool]:
+    # 扫描放到工作线程，主线程只等待 Ctrl+C：请求停止后扫描线程会保存检查点、
+    # 关闭数据库再返回，下次运行从检查点继续
+    outcome: list[list[DuplicateGroup] | None] = []
+    errors: list[Exception] = []
+
+    def run() -> None:
+        try:
+            outcome.append(engine.run())
+        except Exception as exc:  # noqa: BLE001
+            errors.append(exc)
+
+    worker = threading.Thread(target=run, name="scan-engine", daemon=True)
+    worker.start()
+    interrupted = False
+    try:
+        while worker.is_alive():
+            worker.join(0.2)
+    except KeyboardInterrupt:
+        interrupted = True
+        _log("收到中断信号，正在保存进度...")
+        engine.request_stop()
+        worker.join()
+    if errors:
+        raise errors[0]
+    return (outcome[0] if outcome else None), interrupted
+
+
+def _run_scan(args: argparse.Namespace) -> int:
+    config = _config_from_args(args)
+    with _open_output(args.output) as output:
+        groups, interrupted = _run_engine(ScanEngine(args.roots, config, _StreamingSink(output)))
+    if interrupted:
+        return 130
+    return 1 if groups is None else 0
+
+
+def _run_shard(args: argparse.Namespace) -> int:
+    config = _config_from_args(args)
+    try:
+        shard = ShardFilter(
+            args.roots,
+            index=args.index,
+            count=args.count,
+            file_list=read_file_list(args.file_list) if args.file_list is not None else None,
+        )
+    except (OSError, ValueError) as exc:
+        _log(str(exc))
+        return 2
+    _log(f"分片 {shard.key}，缓存库 {config.cache_db}")
+    # 分片内的分组结果没有意义，只需要把指纹写入分片缓存库
+    groups, interrupted = _run_engine(ScanEngine(args.roots, config, _StderrSink(), shard=shard))
+    if interrupted:
+        return 130
+    return 1 if groups is None else 0
+
+
+def _run_merge(args: argparse.Namespace) -> int:
+    config = _config_from_args(args)
+    db = FingerprintDatabase(config.cache_db)
+    try:
+        for shard_path in args.shards:
+            try:
+                merged = db.merge_from(shard_path)
+            except (OSError, sqlite3.Error) as exc:
+                _log(f"合并失败: {shard_path} ({exc})")
+                return 1
+            _log(f"已合并 {shard_path}: {merged} 条指纹")
+        fingerprints = list(db.iter_fingerprints(args.roots or None))
+    finally:
+        db.close()
+
+    _log(f"共 {len(fingerprints)} 条指纹，正在分组...")
+    groups = build_duplicate_groups(
+        fingerprints,
+        similarity_threshold=config.similarity_threshold,
+        duration_tolerance_seconds=config.duration_tolerance_seconds,
+    )
+    _log(f"发现 {len(groups)} 组重复/近似视频")
+    _write_groups(groups, args.output)
+    return 0
+
+
+def _run_export(args: argparse.Namespace) -> int:
+    config = _config_from_args(args)
+    db = FingerprintDatabase(config.cache_db)
+    try:
+        written, skipped = export_fingerprints(db, args.root, args.output)
+    except OSError as exc:
+        _log(f"导出失败: {exc}")
+        return 1
+    finally:
+        db.close()
+    _log(f"已导出 {written} 条指纹到 {args.output}" + (f"，跳过 {skipped} 条" if skipped else ""))
+    return 0
+
+
+def _run_import(args: argparse.Namespace) -> int:
+    config = _config_from_args(args)
+    remaps = _parse_remaps(args.remap)
+    db = FingerprintDatabase(config.cache_db)
+    try:
+        report = import_fingerprints(
+            db,
+            args.source,
+            args.root,
+            remap=prefix_remap(remaps, args.root) if remaps else None,
+            trust_size=args.trust_size,
+        )
+    except (OSError, PortableFormatError) as exc:
+        _log(f"导入失败: {args.source} ({exc})")
+        return 1
+    finally:
+        db.close()
+    _log(f"已导入 {report.imported} 条指纹，{report.stale} 条因本地文件大小不同而跳过")
+    if report.skipped:
+        _log(f"{report.skipped} 条不匹配任何 --remap 前缀，已跳过")
+    return 0
+
+
+def _run_lookup(args: argparse.Namespace) -> int:
+    config = _config_from_args(args)
+    db = FingerprintDatabase(config.cache_db)
+    try:
+        result = lookup_similar(
+            db,
+            args.video,
+            frame_interval_seconds=config.frame_interval_seconds,
+            similarity_threshold=config.similarity_threshold,
+            duration_tolerance_seconds=config.duration_tolerance_seconds,
+        )
+    except (OSError, VideoDecodeError) as exc:
+        _log(f"查找失败: {args.video} ({exc})")
+        return 1
+    finally:
+        db.close()
+
+    matches = result.matches[: args.limit] if args.limit > 0 else result.matches
+    for item, similarity in matches:
+        sys.stdout.write(
+            json.dumps(
+                {
+                    "path": str(item.path),
+                    "similarity": round(similarity, 4),
+                    "duration_seconds": item.duration_seconds,
+                    "width": item.width,
+                    "height": item.height,
+                    "size_bytes": item.size_bytes,
+                },
+                ensure_ascii=False,
+            )
+            + "\n"
+        )
+    return 0
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "scan":
+        return _run_scan(args)
+    if args.command == "shard":
+        return _run_shard(args)
+    if args.command == "merge":
+        return _run_merge(args)
+    if args.command == "export":
+        return _run_export(args)
+    if args.command == "import":
+        return _run_import(args)
+    if args.command == "lookup":
+        return _run_lookup(args)
+    return 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,6 +4,7 @@ from typing import Literal
 
 
 PerformanceProfile = Literal["low", "medium", "high"]
+ScanOrder = Literal["path", "longest_first", "likely_duplicates"]
 
 
 @dataclass(slots=True)
@@ -17,6 +18,33 @@ class AppConfig:
     progress_emit_min_interval_seconds: float = 0.05
     task_emit_min_interval_seconds: float = 0.2
     performance_profile: PerformanceProfile = "medium"
+    cache_maintenance_enabled: bool = False
+    cache_max_age_days: float = 0.0
+    retry_failed_files: bool = False
+    # 单文件提取的时间预算 = 基础秒数 + 视频时长 × 系数。逐帧解码的耗时与时长成正比，
+    # 固定上限会把长视频/4K 误判为超时；基础秒数为 0 表示不限制
+    extraction_timeout_seconds: float = 300.0
+    extraction_timeout_per_media_second: float = 2.0
+    extraction_max_frames: int = 0
+    scan_checkpoint_enabled: bool = True
+    # 目录 mtime 未变化时复用上次的文件列表，省去读取目录项；文件仍逐个 stat
+    directory_index_enabled: bool = True
+    adaptive_concurrency_enabled: bool = True
+    device_scheduling_enabled: bool = True
+    # 路径前缀 -> 该路径下文件同时解码的上限，0 表示不限；未配置的设备按类型自动判断
+    device_io_limits: dict[str, int] = field(default_factory=dict)
+    # longest_first: 大文件先提交，避免几个超长视频最后才开始拖慢整体耗时；
+    # likely_duplicates: 同大小/同名的文件先提取，部分结果更早出现真正的重复组
+    scan_order: ScanOrder = "longest_first"
+    # 解码时向内核发出的预读窗口（posix_fadvise），0 表示关闭预读/丢弃页缓存提示
+    readahead_window_mb: int = 32
+    # 解码任务的内存预算（常驻内存），0 表示取物理内存的一半，负数表示不限制
+    memory_budget_mb: int = 0
+    # 后台模式：解码线程降低 CPU/I/O 优先级，并把本进程 CPU 占用限制在整机的该比例内
+    background_mode: bool = False
+    background_cpu_share: float = 0.25
+    watch_settle_seconds: float = 5.0
+    watch_poll_interval_seconds: float = 10.0
     supported_extensions: set[str] = field(
         default_factory=lambda: {".mp4", ".avi", ".mkv", ".mov", ".wmv", ".flv", ".webm"}
     )
@@ -0,0 +1,126 @@
+import ctypes
+import os
+import platform
+import sys
+import threading
+import time
+from collections.abc import Callable
+
+from .concurrency import ResourceSampler
+
+_BACKGROUND_NICE = 10
+_IOPRIO_WHO_PROCESS = 1
+_IOPRIO_CLASS_IDLE = 3
+_IOPRIO_CLASS_SHIFT = 13
+# ioprio_set 没有 libc 封装，只能按架构取系统调用号
+_SYS_IOPRIO_SET = {
+    "x86_64": 251,
+    "i386": 289,
+    "i686": 289,
+    "aarch64": 30,
+    "riscv64": 30,
+    "armv7l": 314,
+    "armv6l": 314,
+}
+_THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+
+_thread_state = threading.local()
+
+
+def _set_linux_idle_io(tid: int) -> bool:
+    number = _SYS_IOPRIO_SET.get(platform.machine())
+    if number is None:
+        return False
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+    except OSError:
+        return False
+    value = _IOPRIO_CLASS_IDLE << _IOPRIO_CLASS_SHIFT
+    return libc.syscall(number, _IOPRIO_WHO_PROCESS, tid, value) == 0
+
+
+def lower_current_thread_priority() -> bool:
+    # 只降低当前线程（及其之后创建的解码线程）的优先级，界面和数据库线程不受影响。
+    # Linux: nice 10 + idle I/O 类（仅 BFQ/CFQ 调度器生效）；
+    # Windows: 线程后台模式，同时降低 CPU、I/O 和内存页优先级。每个线程只设置一次
+    if getattr(_thread_state, "lowered", False):
+        return True
+    applied = False
+    if sys.platform.startswith("linux"):
+        tid = threading.get_native_id()
+        try:
+            # Linux 上 PRIO_PROCESS 配合线程 id 只作用于该线程；普通用户只能调高 nice
+            current = os.getpriority(os.PRIO_PROCESS, tid)
+            os.setpriority(os.PRIO_PROCESS, tid, max(current, _BACKGROUND_NICE))
+            applied = True
+        except OSError:
+            pass
+        applied = _set_linux_idle_io(tid) or applied
+    elif sys.platform == "win32":
+        kernel32 = ctypes.windll.kernel32
+        applied = bool(
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), _THREAD_MODE_BACKGROUND_BEGIN)
+        )
+    _thread_state.lowered = True
+    return applied
+
+
+class CpuThrottle:
+    # 令牌桶：令牌是本进程可用的 CPU 秒数，按 share × 核数 每秒补充，在采样点按实际消耗
+    # （process_time）扣除，透支时休眠。其他进程几乎不占 CPU（机器空闲）时不限速，
+    # 需要能读取整机 CPU 占用，否则始终按上限执行
+    def __init__(
+        self,
+        share: float,
+        *,
+        idle_threshold: float = 0.1,
+        burst_seconds: float = 1.0,
+        check_interval_seconds: float = 2.0,
+        sampler: ResourceSampler | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        cpu_time: Callable[[], float] = time.process_time,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._rate = max(0.01, share) * max(1, os.cpu_count() or 1)
+        self._burst = self._rate * burst_seconds
+        self._idle_threshold = idle_threshold
+        self._check_interval = check_interval_seconds
+        self._sampler = sampler or ResourceSampler()
+        self._clock = clock
+        self._cpu_time = cpu_time
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self._burst
+        self._last_time = clock()
+        self._last_cpu = cpu_time()
+        self._last_check = self._last_time
+        self.idle = False
+        self.throttled_seconds = 0.0
+
+    def _refresh_idle(self, now: float) -> None:
+        if now - self._last_check < self._check_interval:
+            return
+        self._last_check = now
+        sample = self._sampler.sample()
+        others = max(0.0, sample.cpu_busy - sample.process_busy)
+        self.idle = self._sampler.system_wide and others < self._idle_threshold
+
+    def throttle(self) -> float:
+        with self._lock:
+            now = self._clock()
+            cpu = self._cpu_time()
+            refill = (now - self._last_time) * self._rate
+            self._tokens = min(self._burst, self._tokens + refill) - (cpu - self._last_cpu)
+            self._last_time = now
+            self._last_cpu = cpu
+            self._refresh_idle(now)
+            if self.idle:
+                self._tokens = self._burst
+                return 0.0
+            if self._tokens >= 0:
+                return 0.0
+            # 并行的线程同时休眠，期间补充的令牌正好抵消透支，不会按线程数叠加
+            wait = min(0.5, -self._tokens / self._rate)
+            self.throttled_seconds += wait
+        self._sleep(wait)
+        return wait
@@ -0,0 +1,60 @@
+import threading
+import time
+from collections.abc import Callable
+
+
+class ExtractionCancelledError(Exception):
+    pass
+
+
+class CancellationToken:
+    def __init__(
+        self,
+        stop_event: threading.Event | None = None,
+        pause_event: threading.Event | None = None,
+        throttle: Callable[[], float] | None = None,
+    ) -> None:
+        self._stop_event = stop_event if stop_event is not None else threading.Event()
+        # pause_event 置位表示“运行中”，与 ScanWorker 的约定一致
+        if pause_event is None:
+            pause_event = threading.Event()
+            pause_event.set()
+        self._pause_event = pause_event
+        # 限速回调：在采样点按需休眠并返回休眠秒数，与暂停一样不计入时间预算
+        self._throttle = throttle
+
+    @property
+    def cancelled(self) -> bool:
+        return self._stop_event.is_set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._pause_event.is_set()
+
+    def cancel(self) -> None:
+        self._stop_event.set()
+        self._pause_event.set()
+
+    def pause(self) -> None:
+        self._pause_event.clear()
+
+    def resume(self) -> None:
+        self._pause_event.set()
+
+    def throttled(self, throttle: Callable[[], float]) -> "CancellationToken":
+        # 共用停止/暂停状态，只为单个任务附加限速
+        return CancellationToken(self._stop_event, self._pause_event, throttle)
+
+    def checkpoint(self) -> float:
+        if self._stop_event.is_set():
+            raise ExtractionCancelledError("Extraction cancelled")
+        if self._pause_event.is_set():
+            return self._throttle() if self._throttle is not None else 0.0
+
+        paused_at = time.monotonic()
+        while not self._pause_event.wait(0.1):
+            if self._stop_event.is_set():
+                break
+        if self._stop_event.is_set():
+            raise ExtractionCancelledError("Extraction cancelled")
+        return time.monotonic() - paused_at
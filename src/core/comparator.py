@@ -1,4 +1,6 @@
-from dataclasses import dataclass
+from collections.abc import Iterator
+from dataclasses import dataclass, replace
+from pathlib import Path
 
 from .fingerprint import VideoFingerprint
 from .hasher import normalized_similarity
@@ -9,6 +11,8 @@ class DuplicateGroup:
     items: list[VideoFingerprint]
     similarity: float
     recommended_keep: VideoFingerprint
+    # 同一物理文件的硬链接/符号链接，删除其中一个并不能释放空间
+    is_alias: bool = False
 
 
 def find_duplicate_groups(
@@ -16,15 +20,25 @@ def find_duplicate_groups(
     similarity_threshold: float,
     duration_tolerance_seconds: float,
 ) -> list[DuplicateGroup]:
+    return list(
+        iter_duplicate_groups(fingerprints, similarity_threshold, duration_tolerance_seconds)
+    )
+
+
+def iter_duplicate_groups(
+    fingerprints: list[VideoFingerprint],
+    similarity_threshold: float,
+    duration_tolerance_seconds: float,
+) -> Iterator[DuplicateGroup]:
+    # 组一旦生成就不再变化，可边比较边输出
     if len(fingerprints) < 2:
-        return []
+        return
 
     buckets: dict[int, list[VideoFingerprint]] = {}
     for fp in fingerprints:
         bucket_key = int(fp.duration_seconds / max(duration_tolerance_seconds, 1e-6))
         buckets.setdefault(bucket_key, []).append(fp)
 
-    groups: list[DuplicateGroup] = []
     visited: set[str] = set()
 
     for candidates in buckets.values():
@@ -37,9 +51,9 @@ def find_duplicate_groups(
             for target in candidates[idx + 1 :]:
                 if str(target.path) in visited:
                     continue
-                if not _metadata_candidate(source, target, duration_tolerance_seconds):
+                if not metadata_candidate(source, target, duration_tolerance_seconds):
                     continue
-                similarity = _combined_similarity(source, target)
+                similarity = combined_similarity(source, target)
                 if similarity >= similarity_threshold:
                     group.append(target)
                     min_similarity = min(min_similarity, similarity)
@@ -47,18 +61,44 @@ def find_duplicate_groups(
             if len(group) > 1:
                 for item in group:
                     visited.add(str(item.path))
-                groups.append(
-                    DuplicateGroup(
-                        items=sorted(group, key=lambda x: (x.path.name.lower(), x.size_bytes)),
-                        similarity=min_similarity,
-                        recommended_keep=_recommend_keep(group),
-                    )
-                )
+                yield make_group(group, min_similarity)
+
 
+def make_group(items: list[VideoFingerprint], similarity: float) -> DuplicateGroup:
+    return DuplicateGroup(
+        items=sorted(items, key=lambda x: (x.path.name.lower(), x.size_bytes)),
+        similarity=similarity,
+        recommended_keep=_recommend_keep(items),
+    )
+
+
+def make_alias_groups(
+    fingerprints: list[VideoFingerprint],
+    aliases: dict[Path, Path],
+) -> list[DuplicateGroup]:
+    members: dict[Path, list[Path]] = {}
+    for alias, owner in aliases.items():
+        members.setdefault(owner, []).append(alias)
+
+    groups: list[DuplicateGroup] = []
+    for fp in fingerprints:
+        linked = members.get(fp.path)
+        if not linked:
+            continue
+        # 链接共享同一份解码结果，只替换路径
+        items = [fp, *(replace(fp, path=path) for path in linked)]
+        groups.append(
+            DuplicateGroup(
+                items=sorted(items, key=lambda x: str(x.path).lower()),
+                similarity=1.0,
+                recommended_keep=fp,
+                is_alias=True,
+            )
+        )
     return groups
 
 
-def _combined_similarity(a: VideoFingerprint, b: VideoFingerprint) -> float:
+def combined_similarity(a: VideoFingerprint, b: VideoFingerprint) -> float:
     d_sim = normalized_similarity(a.d_hash, b.d_hash)
     p_sim = normalized_similarity(a.p_hash, b.p_hash)
 
@@ -67,7 +107,7 @@ def _combined_similarity(a: VideoFingerprint, b: VideoFingerprint) -> float:
     return (d_sim * 0.35 + p_sim * 0.65) * (1.0 - duration_penalty * 0.3)
 
 
-def _metadata_candidate(
+def metadata_candidate(
     source: VideoFingerprint,
     target: VideoFingerprint,
     duration_tolerance_seconds: float,
@@ -75,20 +115,20 @@ def _metadata_candidate(
     if abs(source.duration_seconds - target.duration_seconds) > duration_tolerance_seconds:
         return False
 
-    if abs(_size_bucket(source.size_bytes) - _size_bucket(target.size_bytes)) > 2:
+    if abs(size_bucket(source.size_bytes) - size_bucket(target.size_bytes)) > 2:
         return False
 
-    if abs(_resolution_bucket(source) - _resolution_bucket(target)) > 2:
+    if abs(resolution_bucket(source) - resolution_bucket(target)) > 2:
         return False
 
     return True
 
 
-def _size_bucket(size_bytes: int) -> int:
+def size_bucket(size_bytes: int) -> int:
     return max(1, size_bytes).bit_length() // 2
 
 
-def _resolution_bucket(fp: VideoFingerprint) -> int:
+def resolution_bucket(fp: VideoFingerprint) -> int:
     pixels = max(1, fp.width * fp.height)
     return pixels.bit_length() // 2
 
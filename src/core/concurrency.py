@@ -0,0 +1,330 @@
+import os
+import threading
+import time
+from collections.abc import Callable, Hashable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from .cancellation import CancellationToken
+
+# 每个像素的解码占用：BGR 帧 3 字节 + 解码器参考帧（YUV420 每帧 1.5 字节，按 8 帧计）
+_DECODE_BYTES_PER_PIXEL = 3 + 12
+_DECODER_OVERHEAD_BYTES = 16 * 1024 * 1024
+_UNKNOWN_DECODE_BYTES = 64 * 1024 * 1024
+
+
+@dataclass(slots=True)
+class ResourceSample:
+    # 0~1，整机 CPU 忙碌比例；无法读取 /proc/stat 时退化为本进程占用的 CPU 比例
+    cpu_busy: float
+    # 0~1，CPU 等待 I/O 的时间比例；非 Linux 平台为 0
+    io_wait: float
+    # 可用内存占总内存的比例；无法读取时为 None
+    memory_available: float | None
+    # 0~1，本进程占整机 CPU 的比例
+    process_busy: float = 0.0
+
+
+def _read_proc_stat() -> tuple[int, int, int] | None:
+    try:
+        with open("/proc/stat", encoding="ascii") as handle:
+            fields = handle.readline().split()
+    except OSError:
+        return None
+    if not fields or fields[0] != "cpu":
+        return None
+    # user nice system idle iowait irq softirq steal ...
+    values = [int(value) for value in fields[1:9]]
+    total = sum(values)
+    idle = values[3]
+    iowait = values[4] if len(values) > 4 else 0
+    return total, idle, iowait
+
+
+def _read_memory_available() -> float | None:
+    try:
+        text = Path("/proc/meminfo").read_text(encoding="ascii")
+    except OSError:
+        return None
+    info: dict[str, int] = {}
+    for line in text.splitlines():
+        name, _, rest = line.partition(":")
+        parts = rest.split()
+        if parts:
+            info[name] = int(parts[0])
+    total = info.get("MemTotal", 0)
+    if total <= 0 or "MemAvailable" not in info:
+        return None
+    return info["MemAvailable"] / total
+
+
+def total_memory_bytes() -> int | None:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def read_rss_bytes() -> int | None:
+    # 当前常驻内存；getrusage 只给峰值，不能用来判断是否已回落
+    try:
+        fields = Path("/proc/self/statm").read_text(encoding="ascii").split()
+        return int(fields[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, IndexError, ValueError, AttributeError):
+        return None
+
+
+def estimate_decode_bytes(width: int, height: int) -> int:
+    if width <= 0 or height <= 0:
+        return _UNKNOWN_DECODE_BYTES
+    return width * height * _DECODE_BYTES_PER_PIXEL + _DECODER_OVERHEAD_BYTES
+
+
+class MemoryBudget:
+    # 按分辨率预估每个解码任务的内存，预估总和加上起始 RSS 超过预算时新任务等待；
+    # 批次之间读取实际 RSS，预估偏少时把差额计入，收紧后续准入。
+    # 没有任务在运行时总是放行一个，避免单个超大文件永远无法开始
+    def __init__(
+        self,
+        budget_bytes: int,
+        *,
+        rss_reader: Callable[[], int | None] = read_rss_bytes,
+    ) -> None:
+        self.budget_bytes = budget_bytes
+        self._rss_reader = rss_reader
+        self.baseline_bytes = rss_reader() or 0
+        self._condition = threading.Condition()
+        self._reserved: dict[Hashable, int] = {}
+        self._excess = 0
+        self.waits = 0
+
+    @property
+    def reserved_bytes(self) -> int:
+        with self._condition:
+            return sum(self._reserved.values())
+
+    def _fits(self, estimate: int) -> bool:
+        if not self._reserved:
+            return True
+        used = self.baseline_bytes + self._excess + sum(self._reserved.values())
+        return used + estimate <= self.budget_bytes
+
+    @contextmanager
+    def reserve(
+        self,
+        key: Hashable,
+        estimate: int,
+        token: CancellationToken | None = None,
+    ) -> Iterator[None]:
+        with self._condition:
+            if not self._fits(estimate):
+                self.waits += 1
+            while not self._fits(estimate):
+                self._condition.wait(0.2)
+                if token is not None:
+                    # 等待期间响应暂停和停止
+                    self._condition.release()
+                    try:
+                        token.checkpoint()
+                    finally:
+                        self._condition.acquire()
+            self._reserved[key] = estimate
+        try:
+            yield
+        finally:
+            self.abandon(key)
+
+    def abandon(self, key: Hashable) -> None:
+        with self._condition:
+            if self._reserved.pop(key, None) is not None:
+                self._condition.notify_all()
+
+    def observe(self) -> int | None:
+        rss = self._rss_reader()
+        if rss is None:
+            return None
+        with self._condition:
+            reserved = sum(self._reserved.values())
+            self._excess = max(0, rss - self.baseline_bytes - reserved)
+            self._condition.notify_all()
+        return rss
+
+
+class ResourceSampler:
+    def __init__(self) -> None:
+        self._cpu_count = max(1, os.cpu_count() or 1)
+        self._last_stat = _read_proc_stat()
+        self._last_wall = time.monotonic()
+        self._last_process = time.process_time()
+
+    @property
+    def system_wide(self) -> bool:
+        # 能否看到其他进程的 CPU 占用
+        return self._last_stat is not None
+
+    def sample(self) -> ResourceSample:
+        wall = time.monotonic()
+        process = time.process_time()
+        stat = _read_proc_stat()
+        elapsed = max(wall - self._last_wall, 1e-6)
+        process_busy = (process - self._last_process) / (elapsed * self._cpu_count)
+        if stat is not None and self._last_stat is not None and stat[0] > self._last_stat[0]:
+            total = stat[0] - self._last_stat[0]
+            idle = stat[1] - self._last_stat[1]
+            iowait = stat[2] - self._last_stat[2]
+            cpu_busy = (total - idle - iowait) / total
+            io_wait = iowait / total
+        else:
+            cpu_busy = process_busy
+            io_wait = 0.0
+        self._last_stat = stat
+        self._last_wall = wall
+        self._last_process = process
+        return ResourceSample(
+            cpu_busy=min(1.0, max(0.0, cpu_busy)),
+            io_wait=min(1.0, max(0.0, io_wait)),
+            memory_available=_read_memory_available(),
+            process_busy=min(1.0, max(0.0, process_busy)),
+        )
+
+
+class AdaptiveConcurrency:
+    # 按实测吞吐做爬山调整：上一步增加并发后吞吐提升就继续，下降就反向；
+    # CPU 超过上限或可用内存不足时无条件收缩。并发窗口随解码线程数同步缩放
+    def __init__(
+        self,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        *,
+        inflight_multiplier: int,
+        cpu_ceiling: float,
+        min_memory_available: float = 0.1,
+        interval_seconds: float = 3.0,
+        sampler: ResourceSampler | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self._limit = min(self.maximum, max(self.minimum, initial))
+        self._inflight_multiplier = max(1, inflight_multiplier)
+        self._cpu_ceiling = cpu_ceiling
+        self._min_memory_available = min_memory_available
+        self._interval_seconds = interval_seconds
+        self._sampler = sampler or ResourceSampler()
+        self._clock = clock
+
+        self._condition = threading.Condition()
+        self._active: set[Hashable] = set()
+        self._direction = 1
+        self._window_started = clock()
+        self._completed = 0
+        self._decode_seconds = 0.0
+
+        self.throughput: float | None = None
+        self.decode_seconds: float | None = None
+        self.last_sample: ResourceSample | None = None
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def inflight_limit(self) -> int:
+        # 单个文件解码很快时主循环的轮询间隔会让线程空等，需要更深的预提交队列
+        multiplier = self._inflight_multiplier
+        if self.decode_seconds is not None and self.decode_seconds < 0.5:
+            multiplier *= 2
+        return self._limit * multiplier
+
+    @contextmanager
+    def slot(self, key: Hashable, token: CancellationToken | None = None) -> Iterator[None]:
+        # 线程池按上限创建，实际同时解码的数量由这里的名额控制
+        with self._condition:
+            while len(self._active) >= self._limit:
+                self._condition.wait(0.2)
+                if token is not None:
+                    # 等待期间响应暂停和停止
+                    self._condition.release()
+                    try:
+                        token.checkpoint()
+                    finally:
+                        self._condition.acquire()
+            self._active.add(key)
+        started = self._clock()
+        try:
+            yield
+        finally:
+            elapsed = self._clock() - started
+            with self._condition:
+                if key in self._active:
+                    self._active.discard(key)
+                    self._completed += 1
+                    self._decode_seconds += elapsed
+                    self._condition.notify()
+
+    def abandon(self, key: Hashable) -> None:
+        # 看门狗放弃的任务线程可能永远不返回，先归还名额，之后返回时不再计数
+        with self._condition:
+            if key in self._active:
+                self._active.discard(key)
+                self._condition.notify()
+
+    def adjust(self) -> bool:
+        now = self._clock()
+        elapsed = now - self._window_started
+        with self._condition:
+            completed = self._completed
+            decode_seconds = self._decode_seconds
+        # 样本太少时吞吐抖动大，至少等每个线程都完成一个文件
+        if elapsed < self._interval_seconds or completed < self._limit:
+            return False
+
+        throughput = completed / elapsed
+        sample = self._sampler.sample()
+        previous = self.throughput
+        self.throughput = throughput
+        self.decode_seconds = decode_seconds / completed
+        self.last_sample = sample
+        with self._condition:
+            self._completed -= completed
+            self._decode_seconds -= decode_seconds
+        self._window_started = now
+
+        low_memory = (
+            sample.memory_available is not None
+            and sample.memory_available < self._min_memory_available
+        )
+        if sample.cpu_busy > self._cpu_ceiling or low_memory:
+            self._direction = -1
+            target = self._limit - max(1, self._limit // 4)
+        elif previous is None:
+            target = self._limit + self._direction
+        elif throughput < previous * 0.95:
+            # 上一步调整让吞吐下降，退回并换方向
+            self._direction = -self._direction
+            target = self._limit + self._direction
+        elif throughput > previous * 1.05:
+            target = self._limit + self._direction
+        elif sample.io_wait > 0.2:
+            # 吞吐持平但 CPU 大量等待 I/O，多开读取线程通常能掩盖存储延迟
+            self._direction = 1
+            target = self._limit + 1
+        else:
+            target = self._limit
+        if self._direction > 0 and sample.cpu_busy > self._cpu_ceiling * 0.9:
+            target = min(target, self._limit)
+        return self._set_limit(target)
+
+    def _set_limit(self, target: int) -> bool:
+        target = min(self.maximum, max(self.minimum, target))
+        if target == self._limit:
+            # 触到边界后下一轮从另一个方向试探
+            if target in (self.minimum, self.maximum) and self.minimum != self.maximum:
+                self._direction = 1 if target == self.minimum else -1
+            return False
+        with self._condition:
+            self._limit = target
+            self._condition.notify_all()
+        return True
@@ -1,8 +1,14 @@
+import json
+import os
 import sqlite3
+from collections.abc import Iterator
 from dataclasses import dataclass
 from pathlib import Path
 
+from ..utils.video_info import VideoDecodeError
+from .comparator import resolution_bucket, size_bucket
 from .fingerprint import VideoFingerprint
+from .scanner import DirectoryEntry, DirectoryIndex, FileRecord
 
 
 @dataclass(slots=True)
@@ -17,6 +23,135 @@ class CachedFingerprint:
     d_hash: int
     p_hash: int
 
+    def to_fingerprint(self) -> VideoFingerprint:
+        return VideoFingerprint(
+            path=self.path,
+            size_bytes=self.size_bytes,
+            duration_seconds=self.duration_seconds,
+            width=self.width,
+            height=self.height,
+            bitrate=self.bitrate,
+            d_hash=self.d_hash,
+            p_hash=self.p_hash,
+        )
+
+
+@dataclass(slots=True)
+class FailedFile:
+    path: Path
+    mtime: float
+    size_bytes: int
+    error_class: str
+    error_message: str
+    attempts: int
+
+
+MANIFEST_PENDING = "pending"
+MANIFEST_DONE = "done"
+MANIFEST_FAILED = "failed"
+MANIFEST_SKIPPED = "skipped"
+
+
+@dataclass(slots=True)
+class ManifestEntry:
+    path: Path
+    mtime: float
+    size_bytes: int
+    state: str
+    # 链接（MANIFEST_SKIPPED）指向的物理文件路径，续扫时据此恢复链接分组
+    alias_of: Path | None = None
+
+
+@dataclass(slots=True)
+class ScanManifest:
+    id: int
+    root: str
+    config_hash: str
+    walk_complete: bool
+    entries: list[ManifestEntry]
+
+
+@dataclass(slots=True)
+class CacheStats:
+    row_count: int
+    db_bytes: int
+    free_bytes: int
+    wal_bytes: int
+    hits: int
+    misses: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+
+@dataclass(slots=True)
+class CacheMaintenanceReport:
+    pruned: int
+    expired: int
+    before: CacheStats
+    after: CacheStats
+
+
+def _as_roots(root: Path | list[Path] | None) -> list[Path]:
+    if root is None:
+        return []
+    return [root] if isinstance(root, Path) else list(root)
+
+
+def _fingerprint_filter(
+    root: Path | list[Path] | None,
+    updated_since: str | None,
+) -> tuple[str, list[str]]:
+    clauses: list[str] = []
+    params: list[str] = []
+    roots = _as_roots(root)
+    if roots:
+        ranges: list[str] = []
+        for item in roots:
+            prefix = _path_prefix(item)
+            ranges.append("(path >= ? AND path < ?)")
+            params.extend((prefix, prefix + "\U0010ffff"))
+        clauses.append(f"({' OR '.join(ranges)})")
+    if updated_since is not None:
+        clauses.append("updated_at >= ?")
+        params.append(updated_since)
+    if not clauses:
+        return "", params
+    return f" WHERE {' AND '.join(clauses)}", params
+
+
+def _is_missing(path: str) -> bool:
+    try:
+        os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return True
+    except OSError:
+        # 无权限、句柄失效等错误说明不了文件已被删除
+        return False
+    return False
+
+
+def _row_to_fingerprint(row: sqlite3.Row) -> VideoFingerprint:
+    return VideoFingerprint(
+        path=Path(row["path"]),
+        size_bytes=row["size_bytes"],
+        duration_seconds=row["duration_seconds"],
+        width=row["width"],
+        height=row["height"],
+        bitrate=row["bitrate"],
+        d_hash=int(row["d_hash"]),
+        p_hash=int(row["p_hash"]),
+    )
+
+
+def _path_prefix(root: Path) -> str:
+    prefix = str(root)
+    if not prefix.endswith(os.sep):
+        prefix += os.sep
+    return prefix
+
 
 class FingerprintDatabase:
     def __init__(self, db_path: Path) -> None:
@@ -26,9 +161,13 @@ class FingerprintDatabase:
         self._configure_connection()
         self._pending_writes = 0
         self._commit_batch_size = 50
+        self._cache_hits = 0
+        self._cache_misses = 0
         self._init_schema()
 
     def _configure_connection(self) -> None:
+        # 需在建表前设置，新库才能直接使用增量 VACUUM
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
         self._conn.execute("PRAGMA journal_mode=WAL")
         self._conn.execute("PRAGMA synchronous=NORMAL")
         self._conn.execute("PRAGMA temp_store=MEMORY")
@@ -39,6 +178,7 @@ class FingerprintDatabase:
         self._conn.close()
 
     def _init_schema(self) -> None:
+        self._drop_outdated_directory_index()
         self._conn.execute(
             """
             CREATE TABLE IF NOT EXISTS fingerprints (
@@ -51,19 +191,153 @@ class FingerprintDatabase:
                 bitrate INTEGER NOT NULL,
                 d_hash TEXT NOT NULL,
                 p_hash TEXT NOT NULL,
+                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                size_bucket INTEGER NOT NULL DEFAULT 0,
+                resolution_bucket INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._add_bucket_columns()
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_fingerprints_updated_at ON fingerprints(updated_at)"
+        )
+        # 单文件检索按时长范围走索引，分桶条件在索引内过滤，无需回表
+        self._conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_fingerprints_lookup
+            ON fingerprints(duration_seconds, size_bucket, resolution_bucket)
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS failures (
+                path TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                error_class TEXT NOT NULL,
+                error_message TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 1,
                 updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
             )
             """
         )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS scan_manifests (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                root TEXT NOT NULL,
+                config_hash TEXT NOT NULL,
+                walk_complete INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(root, config_hash)
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS scan_manifest_files (
+                manifest_id INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                mtime REAL NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                alias_of TEXT,
+                PRIMARY KEY (manifest_id, path)
+            ) WITHOUT ROWID
+            """
+        )
+        self._add_manifest_alias_column()
+        # 删除行或按旧的 updated_at 合并行时递增，持久化的检索索引据此判断能否增量更新
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_state (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "INSERT OR IGNORE INTO cache_state (name, value) VALUES ('generation', 0)"
+        )
+        self._conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS fingerprints_deleted AFTER DELETE ON fingerprints
+            BEGIN
+              UPDATE cache_state SET value = value + 1 WHERE name = 'generation';
+            END
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS directory_index (
+                path TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                extensions TEXT NOT NULL,
+                subdirs TEXT NOT NULL,
+                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS directory_files (
+                dir TEXT NOT NULL,
+                name TEXT NOT NULL,
+                mtime REAL NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                device INTEGER NOT NULL DEFAULT 0,
+                inode INTEGER NOT NULL DEFAULT 0,
+                link_target TEXT,
+                PRIMARY KEY (dir, name)
+            ) WITHOUT ROWID
+            """
+        )
         self._conn.commit()
 
+    def _add_bucket_columns(self) -> None:
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(fingerprints)")}
+        if "size_bucket" in columns:
+            return
+        # 旧库补齐分桶列，并用与 comparator 相同的规则回填已有记录
+        self._conn.execute(
+            "ALTER TABLE fingerprints ADD COLUMN size_bucket INTEGER NOT NULL DEFAULT 0"
+        )
+        self._conn.execute(
+            "ALTER TABLE fingerprints ADD COLUMN resolution_bucket INTEGER NOT NULL DEFAULT 0"
+        )
+        # 分辨率分桶与大小分桶是同一公式，作用在像素数上
+        self._conn.create_function("bit_bucket", 1, size_bucket, deterministic=True)
+        self._conn.execute(
+            """
+            UPDATE fingerprints SET
+              size_bucket = bit_bucket(size_bytes),
+              resolution_bucket = bit_bucket(width * height)
+            """
+        )
+
+    def _add_manifest_alias_column(self) -> None:
+        columns = {
+            row["name"] for row in self._conn.execute("PRAGMA table_info(scan_manifest_files)")
+        }
+        if "alias_of" not in columns:
+            self._conn.execute("ALTER TABLE scan_manifest_files ADD COLUMN alias_of TEXT")
+
+    def _drop_outdated_directory_index(self) -> None:
+        # 目录索引只是遍历缓存，缺少文件身份列的旧表直接丢弃，下次扫描重建
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(directory_files)")}
+        if columns and "inode" not in columns:
+            self._conn.execute("DROP TABLE directory_files")
+            self._conn.execute("DROP TABLE IF EXISTS directory_index")
+
     def get_cached(self, path: Path, mtime: float, size_bytes: int) -> CachedFingerprint | None:
         row = self._conn.execute(
             "SELECT * FROM fingerprints WHERE path = ? AND mtime = ? AND size_bytes = ?",
             (str(path), mtime, size_bytes),
         ).fetchone()
         if row is None:
+            self._cache_misses += 1
             return None
+        self._cache_hits += 1
         return CachedFingerprint(
             path=Path(row["path"]),
             mtime=row["mtime"],
@@ -114,14 +388,99 @@ class FingerprintDatabase:
                 d_hash=int(row["d_hash"]),
                 p_hash=int(row["p_hash"]),
             )
+        self._cache_hits += len(cached)
+        self._cache_misses += len(by_path) - len(cached)
         return cached
 
+    def iter_fingerprints(
+        self,
+        root: Path | list[Path] | None = None,
+        *,
+        updated_since: str | None = None,
+    ) -> Iterator[VideoFingerprint]:
+        where, params = _fingerprint_filter(root, updated_since)
+        cursor = self._conn.execute(f"SELECT * FROM fingerprints{where}", params)
+        for row in cursor:
+            yield _row_to_fingerprint(row)
+
+    def iter_cached(self, root: Path | list[Path] | None = None) -> Iterator[CachedFingerprint]:
+        # 与 iter_fingerprints 相同，但带上 mtime，供导出后在其他机器上命中缓存
+        where, params = _fingerprint_filter(root, None)
+        for row in self._conn.execute(f"SELECT * FROM fingerprints{where}", params):
+            yield CachedFingerprint(
+                path=Path(row["path"]),
+                mtime=row["mtime"],
+                size_bytes=row["size_bytes"],
+                duration_seconds=row["duration_seconds"],
+                width=row["width"],
+                height=row["height"],
+                bitrate=row["bitrate"],
+                d_hash=int(row["d_hash"]),
+                p_hash=int(row["p_hash"]),
+            )
+
+    def iter_scheduling_hints(
+        self,
+        root: Path | list[Path] | None = None,
+    ) -> Iterator[tuple[Path, int, float]]:
+        # 只取路径、大小和时长，供调度器判断待提取文件是否可能与已缓存文件重复；
+        # 按根目录过滤，避免扫描一个子目录时把整个缓存库读进内存
+        where, params = _fingerprint_filter(root, None)
+        for row in self._conn.execute(
+            f"SELECT path, size_bytes, duration_seconds FROM fingerprints{where}", params
+        ):
+            yield Path(row["path"]), int(row["size_bytes"]), float(row["duration_seconds"])
+
+    def fingerprint_summary(
+        self,
+        root: Path | list[Path] | None = None,
+    ) -> tuple[int, str | None, int]:
+        # 行数 + 最近更新时间 + 代数，用于判断持久化的检索索引是否需要增量更新或重建
+        self.flush()
+        where, params = _fingerprint_filter(root, None)
+        row = self._conn.execute(
+            f"SELECT COUNT(*) AS count, MAX(updated_at) AS latest FROM fingerprints{where}",
+            params,
+        ).fetchone()
+        generation = self._conn.execute(
+            "SELECT value FROM cache_state WHERE name = 'generation'"
+        ).fetchone()
+        return int(row["count"]), row["latest"], int(generation["value"])
+
+    def find_candidates(
+        self,
+        fingerprint: VideoFingerprint,
+        duration_tolerance_seconds: float,
+    ) -> list[VideoFingerprint]:
+        # 与 comparator.metadata_candidate 相同的元数据预筛，由 idx_fingerprints_lookup 支撑
+        self.flush()
+        size_key = size_bucket(fingerprint.size_bytes)
+        resolution_key = resolution_bucket(fingerprint)
+        rows = self._conn.execute(
+            """
+            SELECT * FROM fingerprints
+            WHERE duration_seconds BETWEEN ? AND ?
+              AND size_bucket BETWEEN ? AND ?
+              AND resolution_bucket BETWEEN ? AND ?
+            """,
+            (
+                fingerprint.duration_seconds - duration_tolerance_seconds,
+                fingerprint.duration_seconds + duration_tolerance_seconds,
+                size_key - 2,
+                size_key + 2,
+                resolution_key - 2,
+                resolution_key + 2,
+            ),
+        )
+        return [_row_to_fingerprint(row) for row in rows]
+
     def upsert(self, fingerprint: VideoFingerprint, mtime: float) -> None:
         self._conn.execute(
             """
             INSERT INTO fingerprints
-            (path, mtime, size_bytes, duration_seconds, width, height, bitrate, d_hash, p_hash)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            (path, mtime, size_bytes, duration_seconds, width, height, bitrate, d_hash, p_hash,
+             size_bucket, resolution_bucket)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ON CONFLICT(path) DO UPDATE SET
               mtime=excluded.mtime,
               size_bytes=excluded.size_bytes,
@@ -131,6 +490,8 @@ class FingerprintDatabase:
               bitrate=excluded.bitrate,
               d_hash=excluded.d_hash,
               p_hash=excluded.p_hash,
+              size_bucket=excluded.size_bucket,
+              resolution_bucket=excluded.resolution_bucket,
               updated_at=CURRENT_TIMESTAMP
             """,
             (
@@ -143,14 +504,478 @@ class FingerprintDatabase:
                 fingerprint.bitrate,
                 str(fingerprint.d_hash),
                 str(fingerprint.p_hash),
+                size_bucket(fingerprint.size_bytes),
+                resolution_bucket(fingerprint),
             ),
         )
+        self._conn.execute("DELETE FROM failures WHERE path = ?", (str(fingerprint.path),))
         self._pending_writes += 1
         if self._pending_writes >= self._commit_batch_size:
             self.flush()
 
+    def merge_from(self, other_path: Path) -> int:
+        # 合并另一个缓存库（如分片扫描的结果），同一路径保留更新时间较新的记录
+        if not other_path.is_file():
+            raise FileNotFoundError(f"缓存库不存在: {other_path}")
+        FingerprintDatabase(other_path).close()  # 先让对方完成表结构迁移
+        self.flush()
+        self._conn.execute("ATTACH DATABASE ? AS shard", (str(other_path),))
+        try:
+            with self._conn:
+                before = self._conn.total_changes
+                self._conn.execute(
+                    """
+                    INSERT INTO fingerprints
+                    (path, mtime, size_bytes, duration_seconds, width, height, bitrate,
+                     d_hash, p_hash, updated_at, size_bucket, resolution_bucket)
+                    SELECT path, mtime, size_bytes, duration_seconds, width, height, bitrate,
+                           d_hash, p_hash, updated_at, size_bucket, resolution_bucket
+                    FROM shard.fingerprints WHERE true
+                    ON CONFLICT(path) DO UPDATE SET
+                      mtime=excluded.mtime,
+                      size_bytes=excluded.size_bytes,
+                      duration_seconds=excluded.duration_seconds,
+                      width=excluded.width,
+                      height=excluded.height,
+                      bitrate=excluded.bitrate,
+                      d_hash=excluded.d_hash,
+                      p_hash=excluded.p_hash,
+                      updated_at=excluded.updated_at,
+                      size_bucket=excluded.size_bucket,
+                      resolution_bucket=excluded.resolution_bucket
+                    WHERE excluded.updated_at > fingerprints.updated_at
+                    """
+                )
+                merged = self._conn.total_changes - before
+                if merged:
+                    # 合并进来的行保留分片上的 updated_at，可能早于检索索引快照的水位线
+                    self._conn.execute(
+                        "UPDATE cache_state SET value = value + 1 WHERE name = 'generation'"
+                    )
+                # 失败记录按文件签名比较：指纹对应同一版本或更新版本的文件时失败已过时。
+                # 先清掉被合并进来的指纹取代的本地失败记录
+                self._conn.execute(
+                    """
+                    DELETE FROM failures WHERE EXISTS (
+                      SELECT 1 FROM fingerprints AS fp
+                      WHERE fp.path = failures.path
+                        AND (fp.mtime > failures.mtime
+                             OR (fp.mtime = failures.mtime
+                                 AND fp.size_bytes = failures.size_bytes))
+                    )
+                    """
+                )
+                # 其他分片确定无法解码的文件不必在这里重试；超时等偶发错误不合并，
+                # 旧版本可能把它们也记成了失败
+                self._conn.execute(
+                    """
+                    INSERT INTO failures
+                    (path, mtime, size_bytes, error_class, error_message, attempts, updated_at)
+                    SELECT f.path, f.mtime, f.size_bytes, f.error_class, f.error_message,
+                           f.attempts, f.updated_at
+                    FROM shard.failures AS f
+                    WHERE f.error_class = ?
+                      AND NOT EXISTS (
+                        SELECT 1 FROM fingerprints AS fp
+                        WHERE fp.path = f.path
+                          AND (fp.mtime > f.mtime
+                               OR (fp.mtime = f.mtime AND fp.size_bytes = f.size_bytes))
+                      )
+                    ON CONFLICT(path) DO UPDATE SET
+                      mtime=excluded.mtime,
+                      size_bytes=excluded.size_bytes,
+                      error_class=excluded.error_class,
+                      error_message=excluded.error_message,
+                      attempts=excluded.attempts,
+                      updated_at=excluded.updated_at
+                    WHERE excluded.updated_at > failures.updated_at
+                    """,
+                    (VideoDecodeError.__name__,),
+                )
+        finally:
+            self._conn.execute("DETACH DATABASE shard")
+        return merged
+
+    def record_failure(
+        self,
+        path: Path,
+        mtime: float,
+        size_bytes: int,
+        error: BaseException,
+    ) -> int:
+        # 签名变化后重新计数，文件被替换时不沿用旧的失败次数
+        row = self._conn.execute(
+            """
+            INSERT INTO failures (path, mtime, size_bytes, error_class, error_message)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(path) DO UPDATE SET
+              attempts=CASE
+                WHEN failures.mtime = excluded.mtime AND failures.size_bytes = excluded.size_bytes
+                THEN failures.attempts + 1
+                ELSE 1
+              END,
+              mtime=excluded.mtime,
+              size_bytes=excluded.size_bytes,
+              error_class=excluded.error_class,
+              error_message=excluded.error_message,
+              updated_at=CURRENT_TIMESTAMP
+            RETURNING attempts
+            """,
+            (str(path), mtime, size_bytes, type(error).__name__, str(error)),
+        ).fetchone()
+        self._pending_writes += 1
+        if self._pending_writes >= self._commit_batch_size:
+            self.flush()
+        return int(row["attempts"])
+
+    def get_failed_bulk(
+        self,
+        signatures: list[tuple[Path, float, int]],
+    ) -> dict[str, FailedFile]:
+        if not signatures:
+            return {}
+
+        by_path: dict[str, tuple[float, int]] = {
+            str(path): (mtime, size) for path, mtime, size in signatures
+        }
+        placeholders = ",".join("?" for _ in by_path)
+        rows = self._conn.execute(
+            f"SELECT * FROM failures WHERE path IN ({placeholders})",
+            tuple(by_path.keys()),
+        ).fetchall()
+
+        failed: dict[str, FailedFile] = {}
+        for row in rows:
+            expected = by_path.get(row["path"])
+            if expected is None:
+                continue
+            if (row["mtime"], row["size_bytes"]) != expected:
+                continue
+            failed[row["path"]] = FailedFile(
+                path=Path(row["path"]),
+                mtime=row["mtime"],
+                size_bytes=row["size_bytes"],
+                error_class=row["error_class"],
+                error_message=row["error_message"],
+                attempts=row["attempts"],
+            )
+        return failed
+
+    def clear_failures(self, root: Path | None = None) -> int:
+        self.flush()
+        if root is None:
+            cursor = self._conn.execute("DELETE FROM failures")
+        else:
+            prefix = _path_prefix(root)
+            cursor = self._conn.execute(
+                "DELETE FROM failures WHERE path >= ? AND path < ?",
+                (prefix, prefix + "\U0010ffff"),
+            )
+        self._conn.commit()
+        return cursor.rowcount
+
     def flush(self) -> None:
         if self._pending_writes <= 0:
             return
         self._conn.commit()
         self._pending_writes = 0
+
+    def create_manifest(self, root: str, config_hash: str) -> int:
+        self.flush()
+        self._delete_manifests(root, config_hash)
+        cursor = self._conn.execute(
+            "INSERT INTO scan_manifests (root, config_hash) VALUES (?, ?)",
+            (root, config_hash),
+        )
+        self._conn.commit()
+        return int(cursor.lastrowid)
+
+    def load_manifest(self, root: str, config_hash: str) -> ScanManifest | None:
+        row = self._conn.execute(
+            "SELECT * FROM scan_manifests WHERE root = ? AND config_hash = ?",
+            (root, config_hash),
+        ).fetchone()
+        if row is None:
+            return None
+        entries = [
+            ManifestEntry(
+                path=Path(entry["path"]),
+                mtime=entry["mtime"],
+                size_bytes=entry["size_bytes"],
+                state=entry["state"],
+                alias_of=Path(entry["alias_of"]) if entry["alias_of"] is not None else None,
+            )
+            for entry in self._conn.execute(
+                "SELECT * FROM scan_manifest_files WHERE manifest_id = ? ORDER BY path",
+                (row["id"],),
+            )
+        ]
+        return ScanManifest(
+            id=row["id"],
+            root=row["root"],
+            config_hash=row["config_hash"],
+            walk_complete=bool(row["walk_complete"]),
+            entries=entries,
+        )
+
+    def add_manifest_entries(self, manifest_id: int, entries: list[ManifestEntry]) -> None:
+        if not entries:
+            return
+        self._conn.executemany(
+            """
+            INSERT OR REPLACE INTO scan_manifest_files
+            (manifest_id, path, mtime, size_bytes, state, alias_of)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    manifest_id,
+                    str(entry.path),
+                    entry.mtime,
+                    entry.size_bytes,
+                    entry.state,
+                    str(entry.alias_of) if entry.alias_of is not None else None,
+                )
+                for entry in entries
+            ],
+        )
+        self._pending_writes += len(entries)
+        if self._pending_writes >= self._commit_batch_size:
+            self.flush()
+
+    def set_manifest_state(self, manifest_id: int, path: Path, state: str) -> None:
+        # 与指纹写入共用批量提交，崩溃时两者保持一致
+        self._conn.execute(
+            "UPDATE scan_manifest_files SET state = ? WHERE manifest_id = ? AND path = ?",
+            (state, manifest_id, str(path)),
+        )
+        self._pending_writes += 1
+        if self._pending_writes >= self._commit_batch_size:
+            self.flush()
+
+    def complete_manifest_walk(self, manifest_id: int) -> None:
+        self._conn.execute(
+            "UPDATE scan_manifests SET walk_complete = 1 WHERE id = ?",
+            (manifest_id,),
+        )
+        self._conn.commit()
+        self._pending_writes = 0
+
+    def delete_manifest(self, manifest_id: int) -> None:
+        self.flush()
+        self._conn.execute("DELETE FROM scan_manifest_files WHERE manifest_id = ?", (manifest_id,))
+        self._conn.execute("DELETE FROM scan_manifests WHERE id = ?", (manifest_id,))
+        self._conn.commit()
+
+    def _delete_manifests(self, root: str, config_hash: str) -> None:
+        rows = self._conn.execute(
+            "SELECT id FROM scan_manifests WHERE root = ? AND config_hash = ?",
+            (root, config_hash),
+        ).fetchall()
+        for row in rows:
+            self._conn.execute(
+                "DELETE FROM scan_manifest_files WHERE manifest_id = ?",
+                (row["id"],),
+            )
+            self._conn.execute("DELETE FROM scan_manifests WHERE id = ?", (row["id"],))
+
+    def load_directory_index(self, root: Path, extensions_key: str) -> DirectoryIndex:
+        root_key = str(root)
+        prefix = _path_prefix(root)
+        entries: dict[str, DirectoryEntry] = {}
+        for row in self._conn.execute(
+            """
+            SELECT path, mtime, subdirs FROM directory_index
+            WHERE extensions = ? AND (path = ? OR (path >= ? AND path < ?))
+            """,
+            (extensions_key, root_key, prefix, prefix + "\U0010ffff"),
+        ):
+            entries[row["path"]] = DirectoryEntry(
+                mtime=row["mtime"],
+                subdirs=json.loads(row["subdirs"]),
+                files=[],
+            )
+
+        for row in self._conn.execute(
+            """
+            SELECT dir, name, mtime, size_bytes, device, inode, link_target
+            FROM directory_files
+            WHERE dir = ? OR (dir >= ? AND dir < ?)
+            """,
+            (root_key, prefix, prefix + "\U0010ffff"),
+        ):
+            entry = entries.get(row["dir"])
+            if entry is None:
+                continue
+            entry.files.append(
+                FileRecord(
+                    path=Path(os.path.join(row["dir"], row["name"])),
+                    mtime=row["mtime"],
+                    size_bytes=row["size_bytes"],
+                    device=row["device"],
+                    inode=row["inode"],
+                    link_target=Path(row["link_target"]) if row["link_target"] else None,
+                )
+            )
+        return DirectoryIndex(entries)
+
+    def save_directory_index(
+        self,
+        root: Path,
+        index: DirectoryIndex,
+        extensions_key: str,
+    ) -> None:
+        # 只应在完整遍历后调用：未访问到的已知目录视为已删除
+        self.flush()
+        root_key = str(root)
+        prefix = _path_prefix(root)
+        visited = index.visited
+        stale = [
+            (row["path"],)
+            for row in self._conn.execute(
+                "SELECT path FROM directory_index WHERE path = ? OR (path >= ? AND path < ?)",
+                (root_key, prefix, prefix + "\U0010ffff"),
+            )
+            if row["path"] not in visited
+        ]
+        stale.extend((directory,) for directory in index.updates)
+
+        self._conn.executemany("DELETE FROM directory_index WHERE path = ?", stale)
+        self._conn.executemany("DELETE FROM directory_files WHERE dir = ?", stale)
+        self._conn.executemany(
+            """
+            INSERT INTO directory_index (path, mtime, extensions, subdirs)
+            VALUES (?, ?, ?, ?)
+            """,
+            [
+                (directory, entry.mtime, extensions_key, json.dumps(entry.subdirs))
+                for directory, entry in index.updates.items()
+            ],
+        )
+        self._conn.executemany(
+            """
+            INSERT INTO directory_files
+                (dir, name, mtime, size_bytes, device, inode, link_target)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    directory,
+                    record.path.name,
+                    record.mtime,
+                    record.size_bytes,
+                    record.device,
+                    record.inode,
+                    str(record.link_target) if record.link_target else None,
+                )
+                for directory, entry in index.updates.items()
+                for record in entry.files
+            ],
+        )
+        self._conn.commit()
+        index.updates.clear()
+
+    def prune_missing(self, root: Path, existing_paths: set[str] | None = None) -> int:
+        self.flush()
+        prefix = _path_prefix(root)
+        pruned = 0
+        for table in ("fingerprints", "failures"):
+            rows = self._conn.execute(
+                f"SELECT path FROM {table} WHERE path >= ? AND path < ?",
+                (prefix, prefix + "\U0010ffff"),
+            ).fetchall()
+
+            stale: list[tuple[str]] = []
+            for row in rows:
+                path = row["path"]
+                if existing_paths is not None and path in existing_paths:
+                    continue
+                # 遍历时读取失败的目录（权限、网络盘掉线）也会让文件不在 existing_paths 里，
+                # 只有确认文件已不存在才删除，否则下次扫描整棵子树都要重新提取
+                if _is_missing(path):
+                    stale.append((path,))
+
+            if stale:
+                self._conn.executemany(f"DELETE FROM {table} WHERE path = ?", stale)
+            if table == "fingerprints":
+                pruned = len(stale)
+        self._conn.commit()
+        return pruned
+
+    def expire_older_than(
+        self,
+        max_age_days: float,
+        exclude_root: Path | list[Path] | None = None,
+    ) -> int:
+        if max_age_days <= 0:
+            return 0
+        self.flush()
+        modifier = f"-{float(max_age_days)} days"
+        clauses = ["updated_at < datetime('now', ?)"]
+        params: list[str] = [modifier]
+        for root in _as_roots(exclude_root):
+            prefix = _path_prefix(root)
+            clauses.append("NOT (path >= ? AND path < ?)")
+            params.extend((prefix, prefix + "\U0010ffff"))
+        cursor = self._conn.execute(
+            f"DELETE FROM fingerprints WHERE {' AND '.join(clauses)}",
+            params,
+        )
+        self._conn.commit()
+        return cursor.rowcount
+
+    def checkpoint(self) -> None:
+        self.flush()
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+
+    def incremental_vacuum(self, max_pages: int | None = None) -> None:
+        self.flush()
+        auto_vacuum = int(self._conn.execute("PRAGMA auto_vacuum").fetchone()[0])
+        if auto_vacuum != 2:
+            # 旧库建表时未开启增量模式，需要一次完整 VACUUM 才能切换
+            self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self._conn.execute("VACUUM")
+            return
+        if max_pages is None:
+            self._conn.execute("PRAGMA incremental_vacuum").fetchall()
+        else:
+            self._conn.execute(f"PRAGMA incremental_vacuum({int(max_pages)})").fetchall()
+
+    def stats(self) -> CacheStats:
+        page_size = int(self._conn.execute("PRAGMA page_size").fetchone()[0])
+        page_count = int(self._conn.execute("PRAGMA page_count").fetchone()[0])
+        freelist = int(self._conn.execute("PRAGMA freelist_count").fetchone()[0])
+        row_count = int(self._conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0])
+        wal_path = Path(f"{self._db_path}-wal")
+        try:
+            wal_bytes = wal_path.stat().st_size
+        except OSError:
+            wal_bytes = 0
+        return CacheStats(
+            row_count=row_count,
+            db_bytes=page_size * page_count,
+            free_bytes=page_size * freelist,
+            wal_bytes=wal_bytes,
+            hits=self._cache_hits,
+            misses=self._cache_misses,
+        )
+
+    def run_maintenance(
+        self,
+        root: Path | list[Path] | None = None,
+        *,
+        existing_paths: set[str] | None = None,
+        max_age_days: float = 0,
+    ) -> CacheMaintenanceReport:
+        self.flush()
+        before = self.stats()
+        pruned = sum(self.prune_missing(item, existing_paths) for item in _as_roots(root))
+        expired = self.expire_older_than(max_age_days, exclude_root=root)
+        self.checkpoint()
+        self.incremental_vacuum()
+        return CacheMaintenanceReport(
+            pruned=pruned,
+            expired=expired,
+            before=before,
+            after=self.stats(),
+        )
@@ -1,10 +1,13 @@
+import time
 from dataclasses import dataclass
 from pathlib import Path
 
 import cv2
 
-from ..utils.video_info import VideoInfo, read_video_info
+from ..utils.video_info import VideoDecodeError, VideoInfo, read_video_info
+from .cancellation import CancellationToken
 from .hasher import FrameHashes, dhash, phash
+from .readahead import DEFAULT_READAHEAD_BYTES, ReadAheadAdvisor
 
 
 @dataclass(slots=True)
@@ -19,9 +22,51 @@ class VideoFingerprint:
     p_hash: int
 
 
-def extract_fingerprint(path: Path, frame_interval_seconds: int) -> VideoFingerprint:
-    info = read_video_info(path)
-    hashes = _hash_video(info, frame_interval_seconds)
+@dataclass(slots=True)
+class ExtractionBudget:
+    # 0 表示不限制
+    max_seconds: float = 0.0
+    max_frames: int = 0
+    # 每秒视频时长追加的时间预算
+    seconds_per_media_second: float = 0.0
+
+    def time_limit(self, duration_seconds: float) -> float:
+        if self.max_seconds <= 0:
+            return 0.0
+        return self.max_seconds + max(0.0, duration_seconds) * self.seconds_per_media_second
+
+
+class ExtractionTimeoutError(TimeoutError):
+    def __init__(self, path: Path, elapsed_seconds: float) -> None:
+        super().__init__(f"Fingerprint extraction timed out after {elapsed_seconds:.1f}s: {path}")
+        self.path = path
+        self.elapsed_seconds = elapsed_seconds
+
+
+def extract_fingerprint(
+    path: Path,
+    frame_interval_seconds: int,
+    budget: ExtractionBudget | None = None,
+    token: CancellationToken | None = None,
+    *,
+    readahead_bytes: int = DEFAULT_READAHEAD_BYTES,
+    info: VideoInfo | None = None,
+) -> VideoFingerprint:
+    started_at = time.monotonic()
+    if token is not None:
+        started_at += token.checkpoint()
+    # 调用方为做内存准入已读过元数据时直接复用，避免再打开一次容器
+    if info is None:
+        info = read_video_info(path)
+    with ReadAheadAdvisor(path, info.size_bytes, readahead_bytes) as readahead:
+        hashes = _hash_video(
+            info,
+            frame_interval_seconds,
+            budget,
+            started_at,
+            token,
+            readahead,
+        )
     return VideoFingerprint(
         path=path,
         size_bytes=info.size_bytes,
@@ -34,40 +79,70 @@ def extract_fingerprint(path: Path, frame_interval_seconds: int) -> VideoFingerp
     )
 
 
-def _hash_video(info: VideoInfo, frame_interval_seconds: int) -> FrameHashes:
+def _hash_video(
+    info: VideoInfo,
+    frame_interval_seconds: int,
+    budget: ExtractionBudget | None = None,
+    started_at: float | None = None,
+    token: CancellationToken | None = None,
+    readahead: ReadAheadAdvisor | None = None,
+) -> FrameHashes:
+    started = time.monotonic() if started_at is None else started_at
+    time_limit = budget.time_limit(info.duration_seconds) if budget else 0.0
+    deadline = started + time_limit if time_limit > 0 else None
+    max_frames = budget.max_frames if budget and budget.max_frames > 0 else None
+
     cap = cv2.VideoCapture(str(info.path))
     if not cap.isOpened():
-        raise ValueError(f"Failed to open video for hashing: {info.path}")
+        raise VideoDecodeError(f"Failed to open video for hashing: {info.path}")
 
     fps = info.fps if info.fps > 0 else 1.0
     stride = max(1, int(frame_interval_seconds * fps))
     total = max(1, info.frame_count)
+    if max_frames is not None:
+        # 帧预算截断的是解码量，已采样的帧仍参与哈希
+        total = min(total, max_frames)
 
     d_values: list[int] = []
     p_values: list[int] = []
     idx = 0
     next_sample = 0
-
-    while idx < total:
-        if idx < next_sample:
-            if not cap.grab():
+    frame_count = max(1, info.frame_count)
+
+    try:
+        while idx < total:
+            if readahead is not None and idx % 16 == 0:
+                readahead.advance(idx / frame_count)
+            if token is not None:
+                # 暂停时长不计入时间预算；取消时直接丢弃已采样的部分结果
+                paused_seconds = token.checkpoint()
+                if paused_seconds > 0:
+                    started += paused_seconds
+                    if deadline is not None:
+                        deadline += paused_seconds
+            if deadline is not None and time.monotonic() > deadline:
+                raise ExtractionTimeoutError(info.path, time.monotonic() - started)
+
+            if idx < next_sample:
+                if not cap.grab():
+                    break
+                idx += 1
+                continue
+
+            ok, frame = cap.read()
+            if not ok:
                 break
-            idx += 1
-            continue
 
-        ok, frame = cap.read()
-        if not ok:
-            break
-
-        d_values.append(dhash(frame))
-        p_values.append(phash(frame))
-        next_sample += stride
-        idx += 1
-
-    cap.release()
+            d_values.append(dhash(frame))
+            p_values.append(phash(frame))
+            next_sample += stride
+            idx += 1
+    finally:
+        cap.release()
 
     if not d_values or not p_values:
-        return FrameHashes(d_hash=0, p_hash=0)
+        # 全零哈希会让所有解码失败的文件彼此“相似”，按解码失败处理
+        raise VideoDecodeError(f"No decodable frames: {info.path}")
 
     return FrameHashes(d_hash=_majority_hash(d_values), p_hash=_majority_hash(p_values))
 
@@ -0,0 +1,255 @@
+import json
+import os
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+from .comparator import combined_similarity, metadata_candidate, resolution_bucket, size_bucket
+from .fingerprint import VideoFingerprint
+
+_SNAPSHOT_VERSION = 1
+
+_POPCOUNT_TABLE = np.array([value.bit_count() for value in range(256)], dtype=np.uint8)
+
+
+def _popcount64(values: np.ndarray) -> np.ndarray:
+    bitwise_count = getattr(np, "bitwise_count", None)
+    if bitwise_count is not None:
+        return bitwise_count(values).astype(np.int64)
+    # numpy < 2.0 没有 bitwise_count，按字节查表
+    as_bytes = values.view(np.uint8).reshape(-1, 8)
+    return _POPCOUNT_TABLE[as_bytes].sum(axis=1, dtype=np.int64)
+
+
+def _bit_length_buckets(values: np.ndarray) -> np.ndarray:
+    # 与 comparator 的分桶规则一致：max(1, v).bit_length() // 2；
+    # 文件大小与像素数远小于 2^53，frexp 的指数即为精确的 bit_length
+    _, exponents = np.frexp(np.maximum(values, 1).astype(np.float64))
+    return exponents.astype(np.int64) // 2
+
+
+class FingerprintIndex:
+    def __init__(self, merge_threshold: int = 1024) -> None:
+        self._merge_threshold = max(1, merge_threshold)
+        self._by_path: dict[str, VideoFingerprint] = {}
+        # 新增条目先放在小缓冲区里线性比较，攒够后再重建数组，避免每次新增都全量排序
+        self._recent: dict[str, VideoFingerprint] = {}
+        self._removed: set[str] = set()
+        self._built_keys: set[str] = set()
+        self._items: list[VideoFingerprint] = []
+        self._durations = np.empty(0, dtype=np.float64)
+        self._size_buckets = np.empty(0, dtype=np.int64)
+        self._resolution_buckets = np.empty(0, dtype=np.int64)
+        self._d_hashes = np.empty(0, dtype=np.uint64)
+        self._p_hashes = np.empty(0, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return len(self._by_path)
+
+    def __contains__(self, path: object) -> bool:
+        return str(path) in self._by_path
+
+    def get(self, path: Path) -> VideoFingerprint | None:
+        return self._by_path.get(str(path))
+
+    def add(self, fingerprint: VideoFingerprint) -> None:
+        key = str(fingerprint.path)
+        self._by_path[key] = fingerprint
+        if key in self._built_keys:
+            self._removed.add(key)
+        self._recent[key] = fingerprint
+
+    def extend(self, fingerprints: list[VideoFingerprint]) -> None:
+        for fingerprint in fingerprints:
+            self.add(fingerprint)
+
+    def remove(self, path: Path) -> bool:
+        key = str(path)
+        if self._by_path.pop(key, None) is None:
+            return False
+        self._recent.pop(key, None)
+        if key in self._built_keys:
+            self._removed.add(key)
+        return True
+
+    def query(
+        self,
+        fingerprint: VideoFingerprint,
+        similarity_threshold: float,
+        duration_tolerance_seconds: float,
+    ) -> list[tuple[VideoFingerprint, float]]:
+        if len(self._recent) > self._merge_threshold or len(self._removed) > self._merge_threshold:
+            self.rebuild()
+
+        source_key = str(fingerprint.path)
+        matches = [
+            (item, similarity)
+            for item, similarity in self._query_built(
+                fingerprint,
+                similarity_threshold,
+                duration_tolerance_seconds,
+            )
+            if str(item.path) != source_key
+        ]
+        for key, item in self._recent.items():
+            if key == source_key:
+                continue
+            if not metadata_candidate(fingerprint, item, duration_tolerance_seconds):
+                continue
+            similarity = combined_similarity(fingerprint, item)
+            if similarity >= similarity_threshold:
+                matches.append((item, similarity))
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches
+
+    def rebuild(self) -> None:
+        self._items = sorted(self._by_path.values(), key=lambda fp: fp.duration_seconds)
+        self._built_keys = {str(fp.path) for fp in self._items}
+        self._recent.clear()
+        self._removed.clear()
+        self._durations = np.array([fp.duration_seconds for fp in self._items], dtype=np.float64)
+        self._size_buckets = _bit_length_buckets(
+            np.array([fp.size_bytes for fp in self._items], dtype=np.int64)
+        )
+        self._resolution_buckets = _bit_length_buckets(
+            np.array([fp.width * fp.height for fp in self._items], dtype=np.int64)
+        )
+        self._d_hashes = np.array([fp.d_hash for fp in self._items], dtype=np.uint64)
+        self._p_hashes = np.array([fp.p_hash for fp in self._items], dtype=np.uint64)
+
+    def save(self, path: Path, metadata: dict[str, str] | None = None) -> None:
+        self.rebuild()
+        # 路径以 \0 分隔存成一段 UTF-8 字节，避免定长 Unicode 数组按最长路径占空间
+        paths = "\0".join(str(fp.path) for fp in self._items).encode("utf-8")
+        temp_path = path.with_name(path.name + ".tmp")
+        with temp_path.open("wb") as handle:
+            np.savez(
+                handle,
+                version=np.int64(_SNAPSHOT_VERSION),
+                metadata=np.array(json.dumps(metadata or {})),
+                paths=np.frombuffer(paths, dtype=np.uint8),
+                durations=self._durations,
+                size_bytes=np.array([fp.size_bytes for fp in self._items], dtype=np.int64),
+                widths=np.array([fp.width for fp in self._items], dtype=np.int64),
+                heights=np.array([fp.height for fp in self._items], dtype=np.int64),
+                bitrates=np.array([fp.bitrate for fp in self._items], dtype=np.int64),
+                d_hashes=self._d_hashes,
+                p_hashes=self._p_hashes,
+            )
+        # 先写临时文件再替换，中途崩溃不会留下半个快照
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> tuple["FingerprintIndex", dict[str, str]] | None:
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["version"]) != _SNAPSHOT_VERSION:
+                    return None
+                metadata = json.loads(str(data["metadata"]))
+                blob = data["paths"].tobytes().decode("utf-8")
+                arrays = {
+                    name: data[name]
+                    for name in (
+                        "durations",
+                        "size_bytes",
+                        "widths",
+                        "heights",
+                        "bitrates",
+                        "d_hashes",
+                        "p_hashes",
+                    )
+                }
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            # 快照缺失或损坏时由调用方从数据库重建
+            return None
+
+        paths = blob.split("\0") if blob else []
+        if len(paths) != len(arrays["durations"]):
+            return None
+        items = [
+            VideoFingerprint(
+                path=Path(path_text),
+                size_bytes=int(size_bytes),
+                duration_seconds=float(duration),
+                width=int(width),
+                height=int(height),
+                bitrate=int(bitrate),
+                d_hash=int(d_hash),
+                p_hash=int(p_hash),
+            )
+            for path_text, duration, size_bytes, width, height, bitrate, d_hash, p_hash in zip(
+                paths,
+                arrays["durations"].tolist(),
+                arrays["size_bytes"].tolist(),
+                arrays["widths"].tolist(),
+                arrays["heights"].tolist(),
+                arrays["bitrates"].tolist(),
+                arrays["d_hashes"].tolist(),
+                arrays["p_hashes"].tolist(),
+                strict=True,
+            )
+        ]
+        index = cls()
+        index._items = items
+        index._by_path = {str(fp.path): fp for fp in items}
+        index._built_keys = set(index._by_path)
+        index._durations = arrays["durations"].astype(np.float64)
+        index._size_buckets = _bit_length_buckets(arrays["size_bytes"])
+        index._resolution_buckets = _bit_length_buckets(arrays["widths"] * arrays["heights"])
+        index._d_hashes = arrays["d_hashes"].astype(np.uint64)
+        index._p_hashes = arrays["p_hashes"].astype(np.uint64)
+        return index, metadata
+
+    def _query_built(
+        self,
+        fingerprint: VideoFingerprint,
+        similarity_threshold: float,
+        duration_tolerance_seconds: float,
+    ) -> list[tuple[VideoFingerprint, float]]:
+        if not self._items:
+            return []
+
+        # 按时长排序后二分定位候选窗口，再对窗口内做向量化的元数据过滤和汉明距离计算
+        lo = int(
+            np.searchsorted(
+                self._durations,
+                fingerprint.duration_seconds - duration_tolerance_seconds,
+                side="left",
+            )
+        )
+        hi = int(
+            np.searchsorted(
+                self._durations,
+                fingerprint.duration_seconds + duration_tolerance_seconds,
+                side="right",
+            )
+        )
+        if lo >= hi:
+            return []
+
+        window = slice(lo, hi)
+        mask = (np.abs(self._size_buckets[window] - size_bucket(fingerprint.size_bytes)) <= 2) & (
+            np.abs(self._resolution_buckets[window] - resolution_bucket(fingerprint)) <= 2
+        )
+        candidates = np.nonzero(mask)[0] + lo
+        if candidates.size == 0:
+            return []
+
+        d_dist = _popcount64(self._d_hashes[candidates] ^ np.uint64(fingerprint.d_hash))
+        p_dist = _popcount64(self._p_hashes[candidates] ^ np.uint64(fingerprint.p_hash))
+        durations = self._durations[candidates]
+        gap = np.abs(durations - fingerprint.duration_seconds)
+        longest = np.maximum(np.maximum(durations, fingerprint.duration_seconds), 1.0)
+        penalty = np.minimum(gap / longest, 1.0)
+        similarity = ((1.0 - d_dist / 64) * 0.35 + (1.0 - p_dist / 64) * 0.65) * (
+            1.0 - penalty * 0.3
+        )
+
+        matches: list[tuple[VideoFingerprint, float]] = []
+        for position in np.nonzero(similarity >= similarity_threshold)[0]:
+            item = self._items[int(candidates[position])]
+            if str(item.path) in self._removed:
+                continue
+            matches.append((item, float(similarity[position])))
+        return matches
@@ -0,0 +1,45 @@
+import hashlib
+from pathlib import Path
+
+from .database import FingerprintDatabase
+from .index import FingerprintIndex
+
+
+def library_snapshot_path(cache_db: Path, roots: list[Path]) -> Path:
+    # 不同的资料库范围各自保存一份快照，放在缓存数据库旁边
+    key = hashlib.sha1(_roots_key(roots).encode("utf-8")).hexdigest()[:12]
+    return cache_db.with_name(f"{cache_db.stem}.library-{key}.npz")
+
+
+def load_library_index(
+    db: FingerprintDatabase,
+    roots: list[Path],
+    snapshot_path: Path,
+) -> FingerprintIndex:
+    # roots 为空表示整个缓存库都是资料库
+    scope = roots or None
+    count, latest, generation = db.fingerprint_summary(scope)
+    metadata = {"roots": _roots_key(roots), "latest": latest or "", "generation": str(generation)}
+
+    loaded = FingerprintIndex.load(snapshot_path)
+    if loaded is not None:
+        index, saved = loaded
+        # 代数变了说明快照之后有删除或按旧时间戳合并的行，增量发现不了，只能重建
+        if saved.get("roots") == metadata["roots"] and saved.get("generation") == str(generation):
+            watermark = saved.get("latest", "")
+            # 快照之后新增或更新的行按 updated_at 增量合并，无需重读整表
+            if latest is not None and latest >= watermark:
+                index.extend(list(db.iter_fingerprints(scope, updated_since=watermark)))
+            if len(index) == count:
+                if metadata["latest"] != watermark:
+                    index.save(snapshot_path, metadata)
+                return index
+
+    index = FingerprintIndex()
+    index.extend(list(db.iter_fingerprints(scope)))
+    index.save(snapshot_path, metadata)
+    return index
+
+
+def _roots_key(roots: list[Path]) -> str:
+    return "\n".join(sorted(str(root) for root in roots))
@@ -0,0 +1,45 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+from .cancellation import CancellationToken
+from .database import FingerprintDatabase
+from .fingerprint import ExtractionBudget, VideoFingerprint, extract_fingerprint
+from .index import FingerprintIndex
+
+
+@dataclass(slots=True)
+class LookupResult:
+    fingerprint: VideoFingerprint
+    # 按 combined_similarity 从高到低排序
+    matches: list[tuple[VideoFingerprint, float]]
+    from_cache: bool
+
+
+def lookup_similar(
+    db: FingerprintDatabase,
+    path: Path,
+    *,
+    frame_interval_seconds: int,
+    similarity_threshold: float,
+    duration_tolerance_seconds: float,
+    budget: ExtractionBudget | None = None,
+    token: CancellationToken | None = None,
+) -> LookupResult:
+    stat = path.stat()
+    cached = db.get_cached(path, stat.st_mtime, stat.st_size)
+    if cached is not None:
+        fingerprint = cached.to_fingerprint()
+    else:
+        fingerprint = extract_fingerprint(path, frame_interval_seconds, budget, token)
+        db.upsert(fingerprint, stat.st_mtime)
+
+    # SQL 只取时长/大小/分辨率相近的候选行（走 idx_fingerprints_lookup），汉明距离在内存中
+    # 向量化计算；不加载整个资料库，持久化快照只留给批量比对（query 模式）
+    index = FingerprintIndex()
+    index.extend(db.find_candidates(fingerprint, duration_tolerance_seconds))
+    index.rebuild()
+    return LookupResult(
+        fingerprint=fingerprint,
+        matches=index.query(fingerprint, similarity_threshold, duration_tolerance_seconds),
+        from_cache=cached is not None,
+    )
@@ -0,0 +1,90 @@
+import queue
+import threading
+from collections.abc import Iterable
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+_SENTINEL = object()
+
+
+class BoundedFeed(Generic[T]):
+    def __init__(self, source: Iterable[T], maxsize: int) -> None:
+        self._source = source
+        self._queue: queue.Queue[object] = queue.Queue(maxsize=max(1, maxsize))
+        self._closed = threading.Event()
+        self._source_done = False
+        self._thread = threading.Thread(target=self._produce, name="bounded-feed", daemon=True)
+        self.error: BaseException | None = None
+
+    def start(self) -> "BoundedFeed[T]":
+        self._thread.start()
+        return self
+
+    @property
+    def exhausted(self) -> bool:
+        return self._source_done and self._queue.empty()
+
+    def get_batch(self, max_items: int, timeout: float = 0.0) -> list[T]:
+        items: list[T] = []
+        if self._source_done and self._queue.empty():
+            return items
+
+        try:
+            first = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+        except queue.Empty:
+            return items
+        if first is _SENTINEL:
+            self._source_done = True
+            self._raise_source_error()
+            return items
+        items.append(first)  # type: ignore[arg-type]
+
+        while len(items) < max_items:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _SENTINEL:
+                self._source_done = True
+                self._raise_source_error()
+                break
+            items.append(item)  # type: ignore[arg-type]
+        return items
+
+    def _raise_source_error(self) -> None:
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def close(self) -> None:
+        self._closed.set()
+        # 清空队列，让阻塞在 put 上的生产者线程尽快退出
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def _produce(self) -> None:
+        try:
+            for item in self._source:
+                if not self._put(item):
+                    return
+        except BaseException as exc:  # noqa: BLE001
+            self.error = exc
+        finally:
+            close = getattr(self._source, "close", None)
+            if self._closed.is_set() and close is not None:
+                close()
+        self._put(_SENTINEL)
+
+    def _put(self, item: object) -> bool:
+        # 队列满时阻塞，形成对上游遍历的背压
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
@@ -0,0 +1,312 @@
+import os
+import struct
+import zlib
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from types import TracebackType
+from typing import BinaryIO, Self
+
+from .database import CachedFingerprint, FingerprintDatabase
+from .fingerprint import VideoFingerprint
+
+# 便携指纹导出格式（小端序）：
+#   文件头  MAGIC | u16 版本 | u16 标志（保留，目前为 0）| u32 根目录长度 | 根目录 (UTF-8)
+#   数据块  u32 记录数 | u32 压缩长度 | zlib(按列打包的记录)，记录数为 0 表示结束
+# 块内每列连续存放：路径长度、路径、mtime、大小、时长、宽、高、码率、dHash、pHash。
+# 缓存库只保存合并后的哈希，格式里不带逐帧哈希
+MAGIC = b"VDCFP\0"
+FORMAT_VERSION = 1
+DEFAULT_BLOCK_RECORDS = 4096
+
+_HEADER = struct.Struct("<6sHHI")
+_BLOCK = struct.Struct("<II")
+
+
+class PortableFormatError(ValueError):
+    pass
+
+
+@dataclass(slots=True)
+class PortableFingerprint:
+    # 路径相对导出根目录，用 / 分隔，与平台无关
+    relative_path: str
+    mtime: float
+    size_bytes: int
+    duration_seconds: float
+    width: int
+    height: int
+    bitrate: int
+    d_hash: int
+    p_hash: int
+
+    def to_cached(self, root: Path) -> CachedFingerprint:
+        parts = PurePosixPath(self.relative_path).parts
+        if not parts or parts[0] == "/" or ".." in parts:
+            raise PortableFormatError(f"导出文件中的路径无效: {self.relative_path}")
+        return CachedFingerprint(
+            path=root.joinpath(*parts),
+            mtime=self.mtime,
+            size_bytes=self.size_bytes,
+            duration_seconds=self.duration_seconds,
+            width=self.width,
+            height=self.height,
+            bitrate=self.bitrate,
+            d_hash=self.d_hash,
+            p_hash=self.p_hash,
+        )
+
+
+def _pack(code: str, values: list) -> bytes:
+    return struct.pack(f"<{len(values)}{code}", *values)
+
+
+class _Columns:
+    def __init__(self, payload: bytes) -> None:
+        self._payload = payload
+        self._offset = 0
+
+    def take(self, code: str, count: int) -> tuple:
+        layout = struct.Struct(f"<{count}{code}")
+        if self._offset + layout.size > len(self._payload):
+            raise PortableFormatError("数据块长度与记录数不符")
+        values = layout.unpack_from(self._payload, self._offset)
+        self._offset += layout.size
+        return values
+
+    def take_bytes(self, size: int) -> bytes:
+        if self._offset + size > len(self._payload):
+            raise PortableFormatError("数据块长度与记录数不符")
+        chunk = self._payload[self._offset : self._offset + size]
+        self._offset += size
+        return chunk
+
+
+class PortableWriter:
+    # 流式写出：攒满一块就压缩写入，内存占用与总记录数无关
+    def __init__(
+        self,
+        stream: BinaryIO,
+        root: Path,
+        *,
+        block_records: int = DEFAULT_BLOCK_RECORDS,
+    ) -> None:
+        self._stream = stream
+        self._root = Path(os.path.abspath(root))
+        self._block_records = max(1, block_records)
+        self._pending: list[PortableFingerprint] = []
+        self._closed = False
+        self.written = 0
+        self.skipped = 0
+        encoded_root = str(self._root).encode("utf-8")
+        stream.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(encoded_root)))
+        stream.write(encoded_root)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        # 出错时不写结束标记，读取方会把文件当作不完整
+        if exc_type is None:
+            self.close()
+
+    def write(self, fingerprint: VideoFingerprint, mtime: float) -> bool:
+        try:
+            relative = Path(os.path.abspath(fingerprint.path)).relative_to(self._root)
+        except ValueError:
+            # 根目录之外的文件没有可移植的路径，直接跳过
+            self.skipped += 1
+            return False
+        self._pending.append(
+            PortableFingerprint(
+                relative_path=relative.as_posix(),
+                mtime=mtime,
+                size_bytes=fingerprint.size_bytes,
+                duration_seconds=fingerprint.duration_seconds,
+                width=fingerprint.width,
+                height=fingerprint.height,
+                bitrate=fingerprint.bitrate,
+                d_hash=fingerprint.d_hash,
+                p_hash=fingerprint.p_hash,
+            )
+        )
+        self.written += 1
+        if len(self._pending) >= self._block_records:
+            self._flush_block()
+        return True
+
+    def _flush_block(self) -> None:
+        if not self._pending:
+            return
+        records, self._pending = self._pending, []
+        paths = [record.relative_path.encode("utf-8") for record in records]
+        parts = [
+            _pack("I", [len(path) for path in paths]),
+            b"".join(paths),
+            _pack("d", [record.mtime for record in records]),
+            _pack("q", [record.size_bytes for record in records]),
+            _pack("d", [record.duration_seconds for record in records]),
+            _pack("I", [record.width for record in records]),
+            _pack("I", [record.height for record in records]),
+            _pack("q", [record.bitrate for record in records]),
+            _pack("Q", [record.d_hash for record in records]),
+            _pack("Q", [record.p_hash for record in records]),
+        ]
+        payload = zlib.compress(b"".join(parts), 6)
+        self._stream.write(_BLOCK.pack(len(records), len(payload)))
+        self._stream.write(payload)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._flush_block()
+        self._stream.write(_BLOCK.pack(0, 0))
+        self._stream.flush()
+
+
+class PortableReader:
+    # 逐块解压读取；缺少结束标记的文件在读到末尾时报错
+    def __init__(self, stream: BinaryIO) -> None:
+        self._stream = stream
+        header = self._read_exact(_HEADER.size)
+        magic, version, flags, root_length = _HEADER.unpack(header)
+        if magic != MAGIC:
+            raise PortableFormatError("不是指纹导出文件")
+        if version > FORMAT_VERSION:
+            raise PortableFormatError(f"不支持的导出格式版本: {version}")
+        if flags:
+            raise PortableFormatError(f"不支持的导出选项: {flags:#x}")
+        self.version = version
+        self.root = Path(self._read_exact(root_length).decode("utf-8"))
+
+    def _read_exact(self, size: int) -> bytes:
+        data = self._stream.read(size)
+        if len(data) != size:
+            raise PortableFormatError("导出文件不完整")
+        return data
+
+    def __iter__(self) -> Iterator[PortableFingerprint]:
+        while True:
+            count, length = _BLOCK.unpack(self._read_exact(_BLOCK.size))
+            if count == 0:
+                return
+            try:
+                payload = zlib.decompress(self._read_exact(length))
+            except zlib.error as exc:
+                raise PortableFormatError(f"数据块损坏: {exc}") from exc
+            yield from self._decode_block(count, payload)
+
+    def _decode_block(self, count: int, payload: bytes) -> Iterator[PortableFingerprint]:
+        columns = _Columns(payload)
+        lengths = columns.take("I", count)
+        blob = columns.take_bytes(sum(lengths))
+        mtimes = columns.take("d", count)
+        sizes = columns.take("q", count)
+        durations = columns.take("d", count)
+        widths = columns.take("I", count)
+        heights = columns.take("I", count)
+        bitrates = columns.take("q", count)
+        d_hashes = columns.take("Q", count)
+        p_hashes = columns.take("Q", count)
+
+        path_offset = 0
+        for index in range(count):
+            path = blob[path_offset : path_offset + lengths[index]].decode("utf-8")
+            path_offset += lengths[index]
+            yield PortableFingerprint(
+                relative_path=path,
+                mtime=mtimes[index],
+                size_bytes=sizes[index],
+                duration_seconds=durations[index],
+                width=widths[index],
+                height=heights[index],
+                bitrate=bitrates[index],
+                d_hash=d_hashes[index],
+                p_hash=p_hashes[index],
+            )
+
+
+@dataclass(slots=True)
+class ImportReport:
+    imported: int = 0
+    # 本地存在同路径文件但大小不同，指纹已过期
+    stale: int = 0
+    # 重映射函数返回 None 的记录
+    skipped: int = 0
+
+
+def prefix_remap(
+    prefixes: list[tuple[str, Path]],
+    fallback_root: Path | None = None,
+) -> Callable[[str], Path | None]:
+    # 按最长的相对路径前缀把记录放到本机目录；都不匹配时放到 fallback_root 下，
+    # 没有 fallback_root 则跳过该记录
+    normalized = sorted(
+        ((PurePosixPath(prefix.strip("/")).parts, target) for prefix, target in prefixes),
+        key=lambda item: len(item[0]),
+        reverse=True,
+    )
+
+    def remap(relative_path: str) -> Path | None:
+        parts = PurePosixPath(relative_path).parts
+        for prefix, target in normalized:
+            if parts[: len(prefix)] == prefix:
+                return target.joinpath(*parts[len(prefix) :])
+        if fallback_root is None:
+            return None
+        return fallback_root.joinpath(*parts)
+
+    return remap
+
+
+def export_fingerprints(db: FingerprintDatabase, root: Path, target: Path) -> tuple[int, int]:
+    with target.open("wb") as stream, PortableWriter(stream, root) as writer:
+        for cached in db.iter_cached(root):
+            writer.write(cached.to_fingerprint(), cached.mtime)
+    return writer.written, writer.skipped
+
+
+def import_fingerprints(
+    db: FingerprintDatabase,
+    source: Path,
+    root: Path | None = None,
+    *,
+    remap: Callable[[str], Path | None] | None = None,
+    trust_size: bool = False,
+) -> ImportReport:
+    # 路径按 remap(相对路径) → 新根目录 → 导出时的根目录 的优先级还原。
+    # 本地文件大小不同的记录已过期，直接跳过。默认保留导出时的 mtime，本地 mtime
+    # 不同时扫描会重新提取；trust_size 时大小一致即视为同一文件并改用本地 mtime，
+    # 适用于复制时没有保留 mtime 的资料库，但原地改写且大小不变的文件会误命中缓存
+    report = ImportReport()
+    with source.open("rb") as stream:
+        reader = PortableReader(stream)
+        target_root = root if root is not None else reader.root
+        for record in reader:
+            cached = record.to_cached(target_root)
+            if remap is not None:
+                mapped = remap(record.relative_path)
+                if mapped is None:
+                    report.skipped += 1
+                    continue
+                cached.path = mapped
+            try:
+                stat = cached.path.stat()
+            except OSError:
+                stat = None
+            if stat is not None:
+                if stat.st_size != cached.size_bytes:
+                    report.stale += 1
+                    continue
+                if trust_size:
+                    cached.mtime = stat.st_mtime
+            db.upsert(cached.to_fingerprint(), cached.mtime)
+            report.imported += 1
+    db.flush()
+    return report
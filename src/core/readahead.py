@@ -0,0 +1,78 @@
+import os
+from pathlib import Path
+from types import TracebackType
+from typing import Self
+
+DEFAULT_READAHEAD_BYTES = 32 * 1024 * 1024
+
+
+class ReadAheadAdvisor:
+    # 解码按顺序读完整个文件。页缓存按 inode 共享，在自己打开的描述符上发出的
+    # WILLNEED/DONTNEED 对 OpenCV 内部的读取同样生效：提前预读解码位置之后的一段，
+    # 丢弃已解码部分，扫描大型资料库时不再把其他程序的页缓存挤出去。
+    # 没有 posix_fadvise 的平台（Windows/macOS）不做任何事
+    def __init__(self, path: Path, size_bytes: int, window_bytes: int) -> None:
+        self._size = max(0, size_bytes)
+        self._window = window_bytes
+        self._fd: int | None = None
+        self._prefetched = 0
+        self._dropped = 0
+        if window_bytes <= 0 or self._size == 0 or not hasattr(os, "posix_fadvise"):
+            return
+        try:
+            self._fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return
+        # 不发 SEQUENTIAL：它只放大本描述符的预读窗口，对 OpenCV 自己的描述符无效
+        self.advance(0.0)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    @property
+    def active(self) -> bool:
+        return self._fd is not None
+
+    def _advise(self, offset: int, length: int, advice: int) -> None:
+        if self._fd is None:
+            return
+        try:
+            os.posix_fadvise(self._fd, offset, length, advice)
+        except OSError:
+            # 提示失败不影响解码，后续不再尝试
+            self.close(drop=False)
+
+    def advance(self, fraction: float) -> None:
+        if self._fd is None:
+            return
+        position = min(self._size, int(self._size * max(0.0, fraction)))
+        # 预读窗口消耗过半时补下一段，避免每帧都发起系统调用
+        if self._prefetched < self._size and position + self._window // 2 >= self._prefetched:
+            start = max(self._prefetched, position)
+            self._advise(start, self._window, os.POSIX_FADV_WILLNEED)
+            self._prefetched = min(self._size, start + self._window)
+        # 留一个窗口的余量，容器内音视频交织时解码器会小幅回读
+        drop_end = position - self._window
+        if drop_end > self._dropped:
+            self._advise(self._dropped, drop_end - self._dropped, os.POSIX_FADV_DONTNEED)
+            self._dropped = drop_end
+
+    def close(self, *, drop: bool = True) -> None:
+        if self._fd is None:
+            return
+        fd, self._fd = self._fd, None
+        try:
+            if drop:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
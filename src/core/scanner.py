@@ -1,17 +1,284 @@
+import os
+import queue
+import threading
+import time
 from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 
 
+@dataclass(slots=True)
+class FileRecord:
+    path: Path
+    mtime: float
+    size_bytes: int
+    # 0 表示未知（如从检查点恢复的记录），此时只按路径区分
+    device: int = 0
+    inode: int = 0
+    link_target: Path | None = None
+
+    @property
+    def alias_key(self) -> tuple[int, int] | str:
+        # 硬链接与符号链接指向同一物理文件时键相同
+        if self.inode:
+            return self.device, self.inode
+        return os.path.normcase(str(self.link_target or self.path))
+
+
+@dataclass(slots=True)
+class DirectoryEntry:
+    mtime: float
+    subdirs: list[str]
+    files: list[FileRecord]
+
+
+class DirectoryIndex:
+    # 目录 mtime 只在增删/重命名子项时变化，未变化的目录可跳过读取目录项，
+    # 但原地改写的文件不会改变目录 mtime，文件签名仍需逐个 stat
+    def __init__(self, entries: dict[str, DirectoryEntry] | None = None) -> None:
+        self._entries = entries or {}
+        self._lock = threading.Lock()
+        self._visited: set[str] = set()
+        self.updates: dict[str, DirectoryEntry] = {}
+        self.reused = 0
+        self.rescanned = 0
+
+    @property
+    def known_directories(self) -> set[str]:
+        return set(self._entries)
+
+    @property
+    def visited(self) -> set[str]:
+        with self._lock:
+            return set(self._visited)
+
+    def lookup(self, directory: str, mtime: float) -> DirectoryEntry | None:
+        with self._lock:
+            self._visited.add(directory)
+            entry = self._entries.get(directory)
+            if entry is None or entry.mtime != mtime:
+                return None
+            self.reused += 1
+            return entry
+
+    def record(self, directory: str, entry: DirectoryEntry) -> None:
+        with self._lock:
+            self._visited.add(directory)
+            self.rescanned += 1
+            # mtime 精度有限（FAT 为 2 秒），刚修改过的目录下次仍需重新读取
+            if time.time() - entry.mtime < 2.0:
+                return
+            self._entries[directory] = entry
+            self.updates[directory] = entry
+
+
 class VideoScanner:
-    def __init__(self, supported_extensions: set[str]) -> None:
+    def __init__(self, supported_extensions: set[str], max_workers: int = 4) -> None:
         self._extensions = {ext.lower() for ext in supported_extensions}
+        self._max_workers = max(1, max_workers)
 
     def scan(self, root: Path) -> list[Path]:
-        return sorted(self.iter_scan(root))
+        return [record.path for record in self.scan_records(root)]
 
     def iter_scan(self, root: Path) -> Iterator[Path]:
-        if not root.exists() or not root.is_dir():
+        for record in self.iter_records(root):
+            yield record.path
+
+    def scan_records(
+        self,
+        root: Path,
+        index: DirectoryIndex | None = None,
+    ) -> list[FileRecord]:
+        return sorted(self.iter_records(root, index), key=lambda record: record.path)
+
+    def iter_records(
+        self,
+        root: Path,
+        index: DirectoryIndex | None = None,
+    ) -> Iterator[FileRecord]:
+        return self.iter_roots([root], {root: index} if index is not None else None)
+
+    def iter_roots(
+        self,
+        roots: list[Path],
+        indexes: dict[Path, DirectoryIndex] | None = None,
+    ) -> Iterator[FileRecord]:
+        # 调用方需先用 collapse_roots 去掉嵌套的根目录，否则重叠部分会重复产出
+        starts = [
+            (str(root), (indexes or {}).get(root))
+            for root in roots
+            if root.exists() and root.is_dir()
+        ]
+        if not starts:
             return
-        for path in root.rglob("*"):
-            if path.is_file() and path.suffix.lower() in self._extensions:
-                yield path
+
+        # 每个目录一个任务：子目录分发到线程池，文件记录按目录批量回传；
+        # 多个根目录共用同一个线程池并行遍历
+        results: queue.Queue[list[FileRecord] | BaseException | None] = queue.Queue()
+        stop = threading.Event()
+        lock = threading.Lock()
+        outstanding = len(starts)
+        pool = ThreadPoolExecutor(max_workers=self._max_workers)
+
+        def visit(directory: str, index: DirectoryIndex | None) -> None:
+            nonlocal outstanding
+            try:
+                records: list[FileRecord] = []
+                subdirs: list[str] = []
+                if not stop.is_set():
+                    records, subdirs = self._visit_directory(directory, index)
+
+                with lock:
+                    outstanding += len(subdirs)
+                for subdir in subdirs:
+                    pool.submit(visit, subdir, index)
+
+                results.put(records)
+            except BaseException as exc:  # noqa: BLE001
+                # 非 OSError 的异常（路径解码错误、程序缺陷）交给消费方抛出
+                results.put(exc)
+            finally:
+                # 计数必须递减，否则消费方永远等不到结束标记
+                with lock:
+                    outstanding -= 1
+                    finished = outstanding == 0
+                if finished:
+                    results.put(None)
+
+        for directory, index in starts:
+            pool.submit(visit, directory, index)
+        try:
+            while True:
+                batch = results.get()
+                if batch is None:
+                    break
+                if isinstance(batch, BaseException):
+                    raise batch
+                yield from batch
+        finally:
+            stop.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _visit_directory(
+        self,
+        directory: str,
+        index: DirectoryIndex | None,
+    ) -> tuple[list[FileRecord], list[str]]:
+        if index is None:
+            return self._scan_directory(directory)
+
+        # 目录未变化时复用索引中的文件列表和子目录，省去读取目录项（网络盘上最慢的一步）
+        try:
+            mtime = os.stat(directory).st_mtime
+        except OSError:
+            return [], []
+        cached = index.lookup(directory, mtime)
+        if cached is not None:
+            return (
+                _restat(cached.files),
+                [os.path.join(directory, name) for name in cached.subdirs],
+            )
+
+        try:
+            records, subdirs = self._read_directory(directory)
+        except OSError:
+            # 读取失败时不写入索引，避免把暂时不可访问的目录记成空目录
+            return [], []
+        index.record(
+            directory,
+            DirectoryEntry(
+                mtime=mtime,
+                subdirs=[os.path.basename(subdir) for subdir in subdirs],
+                files=records,
+            ),
+        )
+        return records, subdirs
+
+    def _scan_directory(self, directory: str) -> tuple[list[FileRecord], list[str]]:
+        try:
+            return self._read_directory(directory)
+        except OSError:
+            return [], []
+
+    def _read_directory(self, directory: str) -> tuple[list[FileRecord], list[str]]:
+        records: list[FileRecord] = []
+        subdirs: list[str] = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    # 不跟随目录链接，避免循环引用
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                        continue
+                    if os.path.splitext(entry.name)[1].lower() not in self._extensions:
+                        continue
+                    if not entry.is_file():
+                        continue
+                    # Windows 下 DirEntry 自带 stat 信息，无需额外系统调用
+                    stat = entry.stat()
+                    link_target = Path(os.path.realpath(entry.path)) if entry.is_symlink() else None
+                except OSError:
+                    continue
+                records.append(
+                    FileRecord(
+                        Path(entry.path),
+                        stat.st_mtime,
+                        stat.st_size,
+                        stat.st_dev,
+                        stat.st_ino,
+                        link_target,
+                    )
+                )
+        return records, subdirs
+
+
+def _restat(records: list[FileRecord]) -> list[FileRecord]:
+    # 重新读取签名，原地改写的文件才能使缓存失效；期间被删除的文件直接跳过
+    refreshed: list[FileRecord] = []
+    for record in records:
+        try:
+            stat = os.stat(record.path)
+        except OSError:
+            continue
+        refreshed.append(
+            FileRecord(
+                record.path,
+                stat.st_mtime,
+                stat.st_size,
+                stat.st_dev,
+                stat.st_ino,
+                record.link_target,
+            )
+        )
+    return refreshed
+
+
+def collapse_roots(roots: list[Path]) -> list[Path]:
+    # 按解析链接后的真实路径比较，去掉重复根目录和位于其他根目录之下的根目录；
+    # 返回原始路径，保持缓存键不变
+    resolved = {Path(os.path.normcase(os.path.realpath(root))): root for root in reversed(roots)}
+    collapsed: list[Path] = []
+    kept: list[Path] = []
+    for real in sorted(resolved):
+        if any(real.is_relative_to(parent) for parent in kept):
+            continue
+        kept.append(real)
+        collapsed.append(resolved[real])
+    return collapsed
+
+
+def split_aliases(
+    records: list[FileRecord],
+    owners: dict[tuple[int, int] | str, Path],
+) -> tuple[list[FileRecord], dict[Path, Path]]:
+    # 每个物理文件只保留首次出现的路径，其余链接映射到该路径
+    unique: list[FileRecord] = []
+    aliases: dict[Path, Path] = {}
+    for record in records:
+        owner = owners.setdefault(record.alias_key, record.path)
+        if owner == record.path:
+            unique.append(record)
+        else:
+            aliases[record.path] = owner
+    return unique, aliases
@@ -0,0 +1,373 @@
+import heapq
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .scanner import FileRecord
+
+DEVICE_HDD = "hdd"
+DEVICE_SSD = "ssd"
+DEVICE_NETWORK = "network"
+DEVICE_UNKNOWN = "unknown"
+
+ORDER_PATH = "path"
+ORDER_LONGEST_FIRST = "longest_first"
+ORDER_LIKELY_DUPLICATES = "likely_duplicates"
+
+DEVICE_KIND_NAMES = {
+    DEVICE_HDD: "机械硬盘",
+    DEVICE_SSD: "固态硬盘",
+    DEVICE_NETWORK: "网络存储",
+    DEVICE_UNKNOWN: "未知设备",
+}
+
+# 0 表示不单独限制，只受全局并发窗口约束。机械硬盘多线程随机读会让磁头来回寻道，
+# 网络存储适度并发可掩盖往返延迟，但背后通常也是机械盘
+_DEFAULT_DEVICE_LIMITS = {
+    DEVICE_HDD: 1,
+    DEVICE_NETWORK: 2,
+}
+
+_NETWORK_FILESYSTEMS = {
+    "nfs",
+    "nfs4",
+    "cifs",
+    "smb3",
+    "smbfs",
+    "afs",
+    "9p",
+    "fuse.sshfs",
+    "fuse.rclone",
+    "davfs",
+}
+
+_MOUNT_ESCAPE = re.compile(r"\\([0-7]{3})")
+# 副本后缀、括号内标注、分辨率/编码标记不影响内容，比较文件名前先去掉
+_STEM_NOISE = re.compile(
+    r"[(\[（【].*?[)\]）】]|\b(?:\d{3,4}p|[hx]\.?26[45]|hevc|avc|copy|final)\b|副本|拷贝",
+    re.IGNORECASE,
+)
+_STEM_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def _mount_fstype(path: Path) -> str | None:
+    try:
+        text = Path("/proc/self/mounts").read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return None
+    target = os.path.realpath(path)
+    best_point = ""
+    best_type: str | None = None
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) < 3:
+            continue
+        point = _MOUNT_ESCAPE.sub(lambda match: chr(int(match.group(1), 8)), parts[1])
+        inside = target == point or target.startswith(point.rstrip("/") + "/")
+        if inside and len(point) >= len(best_point):
+            best_point, best_type = point, parts[2]
+    return best_type
+
+
+def _block_rotational(device: int) -> bool | None:
+    # 分区目录下没有 queue/，需要到所属整盘目录读取
+    base = Path("/sys/dev/block") / f"{os.major(device)}:{os.minor(device)}"
+    try:
+        resolved = base.resolve(strict=True)
+    except OSError:
+        return None
+    for directory in (resolved, resolved.parent):
+        try:
+            flag = (directory / "queue" / "rotational").read_text(encoding="ascii")
+        except OSError:
+            continue
+        return flag.strip() == "1"
+    return None
+
+
+def detect_device_kind(path: Path, device: int) -> str:
+    if not sys.platform.startswith("linux"):
+        return DEVICE_UNKNOWN
+    if _mount_fstype(path) in _NETWORK_FILESYSTEMS:
+        return DEVICE_NETWORK
+    rotational = _block_rotational(device)
+    if rotational is None:
+        return DEVICE_UNKNOWN
+    return DEVICE_HDD if rotational else DEVICE_SSD
+
+
+@dataclass(slots=True)
+class DeviceQueue:
+    label: str
+    kind: str
+    limit: int
+    active: int = 0
+    # (层级, 优先级, 路径, 序号, 路径)；被提升优先级的文件会重新入堆，旧条目按序号作废
+    items: list[tuple[int, float, str, int, Path]] = field(default_factory=list)
+
+    @property
+    def has_capacity(self) -> bool:
+        return self.limit <= 0 or self.active < self.limit
+
+
+def estimate_cost(record: FileRecord) -> float:
+    # 解码耗时与帧数（时长 × 帧率）成正比；逐个打开文件读头信息在机械盘上
+    # 每个文件都要寻道，这里用文件大小近似（同一资料库内码率差异远小于时长差异）
+    return float(max(1, record.size_bytes))
+
+
+def normalized_stem(path: Path) -> str:
+    stem = _STEM_NOISE.sub(" ", path.stem.lower())
+    return _STEM_SEPARATORS.sub("", stem)
+
+
+def _duplicate_keys(
+    path: Path,
+    size_bytes: int,
+    duration_seconds: float = 0.0,
+) -> list[tuple[str, object]]:
+    # 待提取文件的时长要解码前打开文件才能拿到，只有缓存里的记录（含同一路径
+    # 修改前的旧记录）能免费给出时长，其余只用遍历时已有的大小和文件名
+    keys: list[tuple[str, object]] = []
+    if size_bytes > 0:
+        keys.append(("size", size_bytes))
+    stem = normalized_stem(path)
+    if stem:
+        keys.append(("stem", stem))
+    if duration_seconds > 0:
+        keys.append(("duration", round(duration_seconds)))
+    return keys
+
+
+class ExtractionScheduler:
+    # 按设备分队列：每个设备有自己的并发上限，设备内按路径顺序读取以利于顺序访问；
+    # 设备之间轮转取任务，避免单个慢盘占满全局并发窗口。
+    # longest_first 时可并行的设备上先提交大文件，小文件填补空档，缩短整体耗时；
+    # likely_duplicates 时与其他文件或已缓存指纹同大小/同名的文件先提取，
+    # 让部分结果尽早出现真正的重复组
+    def __init__(
+        self,
+        *,
+        group_by_device: bool = True,
+        path_limits: dict[str, int] | None = None,
+        order: str = ORDER_PATH,
+        detect: Callable[[Path, int], str] = detect_device_kind,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._group_by_device = group_by_device
+        self._order_mode = order
+        self._detect = detect
+        self._clock = clock
+        self._path_limits = sorted(
+            (
+                (os.path.normcase(os.path.realpath(prefix)), prefix, limit)
+                for prefix, limit in (path_limits or {}).items()
+            ),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+        self._queues: dict[tuple[int, str | None], DeviceQueue] = {}
+        self._order: list[DeviceQueue] = []
+        self._owners: dict[Path, DeviceQueue] = {}
+        self._costs: dict[Path, float] = {}
+        self._queued: dict[Path, tuple[DeviceQueue, int]] = {}
+        self._promoted: set[Path] = set()
+        # 每个特征第一次出现时的路径；之后出现别的路径即视为可能重复
+        self._hints: dict[tuple[str, object], Path] = {}
+        # 已有两个不同缓存文件共用的特征，即使第一次出现的就是待提取文件自己也算匹配
+        self._shared: set[tuple[str, object]] = set()
+        # 缓存中记录的时长；文件被改写后路径不变，旧时长通常仍然可用
+        self._cached_durations: dict[Path, float] = {}
+        self._waiting: dict[tuple[str, object], list[Path]] = defaultdict(list)
+        self._cursor = 0
+        self._size = 0
+        self._sequence = 0
+        self._total_cost = 0.0
+        self._done_cost = 0.0
+        self._started_at: float | None = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    @property
+    def queues(self) -> list[DeviceQueue]:
+        return list(self._order)
+
+    def _match_prefix(self, path: Path) -> tuple[str, int] | None:
+        if not self._path_limits:
+            return None
+        target = os.path.normcase(os.path.realpath(path))
+        for normalized, prefix, limit in self._path_limits:
+            if target == normalized or target.startswith(normalized.rstrip(os.sep) + os.sep):
+                return prefix, limit
+        return None
+
+    def _queue_for(self, record: FileRecord) -> DeviceQueue:
+        if not self._group_by_device:
+            key: tuple[int, str | None] = (0, None)
+            queue = self._queues.get(key)
+            if queue is None:
+                queue = self._add_queue(key, "全部文件", DEVICE_UNKNOWN, 0)
+            return queue
+
+        device = record.device
+        if not device:
+            # 从检查点恢复的记录没有设备号
+            try:
+                device = record.path.stat().st_dev
+            except OSError:
+                device = 0
+        matched = self._match_prefix(record.path)
+        key = (device, matched[0] if matched else None)
+        queue = self._queues.get(key)
+        if queue is not None:
+            return queue
+
+        kind = self._detect(record.path, device) if device else DEVICE_UNKNOWN
+        if matched is not None:
+            label, limit = matched
+        else:
+            label = f"{os.major(device)}:{os.minor(device)}" if device else "未知"
+            limit = _DEFAULT_DEVICE_LIMITS.get(kind, 0)
+        return self._add_queue(key, label, kind, limit)
+
+    def _add_queue(
+        self,
+        key: tuple[int, str | None],
+        label: str,
+        kind: str,
+        limit: int,
+    ) -> DeviceQueue:
+        queue = DeviceQueue(label=label, kind=kind, limit=limit)
+        self._queues[key] = queue
+        self._order.append(queue)
+        return queue
+
+    def _priority(self, queue: DeviceQueue, cost: float) -> float:
+        # 串行设备上调换顺序不改变该设备的总耗时，保留路径顺序以减少寻道
+        if self._order_mode != ORDER_PATH and queue.limit != 1:
+            return -cost
+        return 0.0
+
+    def _push(self, queue: DeviceQueue, path: Path, tier: int) -> None:
+        self._sequence += 1
+        heapq.heappush(
+            queue.items,
+            (
+                tier,
+                self._priority(queue, self._costs[path]),
+                os.path.normcase(str(path)),
+                self._sequence,
+                path,
+            ),
+        )
+        self._queued[path] = (queue, self._sequence)
+
+    def _promote(self, keys: list[tuple[str, object]]) -> None:
+        for key in keys:
+            for path in self._waiting.pop(key, []):
+                queued = self._queued.get(path)
+                if queued is not None and path not in self._promoted:
+                    self._promoted.add(path)
+                    self._push(queued[0], path, 0)
+
+    def note(self, items: Iterable[tuple[Path, int, float]]) -> None:
+        # 登记已缓存的指纹，与之同大小/同名/同时长的待提取文件优先
+        if self._order_mode != ORDER_LIKELY_DUPLICATES:
+            return
+        for path, size_bytes, duration_seconds in items:
+            if duration_seconds > 0:
+                self._cached_durations[path] = duration_seconds
+            keys = _duplicate_keys(path, size_bytes, duration_seconds)
+            matched = [key for key in keys if self._hints.setdefault(key, path) != path]
+            self._shared.update(matched)
+            self._promote(matched)
+
+    def add(self, record: FileRecord) -> None:
+        queue = self._queue_for(record)
+        self._costs[record.path] = estimate_cost(record)
+        self._total_cost += self._costs[record.path]
+        self._size += 1
+        if self._order_mode != ORDER_LIKELY_DUPLICATES:
+            self._push(queue, record.path, 0)
+            return
+
+        # 缓存里可能有同一路径修改前的旧记录，不能算作与自身重复
+        keys = _duplicate_keys(
+            record.path,
+            record.size_bytes,
+            self._cached_durations.get(record.path, 0.0),
+        )
+        matched = [
+            key
+            for key in keys
+            if self._hints.setdefault(key, record.path) != record.path or key in self._shared
+        ]
+        if matched:
+            self._promoted.add(record.path)
+            self._push(queue, record.path, 0)
+            # 先入队的同组文件此前没有匹配对象，一并提升
+            self._promote(matched)
+        else:
+            for key in keys:
+                self._waiting[key].append(record.path)
+            self._push(queue, record.path, 1)
+
+    def _pop_live(self, queue: DeviceQueue) -> Path | None:
+        while queue.items:
+            _, _, _, sequence, path = heapq.heappop(queue.items)
+            queued = self._queued.get(path)
+            if queued is not None and queued[1] == sequence:
+                del self._queued[path]
+                self._promoted.discard(path)
+                return path
+        return None
+
+    def pop(self) -> Path | None:
+        # 所有有任务的设备都已达到并发上限时返回 None，等待 release
+        count = len(self._order)
+        for offset in range(count):
+            queue = self._order[(self._cursor + offset) % count]
+            if not queue.has_capacity:
+                continue
+            path = self._pop_live(queue)
+            if path is None:
+                continue
+            self._cursor = (self._cursor + offset + 1) % count
+            queue.active += 1
+            if self._started_at is None:
+                self._started_at = self._clock()
+            self._owners[path] = queue
+            self._size -= 1
+            return path
+        return None
+
+    def release(self, path: Path) -> None:
+        queue = self._owners.pop(path, None)
+        if queue is not None:
+            queue.active -= 1
+        self._done_cost += self._costs.pop(path, 0.0)
+
+    @property
+    def fraction_done(self) -> float:
+        # 按成本而非文件个数：大文件先跑时按个数算的进度会严重偏慢
+        if self._total_cost <= 0:
+            return 0.0
+        return self._done_cost / self._total_cost
+
+    def remaining_seconds(self) -> float | None:
+        if self._started_at is None or self._done_cost <= 0:
+            return None
+        elapsed = self._clock() - self._started_at
+        if elapsed <= 0:
+            return None
+        rate = self._done_cost / elapsed
+        return (self._total_cost - self._done_cost) / rate
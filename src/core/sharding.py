@@ -0,0 +1,63 @@
+import hashlib
+import os
+from collections.abc import Iterable
+from pathlib import Path
+
+from .scanner import FileRecord
+
+
+def relative_key(path: Path, roots: list[Path]) -> str:
+    # 分片按相对根目录的路径计算，各机器挂载点不同也能得到相同的划分
+    target = Path(os.path.normcase(os.path.abspath(path)))
+    for root in roots:
+        base = Path(os.path.normcase(os.path.abspath(root)))
+        if target == base or base in target.parents:
+            return target.relative_to(base).as_posix()
+    return target.as_posix()
+
+
+def shard_of(key: str, count: int) -> int:
+    digest = hashlib.sha1(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % max(1, count)
+
+
+class ShardFilter:
+    # 只保留属于本分片的文件：按相对路径哈希取模，或按给定文件列表
+    def __init__(
+        self,
+        roots: list[Path],
+        *,
+        index: int = 0,
+        count: int = 1,
+        file_list: Iterable[Path] | None = None,
+    ) -> None:
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f"无效的分片编号: {index}/{count}")
+        self._roots = list(roots)
+        self._index = index
+        self._count = count
+        self._members: set[str] | None = None
+        if file_list is not None:
+            self._members = {
+                relative_key(path if path.is_absolute() else self._roots[0] / path, self._roots)
+                for path in file_list
+            }
+
+    @property
+    def key(self) -> str:
+        # 写入检查点的根目录键，避免不同分片在同一数据库中共用检查点
+        if self._members is not None:
+            listing = "\n".join(sorted(self._members))
+            return f"list:{hashlib.sha1(listing.encode('utf-8')).hexdigest()[:12]}"
+        return f"hash:{self._index}/{self._count}"
+
+    def __call__(self, record: FileRecord) -> bool:
+        key = relative_key(record.path, self._roots)
+        if self._members is not None:
+            return key in self._members
+        return shard_of(key, self._count) == self._index
+
+
+def read_file_list(path: Path) -> list[Path]:
+    lines = path.read_text(encoding="utf-8").splitlines()
+    return [Path(line.strip()) for line in lines if line.strip() and not line.startswith("#")]
@@ -0,0 +1,55 @@
+import threading
+import time
+from collections.abc import Hashable
+
+
+class ExtractionWatchdog:
+    def __init__(self, limit_seconds: float) -> None:
+        self._limit_seconds = limit_seconds
+        self._lock = threading.Lock()
+        self._started: dict[Hashable, float] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._limit_seconds > 0
+
+    def mark_started(self, key: Hashable) -> None:
+        with self._lock:
+            self._started[key] = time.monotonic()
+
+    def mark_finished(self, key: Hashable) -> float:
+        with self._lock:
+            started = self._started.pop(key, None)
+        if started is None:
+            return 0.0
+        return time.monotonic() - started
+
+    def extend(self, seconds: float, key: Hashable | None = None) -> None:
+        # 不指定 key 时顺延全部任务（整体暂停），否则只顺延单个任务（单独限速）
+        if seconds <= 0:
+            return
+        with self._lock:
+            if key is not None:
+                if key in self._started:
+                    self._started[key] += seconds
+                return
+            for started_key in self._started:
+                self._started[started_key] += seconds
+
+    def elapsed(self, key: Hashable) -> float:
+        with self._lock:
+            started = self._started.get(key)
+        if started is None:
+            return 0.0
+        return time.monotonic() - started
+
+    def expired(self) -> list[tuple[Hashable, float]]:
+        if not self.enabled:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            return [
+                (key, now - started)
+                for key, started in self._started.items()
+                if now - started > self._limit_seconds
+            ]
@@ -0,0 +1,198 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Protocol
+
+from .scanner import FileRecord, VideoScanner
+
+
+class DirectoryWatcher(Protocol):
+    # 无法监听而被跳过的目录（含原因），按发现顺序追加
+    skipped_directories: list[str]
+
+    def poll(self, timeout: float) -> set[Path]: ...
+
+    def close(self) -> None: ...
+
+
+class PollingWatcher:
+    def __init__(self, root: Path, scanner: VideoScanner, interval_seconds: float) -> None:
+        self._root = root
+        self._scanner = scanner
+        self._interval_seconds = max(0.1, interval_seconds)
+        self.skipped_directories: list[str] = []
+        self._snapshot = self._take_snapshot()
+        self._next_poll = time.monotonic() + self._interval_seconds
+
+    def poll(self, timeout: float) -> set[Path]:
+        remaining = self._next_poll - time.monotonic()
+        if remaining > 0:
+            time.sleep(min(max(0.0, timeout), remaining))
+            return set()
+
+        previous = self._snapshot
+        self._snapshot = self._take_snapshot()
+        self._next_poll = time.monotonic() + self._interval_seconds
+        changed = {Path(path) for path, sig in self._snapshot.items() if previous.get(path) != sig}
+        changed.update(Path(path) for path in previous.keys() - self._snapshot.keys())
+        return changed
+
+    def close(self) -> None:
+        self._snapshot = {}
+
+    def _take_snapshot(self) -> dict[str, tuple[float, int]]:
+        return {
+            str(record.path): (record.mtime, record.size_bytes)
+            for record in self._scanner.iter_records(self._root)
+        }
+
+
+class InotifyWatcher:
+    _IN_MODIFY = 0x00000002
+    _IN_CLOSE_WRITE = 0x00000008
+    _IN_MOVED_FROM = 0x00000040
+    _IN_MOVED_TO = 0x00000080
+    _IN_CREATE = 0x00000100
+    _IN_DELETE = 0x00000200
+    _IN_Q_OVERFLOW = 0x00004000
+    _IN_IGNORED = 0x00008000
+    _IN_ISDIR = 0x40000000
+    _IN_NONBLOCK = os.O_NONBLOCK
+    _IN_CLOEXEC = 0o2000000
+    _EVENT_HEADER = struct.Struct("iIII")
+    _WATCH_MASK = (
+        _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+    )
+
+    def __init__(self, root: Path, scanner: VideoScanner) -> None:
+        library = ctypes.util.find_library("c")
+        if library is None:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(library, use_errno=True)
+        self._root = root
+        self._scanner = scanner
+        self._fd = self._libc.inotify_init1(self._IN_NONBLOCK | self._IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._wd_paths: dict[int, str] = {}
+        self.skipped_directories: list[str] = []
+        self._watch_tree(str(root))
+        if str(root) not in self._wd_paths.values():
+            # 根目录本身无法监听时 inotify 收不到任何新文件，由调用方退回轮询
+            reason = self.skipped_directories[0] if self.skipped_directories else str(root)
+            self.close()
+            raise OSError(f"inotify_add_watch failed: {reason}")
+
+    def poll(self, timeout: float) -> set[Path]:
+        if self._fd < 0:
+            return set()
+        readable, _, _ = select.select([self._fd], [], [], max(0.0, timeout))
+        if not readable:
+            return set()
+
+        changed: set[Path] = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset + self._EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = self._EVENT_HEADER.unpack_from(data, offset)
+            offset += self._EVENT_HEADER.size
+            name = data[offset : offset + name_len].split(b"\0", 1)[0]
+            offset += name_len
+
+            if mask & self._IN_Q_OVERFLOW:
+                # 事件队列溢出后无法知道丢了哪些变化，退化为整体重新枚举
+                changed.update(record.path for record in self._scanner.iter_records(self._root))
+                continue
+            if mask & self._IN_IGNORED:
+                self._wd_paths.pop(wd, None)
+                continue
+
+            directory = self._wd_paths.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & self._IN_ISDIR:
+                if mask & (self._IN_CREATE | self._IN_MOVED_TO):
+                    # 新目录在加监听前可能已写入文件，补一次枚举
+                    self._watch_tree(path)
+                    changed.update(record.path for record in self._scanner.iter_records(Path(path)))
+                continue
+            changed.add(Path(path))
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+        self._wd_paths.clear()
+
+    def _watch_tree(self, top: str) -> None:
+        for directory, _, _ in os.walk(top):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self._WATCH_MASK)
+            if wd < 0:
+                # 单个目录无权限或超过 max_user_watches 时只跳过该目录，其余目录仍用 inotify
+                reason = os.strerror(ctypes.get_errno())
+                self.skipped_directories.append(f"{directory} ({reason})")
+                continue
+            self._wd_paths[wd] = directory
+
+
+def create_watcher(
+    root: Path,
+    extensions: set[str],
+    poll_interval_seconds: float,
+) -> DirectoryWatcher:
+    scanner = VideoScanner(extensions)
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root, scanner)
+        except (OSError, AttributeError):
+            # inotify 不可用（初始化失败、根目录无法监听）时退回轮询
+            pass
+    return PollingWatcher(root, scanner, poll_interval_seconds)
+
+
+class StabilityTracker:
+    def __init__(self, extensions: set[str], settle_seconds: float) -> None:
+        self._extensions = {ext.lower() for ext in extensions}
+        self._settle_seconds = max(0.0, settle_seconds)
+        self._pending: dict[Path, tuple[tuple[float, int] | None, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def touch(self, path: Path, now: float | None = None) -> None:
+        if path.suffix.lower() not in self._extensions:
+            return
+        self._pending[path] = (None, time.monotonic() if now is None else now)
+
+    def poll(self, now: float | None = None) -> tuple[list[FileRecord], list[Path]]:
+        current = time.monotonic() if now is None else now
+        stable: list[FileRecord] = []
+        removed: list[Path] = []
+        for path, (last_signature, since) in list(self._pending.items()):
+            try:
+                stat = path.stat()
+            except OSError:
+                del self._pending[path]
+                removed.append(path)
+                continue
+
+            signature = (stat.st_mtime, stat.st_size)
+            if signature != last_signature:
+                # 仍在写入：大小或修改时间变化时重新计时
+                self._pending[path] = (signature, current)
+                continue
+            if current - since >= self._settle_seconds:
+                del self._pending[path]
+                stable.append(FileRecord(path, stat.st_mtime, stat.st_size))
+        return stable, removed
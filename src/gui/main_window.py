@@ -14,7 +14,10 @@ from PySide6.QtWidgets import (
 
 from ..config import AppConfig
 from ..core.comparator import DuplicateGroup
+from ..workers.lookup_worker import LookupWorker
+from ..workers.query_worker import QueryWorker
 from ..workers.scan_worker import ScanWorker
+from ..workers.watch_worker import WatchWorker
 from .preview_widget import PreviewWidget
 from .result_panel import ResultPanel
 from .scan_panel import ScanPanel
@@ -29,12 +32,15 @@ class MainWindow(QMainWindow):
 
         self.config = AppConfig()
         self._scan_thread: QThread | None = None
-        self._scan_worker: ScanWorker | None = None
-        self._last_scan_root: Path | None = None
+        self._scan_worker: ScanWorker | WatchWorker | QueryWorker | None = None
+        self._live_groups: list[DuplicateGroup] = []
+        self._last_scan_roots: list[Path] = []
         self._last_threshold: float = self.config.similarity_threshold
         self._restart_pending = False
         self._last_partial_render_time = 0.0
         self._last_partial_processed = 0
+        # 收到按成本加权的剩余时间后，进度条改为按成本显示
+        self._weighted_progress = False
 
         root = QWidget(self)
         layout = QVBoxLayout(root)
@@ -67,6 +73,9 @@ class MainWindow(QMainWindow):
         self.scan_panel.resume_requested.connect(self._resume_scan)
         self.scan_panel.stop_requested.connect(self._stop_scan)
         self.scan_panel.restart_requested.connect(self._restart_scan)
+        self.scan_panel.watch_requested.connect(self._start_watch)
+        self.scan_panel.query_requested.connect(self._start_query)
+        self.scan_panel.lookup_requested.connect(self._start_lookup)
         self.scan_panel.settings_requested.connect(self._open_settings)
         self.result_panel.preview_requested.connect(self.preview.set_video)
 
@@ -74,22 +83,32 @@ class MainWindow(QMainWindow):
         dialog = SettingsDialog(
             self.config.frame_interval_seconds,
             self.config.performance_profile,
+            self.config.cache_maintenance_enabled,
+            self.config.cache_max_age_days,
+            self.config.retry_failed_files,
+            self.config.scan_order,
+            self.config.background_mode,
             self,
         )
         if dialog.exec():
             self.config.frame_interval_seconds = dialog.frame_interval.value()
             self.config.performance_profile = dialog.performance_profile.currentData()
+            self.config.cache_maintenance_enabled = dialog.cache_maintenance.isChecked()
+            self.config.cache_max_age_days = float(dialog.cache_max_age.value())
+            self.config.retry_failed_files = dialog.retry_failed.isChecked()
+            self.config.scan_order = dialog.scan_order.currentData()
+            self.config.background_mode = dialog.background_mode.isChecked()
             self.progress_label.setText(
                 "设置已更新："
                 f"抽帧间隔 {self.config.frame_interval_seconds} 秒，"
                 f"性能档位 {self.config.performance_profile}"
             )
 
-    def _start_scan(self, root_dir: Path, threshold: float) -> None:
+    def _start_scan(self, roots: list[Path], threshold: float, *, resume: bool = True) -> None:
         if self._scan_thread is not None and self._scan_thread.isRunning():
             return
 
-        self._last_scan_root = root_dir
+        self._last_scan_roots = roots
         self._last_threshold = threshold
         self.config.similarity_threshold = threshold
         self.progress.setValue(0)
@@ -99,14 +118,17 @@ class MainWindow(QMainWindow):
         self.task_label.setText("当前任务: 初始化扫描任务")
         self._last_partial_render_time = 0.0
         self._last_partial_processed = 0
+        self._weighted_progress = False
+        self.progress.resetFormat()
         self.scan_panel.set_scan_state(is_scanning=True, is_paused=False)
 
-        worker = ScanWorker(root_dir=root_dir, config=self.config)
+        worker = ScanWorker(root_dir=roots, config=self.config, resume=resume)
         thread = QThread(self)
 
         worker.moveToThread(thread)
         thread.started.connect(worker.run)
         worker.progress.connect(self._on_scan_progress)
+        worker.remaining.connect(self._on_scan_remaining)
         worker.status.connect(self._on_status)
         worker.current_task.connect(self._on_task)
         worker.partial_groups.connect(self._on_partial_groups)
@@ -124,12 +146,139 @@ class MainWindow(QMainWindow):
         self._scan_thread = thread
         thread.start()
 
+    def _start_watch(self, root_dir: Path, threshold: float) -> None:
+        if self._scan_thread is not None and self._scan_thread.isRunning():
+            return
+
+        self.config.similarity_threshold = threshold
+        self._live_groups = []
+        self.progress.setRange(0, 0)
+        self.result_panel.set_groups([])
+        self.preview.clear_preview("监控中，发现新的重复文件后会显示在左侧")
+        self.progress_label.setText("准备开始监控...")
+        self.task_label.setText("当前任务: 加载指纹库")
+        self.scan_panel.set_scan_state(is_scanning=True, is_paused=False)
+
+        worker = WatchWorker(root_dir=root_dir, config=self.config)
+        thread = QThread(self)
+
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.status.connect(self._on_status)
+        worker.current_task.connect(self._on_task)
+        worker.new_groups.connect(self._on_live_groups)
+        worker.stopped.connect(self._on_watch_stopped)
+        worker.failed.connect(self._on_scan_failed)
+        worker.stopped.connect(thread.quit)
+        worker.failed.connect(thread.quit)
+        thread.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+        thread.finished.connect(self._on_thread_finished)
+
+        self._scan_worker = worker
+        self._scan_thread = thread
+        thread.start()
+
+    def _start_query(self, incoming_dir: Path, library_roots: list[Path], threshold: float) -> None:
+        if self._scan_thread is not None and self._scan_thread.isRunning():
+            return
+
+        self.config.similarity_threshold = threshold
+        self._live_groups = []
+        self.progress.setValue(0)
+        self.result_panel.set_groups([])
+        self.preview.clear_preview("比对进行中，资料库中已有的文件会显示在左侧")
+        self.progress_label.setText("准备开始比对...")
+        self.task_label.setText("当前任务: 加载资料库索引")
+        self.scan_panel.set_scan_state(is_scanning=True, is_paused=False)
+
+        worker = QueryWorker(incoming_dir, library_roots, self.config)
+        thread = QThread(self)
+
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.progress.connect(self._on_scan_progress)
+        worker.status.connect(self._on_status)
+        worker.current_task.connect(self._on_task)
+        worker.new_groups.connect(self._on_live_groups)
+        worker.finished.connect(self._on_scan_finished)
+        worker.stopped.connect(self._on_scan_stopped)
+        worker.failed.connect(self._on_scan_failed)
+        worker.finished.connect(thread.quit)
+        worker.stopped.connect(thread.quit)
+        worker.failed.connect(thread.quit)
+        thread.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+        thread.finished.connect(self._on_thread_finished)
+
+        self._scan_worker = worker
+        self._scan_thread = thread
+        thread.start()
+
+    def _start_lookup(self, video_path: Path, threshold: float) -> None:
+        if self._scan_thread is not None and self._scan_thread.isRunning():
+            return
+
+        self.config.similarity_threshold = threshold
+        self.progress.setRange(0, 0)
+        self.result_panel.set_groups([])
+        self.preview.clear_preview("查找中...")
+        self.task_label.setText(f"当前任务: 查找相似 {video_path.name}")
+        self.scan_panel.set_scan_state(is_scanning=True, is_paused=False)
+
+        # 单文件查找不支持暂停/终止，不登记为 _scan_worker
+        worker = LookupWorker(video_path, self.config)
+        thread = QThread(self)
+
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.status.connect(self._on_status)
+        worker.finished.connect(self._on_lookup_finished)
+        worker.failed.connect(self._on_scan_failed)
+        worker.finished.connect(thread.quit)
+        worker.failed.connect(thread.quit)
+        thread.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+        thread.finished.connect(self._on_thread_finished)
+
+        self._scan_thread = thread
+        thread.start()
+
+    def _on_lookup_finished(self, groups: list[DuplicateGroup]) -> None:
+        self.progress.setRange(0, 100)
+        self.progress.setValue(100)
+        self.result_panel.set_groups(groups)
+        self.preview.clear_preview("请选择左侧文件查看首帧图" if groups else "未找到相似视频")
+        self.task_label.setText("当前任务: 查找完成")
+        self.scan_panel.set_scan_state(is_scanning=False, is_paused=False)
+
+    def _on_live_groups(self, groups: list[DuplicateGroup]) -> None:
+        self._live_groups.extend(groups)
+        self.result_panel.set_groups(self._live_groups)
+
+    def _on_watch_stopped(self) -> None:
+        self.progress.setRange(0, 100)
+        self.progress.setValue(0)
+        self.progress_label.setText(f"监控已停止：共发现 {len(self._live_groups)} 组")
+        self.task_label.setText("当前任务: 已停止")
+        self.scan_panel.set_scan_state(is_scanning=False, is_paused=False)
+
     def _on_scan_progress(self, current: int, total: int) -> None:
+        if self._weighted_progress and current < total:
+            return
         if total <= 0:
             self.progress.setValue(0)
             return
         self.progress.setValue(int(current / total * 100))
 
+    def _on_scan_remaining(self, fraction: float, remaining_seconds: float) -> None:
+        self._weighted_progress = True
+        minutes, seconds = divmod(int(remaining_seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        text = f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+        self.progress.setValue(int(fraction * 100))
+        self.progress.setFormat(f"%p%  剩余约 {text}")
+
     def _on_status(self, text: str) -> None:
         self.progress_label.setText(text)
 
@@ -137,6 +286,7 @@ class MainWindow(QMainWindow):
         self.task_label.setText(f"当前任务: {text}")
 
     def _on_scan_finished(self, groups: list[DuplicateGroup]) -> None:
+        self.progress.resetFormat()
         self.result_panel.set_groups(groups)
         if groups:
             self.preview.clear_preview("请选择左侧文件查看首帧图")
@@ -165,6 +315,7 @@ class MainWindow(QMainWindow):
         )
 
     def _on_scan_stopped(self) -> None:
+        self.progress.resetFormat()
         self.progress_label.setText("扫描已终止")
         self.task_label.setText("当前任务: 已终止")
         self.progress.setValue(0)
@@ -173,6 +324,8 @@ class MainWindow(QMainWindow):
         self.scan_panel.set_scan_state(is_scanning=False, is_paused=False)
 
     def _on_scan_failed(self, error: str) -> None:
+        self.progress.setRange(0, 100)
+        self.progress.resetFormat()
         self.progress_label.setText(f"扫描失败：{error}")
         self.task_label.setText("当前任务: 失败")
         self.scan_panel.set_scan_state(is_scanning=False, is_paused=False)
@@ -194,18 +347,18 @@ class MainWindow(QMainWindow):
             return
         self._scan_worker.request_stop()
 
-    def _restart_scan(self, root_dir: Path, threshold: float) -> None:
-        self._last_scan_root = root_dir
+    def _restart_scan(self, roots: list[Path], threshold: float) -> None:
+        self._last_scan_roots = roots
         self._last_threshold = threshold
         if self._scan_thread is not None and self._scan_thread.isRunning():
             self._restart_pending = True
             self._stop_scan()
             return
-        self._start_scan(root_dir, threshold)
+        self._start_scan(roots, threshold, resume=False)
 
     def _on_thread_finished(self) -> None:
         self._scan_thread = None
         self._scan_worker = None
-        if self._restart_pending and self._last_scan_root is not None:
+        if self._restart_pending and self._last_scan_roots:
             self._restart_pending = False
-            self._start_scan(self._last_scan_root, self._last_threshold)
+            self._start_scan(self._last_scan_roots, self._last_threshold, resume=False)
@@ -77,9 +77,12 @@ class ResultPanel(QWidget):
         self.tree.clear()
 
         for group_index, group in enumerate(groups, start=1):
-            root = QTreeWidgetItem(
-                [f"第 {group_index} 组 (相似度 {group.similarity:.2f})", "", "", "", ""]
+            title = (
+                f"第 {group_index} 组 (同一文件的链接)"
+                if group.is_alias
+                else f"第 {group_index} 组 (相似度 {group.similarity:.2f})"
             )
+            root = QTreeWidgetItem([title, "", "", "", ""])
             self.tree.addTopLevelItem(root)
 
             for item in group.items:
@@ -90,7 +93,7 @@ class ResultPanel(QWidget):
                         f"{item.width}x{item.height}",
                         str(item.bitrate),
                         f"{item.size_bytes / (1024 * 1024):.2f}",
-                        "保留" if is_keep else "可删除",
+                        "保留" if is_keep else ("链接" if group.is_alias else "可删除"),
                     ]
                 )
                 child.setFlags(child.flags() | Qt.ItemFlag.ItemIsUserCheckable)
@@ -284,7 +287,8 @@ class ResultPanel(QWidget):
     def _smart_select_deletable(self) -> None:
         for group_index, group in enumerate(self._groups):
             root = self.tree.topLevelItem(group_index)
-            if root is None:
+            # 删除链接不释放空间，智能勾选只处理真正的重复文件
+            if root is None or group.is_alias:
                 continue
             keep = str(group.recommended_keep.path)
             for idx in range(root.childCount()):
@@ -337,12 +341,12 @@ class ResultPanel(QWidget):
         if not path:
             return
 
-        lines = ["group,similarity,path,width,height,bitrate,size_bytes,recommend_keep"]
+        lines = ["group,similarity,path,width,height,bitrate,size_bytes,recommend_keep,alias"]
         for idx, group in enumerate(self._groups, start=1):
             for item in group.items:
                 keep = int(item.path == group.recommended_keep.path)
                 lines.append(
-                    f'{idx},{group.similarity:.4f},"{item.path}",{item.width},{item.height},{item.bitrate},{item.size_bytes},{keep}'
+                    f'{idx},{group.similarity:.4f},"{item.path}",{item.width},{item.height},{item.bitrate},{item.size_bytes},{keep},{int(group.is_alias)}'
                 )
 
         Path(path).write_text("\n".join(lines), encoding="utf-8")
@@ -358,6 +362,7 @@ class ResultPanel(QWidget):
                 {
                     "group": idx,
                     "similarity": group.similarity,
+                    "alias": group.is_alias,
                     "recommended_keep": str(group.recommended_keep.path),
                     "items": [
                         {
@@ -397,6 +402,7 @@ class ResultPanel(QWidget):
                     items=remaining,
                     similarity=group.similarity,
                     recommended_keep=keep,
+                    is_alias=group.is_alias,
                 )
             )
 
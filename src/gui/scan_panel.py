@@ -14,11 +14,14 @@ from PySide6.QtWidgets import (
 
 
 class ScanPanel(QWidget):
-    scan_requested = Signal(Path, float)
+    scan_requested = Signal(list, float)
     pause_requested = Signal()
     resume_requested = Signal()
     stop_requested = Signal()
-    restart_requested = Signal(Path, float)
+    restart_requested = Signal(list, float)
+    watch_requested = Signal(Path, float)
+    query_requested = Signal(Path, list, float)
+    lookup_requested = Signal(Path, float)
     settings_requested = Signal()
 
     def __init__(self) -> None:
@@ -27,12 +30,15 @@ class ScanPanel(QWidget):
 
         row = QHBoxLayout()
         self.dir_input = QLineEdit(self)
-        self.dir_input.setPlaceholderText("选择要扫描的目录")
+        self.dir_input.setPlaceholderText("选择要扫描的目录，多个目录用 ; 分隔")
         browse_btn = QPushButton("浏览", self)
         browse_btn.clicked.connect(self._pick_directory)
+        add_btn = QPushButton("添加目录", self)
+        add_btn.clicked.connect(self._add_directory)
         row.addWidget(QLabel("目录:", self))
         row.addWidget(self.dir_input)
         row.addWidget(browse_btn)
+        row.addWidget(add_btn)
         layout.addLayout(row)
 
         threshold_row = QHBoxLayout()
@@ -54,6 +60,13 @@ class ScanPanel(QWidget):
         self.resume_btn = QPushButton("继续", self)
         self.stop_btn = QPushButton("终止", self)
         self.restart_btn = QPushButton("重新扫描", self)
+        self.watch_btn = QPushButton("监控目录", self)
+        self.query_btn = QPushButton("对比资料库", self)
+        self.lookup_btn = QPushButton("查找相似", self)
+        self.lookup_btn.setToolTip("选择一个视频，在缓存库中查找与之相似的视频")
+        self.query_btn.setToolTip(
+            "第一个目录为待比对目录，其余目录为资料库；只填一个目录时与整个缓存库比对"
+        )
         self.settings_btn = QPushButton("设置", self)
 
         self.start_btn.clicked.connect(self._emit_scan)
@@ -61,6 +74,9 @@ class ScanPanel(QWidget):
         self.resume_btn.clicked.connect(self.resume_requested.emit)
         self.stop_btn.clicked.connect(self.stop_requested.emit)
         self.restart_btn.clicked.connect(self._emit_restart)
+        self.watch_btn.clicked.connect(self._emit_watch)
+        self.query_btn.clicked.connect(self._emit_query)
+        self.lookup_btn.clicked.connect(self._emit_lookup)
         self.settings_btn.clicked.connect(self.settings_requested.emit)
 
         actions.addWidget(self.start_btn)
@@ -68,6 +84,9 @@ class ScanPanel(QWidget):
         actions.addWidget(self.resume_btn)
         actions.addWidget(self.stop_btn)
         actions.addWidget(self.restart_btn)
+        actions.addWidget(self.watch_btn)
+        actions.addWidget(self.query_btn)
+        actions.addWidget(self.lookup_btn)
         actions.addWidget(self.settings_btn)
         layout.addLayout(actions)
 
@@ -78,22 +97,52 @@ class ScanPanel(QWidget):
         if selected:
             self.dir_input.setText(selected)
 
+    def _add_directory(self) -> None:
+        selected = QFileDialog.getExistingDirectory(self, "添加目录")
+        if selected:
+            self.dir_input.setText("; ".join([*map(str, self._roots()), selected]))
+
+    def _roots(self) -> list[Path]:
+        return [Path(part.strip()) for part in self.dir_input.text().split(";") if part.strip()]
+
     def _on_threshold_change(self, value: int) -> None:
         self.threshold_label.setText(f"{value / 100:.2f}")
 
     def _emit_scan(self) -> None:
-        path = self.dir_input.text().strip()
-        if not path:
+        roots = self._roots()
+        if not roots:
             return
         threshold = self.threshold_slider.value() / 100
-        self.scan_requested.emit(Path(path), threshold)
+        self.scan_requested.emit(roots, threshold)
 
     def _emit_restart(self) -> None:
-        path = self.dir_input.text().strip()
-        if not path:
+        roots = self._roots()
+        if not roots:
+            return
+        threshold = self.threshold_slider.value() / 100
+        self.restart_requested.emit(roots, threshold)
+
+    def _emit_watch(self) -> None:
+        roots = self._roots()
+        if not roots:
+            return
+        # 监控模式只跟踪第一个目录，其余目录应先扫描入库作为比对基准
+        threshold = self.threshold_slider.value() / 100
+        self.watch_requested.emit(roots[0], threshold)
+
+    def _emit_query(self) -> None:
+        roots = self._roots()
+        if not roots:
+            return
+        threshold = self.threshold_slider.value() / 100
+        self.query_requested.emit(roots[0], roots[1:], threshold)
+
+    def _emit_lookup(self) -> None:
+        selected, _ = QFileDialog.getOpenFileName(self, "选择视频文件")
+        if not selected:
             return
         threshold = self.threshold_slider.value() / 100
-        self.restart_requested.emit(Path(path), threshold)
+        self.lookup_requested.emit(Path(selected), threshold)
 
     def set_scan_state(self, *, is_scanning: bool, is_paused: bool) -> None:
         self.start_btn.setEnabled(not is_scanning)
@@ -101,3 +150,6 @@ class ScanPanel(QWidget):
         self.resume_btn.setEnabled(is_scanning and is_paused)
         self.stop_btn.setEnabled(is_scanning)
         self.restart_btn.setEnabled(True)
+        self.watch_btn.setEnabled(not is_scanning)
+        self.query_btn.setEnabled(not is_scanning)
+        self.lookup_btn.setEnabled(not is_scanning)
@@ -1,6 +1,14 @@
-from PySide6.QtWidgets import QComboBox, QDialog, QFormLayout, QHBoxLayout, QPushButton, QSpinBox
+from PySide6.QtWidgets import (
+    QCheckBox,
+    QComboBox,
+    QDialog,
+    QFormLayout,
+    QHBoxLayout,
+    QPushButton,
+    QSpinBox,
+)
 
-from ..config import PerformanceProfile
+from ..config import PerformanceProfile, ScanOrder
 
 
 class SettingsDialog(QDialog):
@@ -8,6 +16,11 @@ class SettingsDialog(QDialog):
         self,
         frame_interval: int,
         performance_profile: PerformanceProfile,
+        cache_maintenance_enabled: bool = False,
+        cache_max_age_days: float = 0.0,
+        retry_failed_files: bool = False,
+        scan_order: ScanOrder = "longest_first",
+        background_mode: bool = False,
         parent=None,
     ) -> None:
         super().__init__(parent)
@@ -29,6 +42,33 @@ class SettingsDialog(QDialog):
             self.performance_profile.setCurrentIndex(selected)
         layout.addRow("性能档位", self.performance_profile)
 
+        self.scan_order = QComboBox(self)
+        self.scan_order.addItem("大文件优先（整体更快）", "longest_first")
+        self.scan_order.addItem("疑似重复优先（更早出结果）", "likely_duplicates")
+        self.scan_order.addItem("按路径顺序", "path")
+        selected = self.scan_order.findData(scan_order)
+        if selected >= 0:
+            self.scan_order.setCurrentIndex(selected)
+        layout.addRow("提取顺序", self.scan_order)
+
+        self.background_mode = QCheckBox("降低优先级并限制 CPU 占用，空闲时自动提速", self)
+        self.background_mode.setChecked(background_mode)
+        layout.addRow("后台模式", self.background_mode)
+
+        self.cache_maintenance = QCheckBox("扫描完成后清理并压缩缓存", self)
+        self.cache_maintenance.setChecked(cache_maintenance_enabled)
+        layout.addRow("缓存维护", self.cache_maintenance)
+
+        self.cache_max_age = QSpinBox(self)
+        self.cache_max_age.setRange(0, 3650)
+        self.cache_max_age.setSpecialValueText("不过期")
+        self.cache_max_age.setValue(int(cache_max_age_days))
+        layout.addRow("缓存过期(天)", self.cache_max_age)
+
+        self.retry_failed = QCheckBox("重新尝试此前解码失败的文件", self)
+        self.retry_failed.setChecked(retry_failed_files)
+        layout.addRow("失败文件", self.retry_failed)
+
         actions = QHBoxLayout()
         ok_btn = QPushButton("确定", self)
         cancel_btn = QPushButton("取消", self)
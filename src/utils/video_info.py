@@ -4,6 +4,12 @@ from pathlib import Path
 import cv2
 
 
+class VideoDecodeError(ValueError):
+    # 容器无法打开或没有可解码的帧。文件不变时重试结果也不变，只有这类失败写入失败记录；
+    # I/O 错误、超时、内存不足等可能是暂时的，下次扫描照常重试
+    pass
+
+
 @dataclass(slots=True)
 class VideoInfo:
     path: Path
@@ -20,7 +26,7 @@ def read_video_info(path: Path) -> VideoInfo:
     stat = path.stat()
     cap = cv2.VideoCapture(str(path))
     if not cap.isOpened():
-        raise ValueError(f"Failed to open video: {path}")
+        raise VideoDecodeError(f"Failed to open video: {path}")
 
     fps = float(cap.get(cv2.CAP_PROP_FPS) or 0.0)
     frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
@@ -0,0 +1,102 @@
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from pathlib import Path
+
+from ..config import AppConfig
+from ..core.comparator import DuplicateGroup
+from ..core.fingerprint import VideoFingerprint
+from .scan_engine import ScanEngine, ScanSink
+
+
+@dataclass(slots=True)
+class ScanEvent:
+    # kind: progress / remaining / status / task / fingerprint / partial_groups / group /
+    # finished / stopped
+    kind: str
+    payload: tuple
+
+
+class _LoopSink(ScanSink):
+    # 回调在扫描线程中执行，通过 call_soon_threadsafe 交给事件循环
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        events: "asyncio.Queue[ScanEvent | None]",
+    ) -> None:
+        self._loop = loop
+        self._events = events
+
+    def _put(self, kind: str, *payload: object) -> None:
+        self._loop.call_soon_threadsafe(self._events.put_nowait, ScanEvent(kind, payload))
+
+    def on_progress(self, current: int, total: int) -> None:
+        self._put("progress", current, total)
+
+    def on_remaining(self, fraction: float, remaining_seconds: float) -> None:
+        self._put("remaining", fraction, remaining_seconds)
+
+    def on_status(self, text: str) -> None:
+        self._put("status", text)
+
+    def on_task(self, text: str) -> None:
+        self._put("task", text)
+
+    def on_fingerprint(self, fingerprint: VideoFingerprint) -> None:
+        self._put("fingerprint", fingerprint)
+
+    def on_partial_groups(
+        self,
+        groups: list[DuplicateGroup],
+        processed: int,
+        total: int,
+    ) -> None:
+        self._put("partial_groups", groups, processed, total)
+
+    def on_group(self, group: DuplicateGroup) -> None:
+        self._put("group", group)
+
+    def on_finished(self, groups: list[DuplicateGroup]) -> None:
+        self._put("finished", groups)
+
+    def on_stopped(self) -> None:
+        self._put("stopped")
+
+
+async def scan_async(
+    root_dir: Path | list[Path],
+    config: AppConfig,
+    *,
+    resume: bool = True,
+    runner: Executor | None = None,
+    extract_executor: Executor | None = None,
+) -> AsyncIterator[ScanEvent]:
+    # 解码、SQLite 和分组比较都在 runner 线程中执行，不会阻塞事件循环；
+    # 多个扫描可共用同一个 runner 和 extract_executor。
+    # 取消迭代所在的任务即终止扫描，返回前会等待扫描线程收尾并关闭数据库
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue[ScanEvent | None] = asyncio.Queue()
+    engine = ScanEngine(
+        root_dir,
+        config,
+        _LoopSink(loop, events),
+        resume=resume,
+        executor=extract_executor,
+    )
+    task = loop.run_in_executor(runner, engine.run)
+    # 扫描线程的事件都先于完成回调入队，None 之后不会再有事件
+    task.add_done_callback(lambda _: events.put_nowait(None))
+    try:
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            yield event
+        await task
+    finally:
+        if not task.done():
+            engine.request_stop()
+            with contextlib.suppress(Exception):
+                await asyncio.shield(task)
@@ -1,4 +1,6 @@
-from ..core.comparator import DuplicateGroup, find_duplicate_groups
+from collections.abc import Callable
+
+from ..core.comparator import DuplicateGroup, iter_duplicate_groups
 from ..core.fingerprint import VideoFingerprint
 
 
@@ -6,11 +8,17 @@ def build_duplicate_groups(
     fingerprints: list[VideoFingerprint],
     similarity_threshold: float,
     duration_tolerance_seconds: float,
+    on_group: Callable[[DuplicateGroup], None] | None = None,
 ) -> list[DuplicateGroup]:
+    groups: list[DuplicateGroup] = []
     if len(fingerprints) < 2:
-        return []
-    return find_duplicate_groups(
+        return groups
+    for group in iter_duplicate_groups(
         fingerprints,
         similarity_threshold=similarity_threshold,
         duration_tolerance_seconds=duration_tolerance_seconds,
-    )
+    ):
+        groups.append(group)
+        if on_group is not None:
+            on_group(group)
+    return groups
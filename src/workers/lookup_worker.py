@@ -0,0 +1,54 @@
+from pathlib import Path
+
+from PySide6.QtCore import QObject, Signal
+
+from ..config import AppConfig
+from ..core.comparator import make_group
+from ..core.database import FingerprintDatabase
+from ..core.fingerprint import ExtractionBudget
+from ..core.lookup import lookup_similar
+
+
+class LookupWorker(QObject):
+    status = Signal(str)
+    finished = Signal(list)
+    failed = Signal(str)
+
+    def __init__(self, video_path: Path, config: AppConfig) -> None:
+        super().__init__()
+        self._video_path = video_path
+        self._config = config
+
+    def run(self) -> None:
+        try:
+            self.status.emit(f"查找相似视频: {self._video_path.name}")
+            db = FingerprintDatabase(self._config.cache_db)
+            try:
+                result = lookup_similar(
+                    db,
+                    self._video_path,
+                    frame_interval_seconds=self._config.frame_interval_seconds,
+                    similarity_threshold=self._config.similarity_threshold,
+                    duration_tolerance_seconds=self._config.duration_tolerance_seconds,
+                    budget=ExtractionBudget(
+                        max_seconds=self._config.extraction_timeout_seconds,
+                        max_frames=self._config.extraction_max_frames,
+                        seconds_per_media_second=self._config.extraction_timeout_per_media_second,
+                    ),
+                )
+            finally:
+                db.close()
+        except Exception as exc:  # noqa: BLE001
+            self.failed.emit(str(exc))
+            return
+
+        if not result.matches:
+            self.status.emit(f"缓存库中没有与 {self._video_path.name} 相似的视频")
+            self.finished.emit([])
+            return
+        group = make_group(
+            [result.fingerprint, *(item for item, _ in result.matches)],
+            result.matches[-1][1],
+        )
+        self.status.emit(f"找到 {len(result.matches)} 个相似视频")
+        self.finished.emit([group])
@@ -0,0 +1,130 @@
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from PySide6.QtCore import QObject, Signal
+
+from ..config import AppConfig
+from ..core.comparator import DuplicateGroup, make_group
+from ..core.database import FingerprintDatabase
+from ..core.fingerprint import VideoFingerprint
+from ..core.index import FingerprintIndex
+from ..core.library import library_snapshot_path, load_library_index
+from .scan_engine import ScanEngine, ScanSink
+
+
+class _QuerySink(ScanSink):
+    # 待比对目录的提取完全交给 ScanEngine（缓存、失败记录、看门狗、时间预算、检查点），
+    # 这里只把每个得到的指纹拿去资料库索引里检索
+    def __init__(self, worker: "QueryWorker") -> None:
+        self._worker = worker
+        self.index: FingerprintIndex | None = None
+        self.groups: list[DuplicateGroup] = []
+
+    def on_progress(self, current: int, total: int) -> None:
+        self._worker.progress.emit(current, total)
+
+    def on_status(self, text: str) -> None:
+        self._worker.status.emit(text)
+
+    def on_task(self, text: str) -> None:
+        self._worker.current_task.emit(text)
+
+    def on_fingerprint(self, fingerprint: VideoFingerprint) -> None:
+        if self.index is None:
+            return
+        group = self._worker._match(self.index, fingerprint)
+        if group is not None:
+            self.groups.append(group)
+            self._worker.new_groups.emit([group])
+
+    def on_stopped(self) -> None:
+        self._worker.stopped.emit()
+
+
+class QueryWorker(QObject):
+    progress = Signal(int, int)
+    status = Signal(str)
+    current_task = Signal(str)
+    new_groups = Signal(list)
+    finished = Signal(list)
+    stopped = Signal()
+    failed = Signal(str)
+
+    def __init__(
+        self,
+        incoming_dir: Path,
+        library_roots: list[Path],
+        config: AppConfig,
+    ) -> None:
+        super().__init__()
+        self._incoming_dir = incoming_dir
+        # 为空时整个缓存库都作为资料库
+        self._library_roots = library_roots
+        self._config = config
+        self._sink = _QuerySink(self)
+        # 缓存维护会按根目录清理记录，只扫描待比对目录时不能动资料库的缓存
+        self._engine = ScanEngine(
+            incoming_dir,
+            replace(config, cache_maintenance_enabled=False),
+            self._sink,
+        )
+
+    def request_pause(self) -> None:
+        self._engine.request_pause()
+
+    def request_resume(self) -> None:
+        self._engine.request_resume()
+
+    def request_stop(self) -> None:
+        self._engine.request_stop()
+
+    def is_paused(self) -> bool:
+        return self._engine.is_paused()
+
+    def run(self) -> None:
+        try:
+            self._sink.index = self._load_index()
+            if self._engine.run() is None:
+                return
+        except Exception as exc:  # noqa: BLE001
+            self.failed.emit(str(exc))
+            return
+        groups = self._sink.groups
+        self.status.emit(f"比对完成：{len(groups)} 个文件在资料库中已有相似副本")
+        self.finished.emit(groups)
+
+    def _load_index(self) -> FingerprintIndex:
+        self.status.emit("加载资料库检索索引...")
+        started = time.monotonic()
+        db = FingerprintDatabase(self._config.cache_db)
+        try:
+            index = load_library_index(
+                db,
+                self._library_roots,
+                library_snapshot_path(self._config.cache_db, self._library_roots),
+            )
+        finally:
+            db.close()
+        self.status.emit(
+            f"资料库索引已就绪：{len(index)} 条 (耗时 {time.monotonic() - started:.1f} 秒)"
+        )
+        return index
+
+    def _match(self, index: FingerprintIndex, fp: VideoFingerprint) -> DuplicateGroup | None:
+        matches = [
+            (item, similarity)
+            for item, similarity in index.query(
+                fp,
+                similarity_threshold=self._config.similarity_threshold,
+                duration_tolerance_seconds=self._config.duration_tolerance_seconds,
+            )
+            # 资料库覆盖整个缓存时排除待比对目录自身的文件
+            if not item.path.is_relative_to(self._incoming_dir)
+        ]
+        if not matches:
+            return None
+        return make_group(
+            [fp, *(item for item, _ in matches)],
+            min(similarity for _, similarity in matches),
+        )
@@ -0,0 +1,894 @@
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from pathlib import Path
+
+import cv2
+
+from ..config import AppConfig
+from ..core.background import CpuThrottle, lower_current_thread_priority
+from ..core.cancellation import CancellationToken
+from ..core.comparator import DuplicateGroup, make_alias_groups
+from ..core.concurrency import (
+    AdaptiveConcurrency,
+    MemoryBudget,
+    estimate_decode_bytes,
+    total_memory_bytes,
+)
+from ..core.database import (
+    MANIFEST_DONE,
+    MANIFEST_FAILED,
+    MANIFEST_PENDING,
+    MANIFEST_SKIPPED,
+    FingerprintDatabase,
+    ManifestEntry,
+    ScanManifest,
+)
+from ..core.fingerprint import (
+    ExtractionBudget,
+    ExtractionTimeoutError,
+    VideoFingerprint,
+    extract_fingerprint,
+)
+from ..core.pipeline import BoundedFeed
+from ..core.readahead import DEFAULT_READAHEAD_BYTES
+from ..core.scanner import (
+    DirectoryIndex,
+    FileRecord,
+    VideoScanner,
+    collapse_roots,
+    split_aliases,
+)
+from ..core.scheduler import (
+    DEVICE_KIND_NAMES,
+    ORDER_LIKELY_DUPLICATES,
+    ExtractionScheduler,
+)
+from ..core.sharding import ShardFilter
+from ..core.watchdog import ExtractionWatchdog
+from ..utils.video_info import VideoDecodeError, read_video_info
+from .compare_worker import build_duplicate_groups
+from .tuning import (
+    _compute_batch_pause_seconds,
+    _compute_cpu_ceiling,
+    _compute_fingerprint_workers,
+    _compute_inflight_limit,
+    _compute_inflight_multiplier,
+    _compute_max_fingerprint_workers,
+    _compute_opencv_threads,
+    _compute_pending_limit,
+    _compute_stat_batch_size,
+    _compute_walker_workers,
+    _compute_yield_settings,
+)
+
+
+def _read_signature(path: Path) -> tuple[Path, float, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (path, stat.st_mtime, stat.st_size)
+
+
+def _extensions_key(config: AppConfig) -> str:
+    return ",".join(sorted(ext.lower() for ext in config.supported_extensions))
+
+
+def _compute_config_hash(config: AppConfig) -> str:
+    # 只包含影响文件列表和指纹结果的参数，调整性能档位不会使检查点失效
+    payload = json.dumps(
+        {
+            "frame_interval_seconds": config.frame_interval_seconds,
+            "extraction_max_frames": config.extraction_max_frames,
+            "supported_extensions": _extensions_key(config),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _timed_extract(
+    watchdog: ExtractionWatchdog,
+    path: Path,
+    frame_interval_seconds: int,
+    budget: ExtractionBudget,
+    token: CancellationToken,
+    concurrency: AdaptiveConcurrency | None = None,
+    readahead_bytes: int = DEFAULT_READAHEAD_BYTES,
+    memory: MemoryBudget | None = None,
+    throttle: CpuThrottle | None = None,
+) -> VideoFingerprint:
+    # 等待名额时只响应暂停和停止，不参与限速
+    slot_token = token
+    if throttle is not None:
+        lower_current_thread_priority()
+
+        def wait() -> float:
+            # 限速休眠与暂停一样不算作该文件的解码耗时
+            waited = throttle.throttle()
+            watchdog.extend(waited, path)
+            return waited
+
+        token = token.throttled(wait)
+    # 等待解码名额的时间不计入看门狗；打开容器读取元数据同样可能卡住（损坏文件、
+    # 网络盘），从这里开始计时
+    with concurrency.slot(path, slot_token) if concurrency is not None else nullcontext():
+        watchdog.mark_started(path)
+        try:
+            info = read_video_info(path)
+            # 看门狗的基础时限按最短预算计算，长视频按时长顺延，与提取内部的预算一致
+            watchdog.extend(
+                _compute_watchdog_seconds(budget.time_limit(info.duration_seconds))
+                - _compute_watchdog_seconds(budget.max_seconds),
+                path,
+            )
+            reserve_started = time.monotonic()
+            with (
+                memory.reserve(path, estimate_decode_bytes(info.width, info.height), token)
+                if memory is not None
+                else nullcontext()
+            ):
+                # 等待内存预算的时间不算作该文件的解码耗时
+                watchdog.extend(time.monotonic() - reserve_started, path)
+                return extract_fingerprint(
+                    path,
+                    frame_interval_seconds,
+                    budget,
+                    token,
+                    readahead_bytes=readahead_bytes,
+                    info=info,
+                )
+        finally:
+            watchdog.mark_finished(path)
+
+
+def _compute_watchdog_seconds(timeout_seconds: float) -> float:
+    if timeout_seconds <= 0:
+        return 0.0
+    # 预算只在两次读帧之间检查，卡死在单次 read() 时由看门狗兜底
+    return timeout_seconds + max(30.0, timeout_seconds * 0.25)
+
+
+class ScanSink:
+    # 扫描事件的接收方；默认全部忽略，按需覆盖。回调在扫描线程中执行，应尽快返回
+    def on_progress(self, current: int, total: int) -> None:
+        pass
+
+    def on_remaining(self, fraction: float, remaining_seconds: float) -> None:
+        # 按预估解码成本加权的进度与剩余时间，文件大小悬殊时比按个数的进度更准确
+        pass
+
+    def on_status(self, text: str) -> None:
+        pass
+
+    def on_task(self, text: str) -> None:
+        pass
+
+    def on_fingerprint(self, fingerprint: VideoFingerprint) -> None:
+        pass
+
+    def on_partial_groups(
+        self,
+        groups: list[DuplicateGroup],
+        processed: int,
+        total: int,
+    ) -> None:
+        pass
+
+    def on_group(self, group: DuplicateGroup) -> None:
+        # 最终结果中的每个组生成后立即回调，之后 on_finished 再给出完整列表
+        pass
+
+    def on_finished(self, groups: list[DuplicateGroup]) -> None:
+        pass
+
+    def on_stopped(self) -> None:
+        pass
+
+
+class QueueSink(ScanSink):
+    # 把事件转成 (类型, 参数) 放入队列，供其他线程或事件循环消费
+    def __init__(self, events: "queue.Queue[tuple[str, tuple]]") -> None:
+        self._events = events
+
+    def on_progress(self, current: int, total: int) -> None:
+        self._events.put(("progress", (current, total)))
+
+    def on_remaining(self, fraction: float, remaining_seconds: float) -> None:
+        self._events.put(("remaining", (fraction, remaining_seconds)))
+
+    def on_status(self, text: str) -> None:
+        self._events.put(("status", (text,)))
+
+    def on_task(self, text: str) -> None:
+        self._events.put(("task", (text,)))
+
+    def on_fingerprint(self, fingerprint: VideoFingerprint) -> None:
+        self._events.put(("fingerprint", (fingerprint,)))
+
+    def on_partial_groups(
+        self,
+        groups: list[DuplicateGroup],
+        processed: int,
+        total: int,
+    ) -> None:
+        self._events.put(("partial_groups", (groups, processed, total)))
+
+    def on_group(self, group: DuplicateGroup) -> None:
+        self._events.put(("group", (group,)))
+
+    def on_finished(self, groups: list[DuplicateGroup]) -> None:
+        self._events.put(("finished", (groups,)))
+
+    def on_stopped(self) -> None:
+        self._events.put(("stopped", ()))
+
+
+class ScanEngine:
+    def __init__(
+        self,
+        root_dir: Path | list[Path],
+        config: AppConfig,
+        sink: ScanSink | None = None,
+        *,
+        resume: bool = True,
+        executor: Executor | None = None,
+        shard: ShardFilter | None = None,
+    ) -> None:
+        # 多个根目录合并为一次扫描：嵌套的根目录只遍历一次，结果统一比较
+        self._roots = collapse_roots([root_dir] if isinstance(root_dir, Path) else root_dir)
+        self._config = config
+        # 分片扫描只提取属于本分片的文件，其余文件仍计入“存在的文件”，不会被缓存维护清理
+        self._shard = shard
+        self._sink = sink or ScanSink()
+        self._executor = executor
+        self._resume = resume
+        self._pause_event = threading.Event()
+        self._pause_event.set()
+        self._stop_event = threading.Event()
+        self._token = CancellationToken(self._stop_event, self._pause_event)
+        self._last_partial_emit_time = 0.0
+        self._last_progress_emit_time = 0.0
+        self._last_progress_value: tuple[int, int] | None = None
+        self._last_task_emit_time = 0.0
+        self._last_task_text = ""
+
+    def request_pause(self) -> None:
+        self._pause_event.clear()
+        self._sink.on_status("任务已暂停")
+
+    def request_resume(self) -> None:
+        self._pause_event.set()
+        self._sink.on_status("任务继续执行")
+
+    def request_stop(self) -> None:
+        self._stop_event.set()
+        self._pause_event.set()
+        self._sink.on_status("正在终止任务...")
+
+    def is_paused(self) -> bool:
+        return not self._pause_event.is_set()
+
+    def _wait_if_paused(self) -> bool:
+        while not self._pause_event.is_set():
+            if self._stop_event.is_set():
+                return False
+            time.sleep(0.1)
+        return not self._stop_event.is_set()
+
+    def _assert_not_stopped(self) -> bool:
+        if self._stop_event.is_set():
+            self._sink.on_status("任务已终止")
+            self._sink.on_stopped()
+            return False
+        return True
+
+    def _maybe_emit_partial_groups(
+        self,
+        fingerprints: list[VideoFingerprint],
+        processed: int,
+        total: int,
+        *,
+        force: bool = False,
+    ) -> None:
+        if total <= 0:
+            return
+        if len(fingerprints) < 2:
+            return
+
+        batch_size = max(1, self._config.partial_result_batch_size)
+        if not force and processed % batch_size != 0:
+            return
+
+        now = time.monotonic()
+        min_interval = max(0.0, self._config.partial_result_min_interval_seconds)
+        if not force and now - self._last_partial_emit_time < min_interval:
+            return
+
+        groups = build_duplicate_groups(
+            fingerprints,
+            similarity_threshold=self._config.similarity_threshold,
+            duration_tolerance_seconds=self._config.duration_tolerance_seconds,
+        )
+        self._sink.on_partial_groups(groups, processed, total)
+        self._last_partial_emit_time = now
+
+    def _emit_progress(self, current: int, total: int, *, force: bool = False) -> None:
+        if total <= 0:
+            return
+
+        state = (current, total)
+        if not force and self._last_progress_value == state:
+            return
+
+        now = time.monotonic()
+        min_interval = max(0.0, self._config.progress_emit_min_interval_seconds)
+        if not force and current < total and now - self._last_progress_emit_time < min_interval:
+            return
+
+        self._sink.on_progress(current, total)
+        self._last_progress_value = state
+        self._last_progress_emit_time = now
+
+    def _emit_task(self, text: str, *, force: bool = False) -> None:
+        if not force and text == self._last_task_text:
+            return
+
+        now = time.monotonic()
+        min_interval = max(0.0, self._config.task_emit_min_interval_seconds)
+        if not force and now - self._last_task_emit_time < min_interval:
+            return
+
+        self._sink.on_task(text)
+        self._last_task_text = text
+        self._last_task_emit_time = now
+
+    def _load_checkpoint(
+        self,
+        db: FingerprintDatabase,
+        root_key: str,
+        config_hash: str,
+    ) -> ScanManifest | None:
+        if not self._config.scan_checkpoint_enabled or not self._resume:
+            return None
+        manifest = db.load_manifest(root_key, config_hash)
+        if manifest is None or not manifest.walk_complete:
+            # 目录遍历未完成的检查点不可信，重新遍历
+            return None
+        return manifest
+
+    def _resume_from_checkpoint(
+        self,
+        db: FingerprintDatabase,
+        manifest: ScanManifest,
+        fingerprints: list[VideoFingerprint],
+        pending_records: list[FileRecord],
+        aliases: dict[Path, Path],
+        batch_size: int,
+    ) -> int | None:
+        processed = 0
+        total = len(manifest.entries)
+        self._emit_task("读取检查点", force=True)
+        for batch_start in range(0, total, batch_size):
+            if not self._wait_if_paused():
+                self._assert_not_stopped()
+                return None
+
+            batch = manifest.entries[batch_start : batch_start + batch_size]
+            # 直接使用检查点里的签名，已完成的文件无需再次 stat
+            cached_map = db.get_cached_bulk(
+                [
+                    (entry.path, entry.mtime, entry.size_bytes)
+                    for entry in batch
+                    if entry.state in {MANIFEST_DONE, MANIFEST_PENDING}
+                ]
+            )
+            for entry in batch:
+                if entry.alias_of is not None:
+                    aliases[entry.path] = entry.alias_of
+                cached = cached_map.get(str(entry.path))
+                if cached is not None:
+                    fingerprints.append(cached.to_fingerprint())
+                    self._sink.on_fingerprint(fingerprints[-1])
+                    processed += 1
+                elif entry.state in {MANIFEST_DONE, MANIFEST_PENDING}:
+                    pending_records.append(FileRecord(entry.path, entry.mtime, entry.size_bytes))
+                else:
+                    processed += 1
+            self._emit_progress(processed, total)
+
+        self._sink.on_status(
+            f"检查点恢复完成：已完成 {processed} 个，剩余 {len(pending_records)} 个待处理"
+        )
+        return processed
+
+    def _record_failure(
+        self,
+        db: FingerprintDatabase,
+        source_path: Path,
+        error: BaseException,
+    ) -> None:
+        # 只记录确定性的解码失败，暂时性错误（网络盘掉线、权限、超时等）下次扫描重试
+        if not isinstance(error, VideoDecodeError):
+            return
+        signature = _read_signature(source_path)
+        if signature is None:
+            return
+        _, mtime, size_bytes = signature
+        db.record_failure(source_path, mtime, size_bytes, error)
+
+    def _run_cache_maintenance(self, db: FingerprintDatabase, existing_paths: set[str]) -> None:
+        self._sink.on_status("缓存维护中...")
+        self._emit_task("清理失效缓存并压缩数据库", force=True)
+        report = db.run_maintenance(
+            self._roots,
+            existing_paths=existing_paths,
+            max_age_days=self._config.cache_max_age_days,
+        )
+        size_mb = (report.after.db_bytes + report.after.wal_bytes) / (1024 * 1024)
+        self._sink.on_status(
+            f"缓存维护完成：清理失效 {report.pruned} 条，过期 {report.expired} 条，"
+            f"缓存 {report.after.row_count} 条 / {size_mb:.1f} MB，"
+            f"本次命中率 {report.after.hit_rate:.0%}"
+        )
+
+    def _create_memory_budget(self) -> MemoryBudget | None:
+        budget_mb = self._config.memory_budget_mb
+        if budget_mb < 0:
+            return None
+        if budget_mb == 0:
+            total = total_memory_bytes()
+            if total is None:
+                return None
+            budget_bytes = total // 2
+        else:
+            budget_bytes = budget_mb * 1024 * 1024
+        memory = MemoryBudget(budget_bytes)
+        self._emit_task(
+            f"内存预算: {budget_bytes // (1024 * 1024)} MB "
+            f"(起始占用 {memory.baseline_bytes // (1024 * 1024)} MB)",
+            force=True,
+        )
+        return memory
+
+    def _ingest_records(
+        self,
+        db: FingerprintDatabase,
+        records: list[FileRecord],
+        manifest_id: int | None,
+        fingerprints: list[VideoFingerprint],
+        pending: ExtractionScheduler,
+        processed: int,
+        total: int,
+        aliases: dict[Path, Path],
+    ) -> int:
+        # 遍历时已拿到 mtime/size，这里不再重复 stat
+        signatures = [
+            (record.path, record.mtime, record.size_bytes)
+            for record in records
+            if record.path not in aliases
+        ]
+        cached_map = db.get_cached_bulk(signatures)
+        failed_map = {} if self._config.retry_failed_files else db.get_failed_bulk(signatures)
+        known_failed = 0
+        manifest_entries: list[ManifestEntry] = []
+
+        for record in records:
+            key = str(record.path)
+            cached = cached_map.get(key)
+            if record.path in aliases:
+                # 链接与其指向的文件共用一次解码结果
+                state = MANIFEST_SKIPPED
+                processed += 1
+            elif cached is None and key in failed_map:
+                state = MANIFEST_FAILED
+                known_failed += 1
+                processed += 1
+            elif cached is None:
+                state = MANIFEST_PENDING
+                pending.add(record)
+            else:
+                state = MANIFEST_DONE
+                fingerprints.append(cached.to_fingerprint())
+                self._sink.on_fingerprint(fingerprints[-1])
+                processed += 1
+                self._maybe_emit_partial_groups(fingerprints, processed, total)
+            manifest_entries.append(
+                ManifestEntry(
+                    record.path,
+                    record.mtime,
+                    record.size_bytes,
+                    state,
+                    aliases.get(record.path),
+                )
+            )
+
+        if manifest_id is not None:
+            db.add_manifest_entries(manifest_id, manifest_entries)
+        if known_failed > 0:
+            self._sink.on_status(f"跳过此前解码失败的文件: {known_failed} 个")
+        self._emit_progress(processed, total)
+        return processed
+
+    def run(self) -> list[DuplicateGroup] | None:
+        # 正常结束返回分组结果，被终止时返回 None；异常直接抛给调用方
+        if not self._assert_not_stopped():
+            return None
+
+        cv2.setNumThreads(_compute_opencv_threads(self._config.performance_profile))
+        db = FingerprintDatabase(self._config.cache_db)
+        try:
+            return self._run_pipeline(db)
+        finally:
+            db.close()
+
+    def _run_pipeline(self, db: FingerprintDatabase) -> list[DuplicateGroup] | None:
+        profile = self._config.performance_profile
+        root_key = "\n".join(str(root) for root in self._roots)
+        if self._shard is not None:
+            root_key += f"\n#{self._shard.key}"
+        config_hash = _compute_config_hash(self._config)
+        manifest = self._load_checkpoint(db, root_key, config_hash)
+        manifest_id: int | None = None
+        fingerprints: list[VideoFingerprint] = []
+        pending = ExtractionScheduler(
+            group_by_device=self._config.device_scheduling_enabled,
+            path_limits=self._config.device_io_limits,
+            order=self._config.scan_order,
+        )
+        if self._config.scan_order == ORDER_LIKELY_DUPLICATES:
+            pending.note(db.iter_scheduling_hints(self._roots))
+        last_remaining_emit = 0.0
+        announced_queues = 0
+        seen_paths: set[str] = set()
+        alias_owners: dict[tuple[int, int] | str, Path] = {}
+        aliases: dict[Path, Path] = {}
+        processed = 0
+        total = 0
+        stat_batch_size = _compute_stat_batch_size(profile)
+        batch_pause_seconds = _compute_batch_pause_seconds(profile)
+        pending_limit = _compute_pending_limit(profile)
+        feed: BoundedFeed[FileRecord] | None = None
+        dir_indexes: dict[Path, DirectoryIndex] = {}
+
+        if manifest is not None:
+            manifest_id = manifest.id
+            total = len(manifest.entries)
+            seen_paths = {str(entry.path) for entry in manifest.entries}
+            self._sink.on_status(f"从检查点恢复：共 {total} 个视频文件")
+            self._emit_progress(0, total, force=True)
+            resumed_pending: list[FileRecord] = []
+            resumed = self._resume_from_checkpoint(
+                db,
+                manifest,
+                fingerprints,
+                resumed_pending,
+                aliases,
+                stat_batch_size,
+            )
+            if resumed is None:
+                return None
+            processed = resumed
+            for record in resumed_pending:
+                pending.add(record)
+            self._maybe_emit_partial_groups(fingerprints, processed, total, force=True)
+        else:
+            if self._config.scan_checkpoint_enabled:
+                manifest_id = db.create_manifest(root_key, config_hash)
+            scanner = VideoScanner(
+                self._config.supported_extensions,
+                max_workers=_compute_walker_workers(os.cpu_count() or 1, profile),
+            )
+            if self._config.directory_index_enabled:
+                # 重新扫描（不续扫）时丢弃旧索引，完整遍历一次以修正索引中的目录结构
+                dir_indexes = {
+                    root: (
+                        db.load_directory_index(root, _extensions_key(self._config))
+                        if self._resume
+                        else DirectoryIndex()
+                    )
+                    for root in self._roots
+                }
+            # 边遍历边校验缓存、边提取：队列有界，下游处理不过来时遍历线程会被阻塞
+            feed = BoundedFeed(
+                scanner.iter_roots(self._roots, dir_indexes),
+                pending_limit,
+            ).start()
+            self._sink.on_status("扫描目录中，发现的文件将立即开始处理...")
+            self._emit_task("递归扫描目录", force=True)
+
+        cpu_count = os.cpu_count() or 1
+        max_workers = _compute_fingerprint_workers(cpu_count, profile)
+        inflight_limit = _compute_inflight_limit(max_workers, profile)
+        concurrency: AdaptiveConcurrency | None = None
+        pool_size = max_workers
+        if self._config.adaptive_concurrency_enabled:
+            # 静态表只决定起点，之后按实测吞吐、CPU 和内存在上下限之间调整
+            concurrency = AdaptiveConcurrency(
+                max_workers,
+                1,
+                _compute_max_fingerprint_workers(cpu_count, profile),
+                inflight_multiplier=_compute_inflight_multiplier(profile),
+                cpu_ceiling=_compute_cpu_ceiling(profile),
+            )
+            pool_size = concurrency.maximum
+        yield_every, yield_sleep = _compute_yield_settings(profile)
+        yield_counter = 0
+        self._emit_task(
+            "指纹提取线程数: "
+            f"{max_workers} (档位: {profile}, "
+            f"并发窗口: {inflight_limit}, OpenCV线程: {cv2.getNumThreads()}"
+            + (f", 自适应上限: {pool_size}" if concurrency is not None else "")
+            + ")",
+            force=True,
+        )
+        memory = self._create_memory_budget()
+        throttle: CpuThrottle | None = None
+        if self._config.background_mode:
+            throttle = CpuThrottle(self._config.background_cpu_share)
+            self._emit_task(
+                "后台模式: 解码线程已降低 CPU/I/O 优先级，"
+                f"CPU 上限 {self._config.background_cpu_share:.0%}（机器空闲时不限）",
+                force=True,
+            )
+        reported_memory_waits = 0
+
+        budget = ExtractionBudget(
+            max_seconds=self._config.extraction_timeout_seconds,
+            max_frames=self._config.extraction_max_frames,
+            seconds_per_media_second=self._config.extraction_timeout_per_media_second,
+        )
+        watchdog = ExtractionWatchdog(
+            _compute_watchdog_seconds(self._config.extraction_timeout_seconds)
+        )
+        abandoned = 0
+        future_map: dict[Future[VideoFingerprint], Path] = {}
+        # 传入共享线程池时多个扫描共用解码线程，本扫描仍受自己的并发窗口限制
+        pool = self._executor or ThreadPoolExecutor(max_workers=pool_size)
+        try:
+            while True:
+                was_paused = self.is_paused()
+                pause_started = time.monotonic()
+                if not self._wait_if_paused():
+                    for future in future_map:
+                        future.cancel()
+                    self._assert_not_stopped()
+                    return None
+                # 进行中的提取在暂停期间停在采样点，暂停时长不应触发看门狗
+                if was_paused:
+                    watchdog.extend(time.monotonic() - pause_started)
+
+                if feed is not None and len(pending) < pending_limit:
+                    idle = not future_map and not pending
+                    records = feed.get_batch(stat_batch_size, timeout=0.2 if idle else 0.0)
+                    if records:
+                        seen_paths.update(str(record.path) for record in records)
+                    if records and self._shard is not None:
+                        records = [record for record in records if self._shard(record)]
+                    if records:
+                        total += len(records)
+                        aliases.update(split_aliases(records, alias_owners)[1])
+                        self._emit_task(f"发现并校验缓存: {total} 个文件")
+                        processed = self._ingest_records(
+                            db,
+                            records,
+                            manifest_id,
+                            fingerprints,
+                            pending,
+                            processed,
+                            total,
+                            aliases,
+                        )
+                        if batch_pause_seconds > 0:
+                            time.sleep(batch_pause_seconds)
+                    if feed.exhausted:
+                        feed = None
+                        if manifest_id is not None:
+                            db.complete_manifest_walk(manifest_id)
+                        for root, dir_index in dir_indexes.items():
+                            db.save_directory_index(
+                                root,
+                                dir_index,
+                                _extensions_key(self._config),
+                            )
+                        if dir_indexes:
+                            self._emit_task(
+                                "目录索引: 复用 "
+                                f"{sum(index.reused for index in dir_indexes.values())} 个目录，"
+                                "重新读取 "
+                                f"{sum(index.rescanned for index in dir_indexes.values())} 个目录",
+                                force=True,
+                            )
+                        self._sink.on_status(
+                            f"共发现 {total} 个视频文件，"
+                            f"{len(pending) + len(future_map)} 个待提取指纹"
+                        )
+                        self._emit_progress(processed, total, force=True)
+
+                if len(pending.queues) > announced_queues:
+                    announced_queues = len(pending.queues)
+                    self._emit_task(
+                        "I/O 队列: "
+                        + "，".join(
+                            f"{queue.label}({DEVICE_KIND_NAMES[queue.kind]}，"
+                            f"并发 {queue.limit or '不限'})"
+                            for queue in pending.queues
+                        ),
+                        force=True,
+                    )
+
+                while len(future_map) < inflight_limit:
+                    # 各设备都达到自身并发上限时暂不提交，等已有任务完成
+                    source_path = pending.pop()
+                    if source_path is None:
+                        break
+                    future = pool.submit(
+                        _timed_extract,
+                        watchdog,
+                        source_path,
+                        self._config.frame_interval_seconds,
+                        budget,
+                        self._token,
+                        concurrency,
+                        self._config.readahead_window_mb * 1024 * 1024,
+                        memory,
+                        throttle,
+                    )
+                    future_map[future] = source_path
+
+                if not future_map:
+                    if feed is None and not pending:
+                        break
+                    continue
+
+                done, _ = wait(
+                    set(future_map.keys()),
+                    timeout=0.05 if feed is not None else 0.2,
+                    return_when=FIRST_COMPLETED,
+                )
+
+                stuck = {path for path, _ in watchdog.expired()}
+                stuck_futures = [
+                    future
+                    for future, path in future_map.items()
+                    if path in stuck and future not in done
+                ]
+                for future in stuck_futures:
+                    source_path = future_map.pop(future)
+                    pending.release(source_path)
+                    elapsed = watchdog.mark_finished(source_path)
+                    if concurrency is not None:
+                        concurrency.abandon(source_path)
+                    if memory is not None:
+                        memory.abandon(source_path)
+                    abandoned += 1
+                    self._sink.on_status(
+                        f"提取超时已放弃: {source_path.name} (耗时 {elapsed:.1f} 秒)"
+                    )
+                    # 超时可能只是机器繁忙或网络盘慢，不写入失败记录，下次扫描重试
+                    if manifest_id is not None:
+                        db.set_manifest_state(manifest_id, source_path, MANIFEST_FAILED)
+                    processed += 1
+                    self._emit_progress(processed, total)
+                if stuck_futures and self._executor is None:
+                    # 卡住的线程无法强制结束，换新线程池让其余文件继续满速处理；
+                    # 共享线程池不属于本扫描，只能放弃任务
+                    pool.shutdown(wait=False)
+                    pool = ThreadPoolExecutor(max_workers=pool_size)
+
+                for future in done:
+                    source_path = future_map.pop(future)
+                    pending.release(source_path)
+                    if self._stop_event.is_set():
+                        break
+
+                    self._emit_task(f"提取指纹: {source_path.name}")
+                    try:
+                        fp = future.result()
+                    except ExtractionTimeoutError as exc:
+                        self._sink.on_status(
+                            f"提取超时: {source_path.name} (耗时 {exc.elapsed_seconds:.1f} 秒)"
+                        )
+                        state = MANIFEST_FAILED
+                    except Exception as exc:  # noqa: BLE001
+                        self._sink.on_status(f"跳过失败文件: {source_path.name} ({exc})")
+                        self._record_failure(db, source_path, exc)
+                        state = MANIFEST_FAILED
+                    else:
+                        state = MANIFEST_DONE
+                        try:
+                            stat = source_path.stat()
+                        except OSError as exc:
+                            self._sink.on_status(f"跳过缓存写入: {source_path.name} ({exc})")
+                            state = MANIFEST_SKIPPED
+                        else:
+                            db.upsert(fp, stat.st_mtime)
+                            fingerprints.append(fp)
+                            self._sink.on_fingerprint(fp)
+                    if manifest_id is not None:
+                        db.set_manifest_state(manifest_id, source_path, state)
+
+                    processed += 1
+                    self._emit_progress(processed, total)
+                    self._maybe_emit_partial_groups(fingerprints, processed, total)
+                    remaining = pending.remaining_seconds()
+                    now = time.monotonic()
+                    if remaining is not None and now - last_remaining_emit >= 1.0:
+                        self._sink.on_remaining(pending.fraction_done, remaining)
+                        last_remaining_emit = now
+
+                    if yield_every > 0 and yield_sleep > 0:
+                        yield_counter += 1
+                        if yield_counter >= yield_every:
+                            time.sleep(yield_sleep)
+                            yield_counter = 0
+
+                if memory is not None and done:
+                    rss = memory.observe()
+                    if memory.waits > reported_memory_waits and rss is not None:
+                        reported_memory_waits = memory.waits
+                        self._emit_task(
+                            f"内存预算限制: 当前 {rss // (1024 * 1024)} MB / "
+                            f"预算 {memory.budget_bytes // (1024 * 1024)} MB，"
+                            f"累计等待 {memory.waits} 次"
+                        )
+
+                if concurrency is not None and concurrency.adjust():
+                    inflight_limit = concurrency.inflight_limit
+                    sample = concurrency.last_sample
+                    self._emit_task(
+                        f"自适应并发: 解码线程 {concurrency.limit}，"
+                        f"并发窗口 {inflight_limit} "
+                        f"(吞吐 {concurrency.throughput or 0:.2f} 个/秒，"
+                        f"单文件 {concurrency.decode_seconds or 0:.1f} 秒，"
+                        f"CPU {sample.cpu_busy if sample else 0:.0%}，"
+                        f"I/O 等待 {sample.io_wait if sample else 0:.0%})",
+                        force=True,
+                    )
+        finally:
+            if feed is not None:
+                feed.close()
+            if self._executor is None:
+                pool.shutdown(wait=abandoned == 0, cancel_futures=True)
+            else:
+                for future in future_map:
+                    future.cancel()
+
+        db.flush()
+        if manifest_id is not None:
+            db.delete_manifest(manifest_id)
+        if self._config.cache_maintenance_enabled and not self._stop_event.is_set():
+            self._run_cache_maintenance(db, seen_paths)
+
+        if not self._assert_not_stopped():
+            return None
+
+        self._emit_progress(total, total, force=True)
+        self._maybe_emit_partial_groups(fingerprints, processed, total, force=True)
+
+        self._sink.on_status("正在进行相似度比较...")
+        self._emit_task("比较指纹并聚类分组", force=True)
+        groups: list[DuplicateGroup] = build_duplicate_groups(
+            fingerprints,
+            similarity_threshold=self._config.similarity_threshold,
+            duration_tolerance_seconds=self._config.duration_tolerance_seconds,
+            on_group=self._sink.on_group,
+        )
+        alias_groups = make_alias_groups(fingerprints, aliases)
+        for group in alias_groups:
+            self._sink.on_group(group)
+        if alias_groups:
+            self._sink.on_status(
+                f"发现 {len(groups)} 组重复/近似视频，另有 {len(alias_groups)} 组为同一文件的链接"
+            )
+        else:
+            self._sink.on_status(f"发现 {len(groups)} 组重复/近似视频")
+        groups.extend(alias_groups)
+        self._sink.on_finished(groups)
+        return groups
@@ -1,110 +1,46 @@
-import os
-import threading
-import time
-from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
 
-import cv2
 from PySide6.QtCore import QObject, Signal
 
 from ..config import AppConfig
 from ..core.comparator import DuplicateGroup
-from ..core.database import FingerprintDatabase
-from ..core.fingerprint import VideoFingerprint, extract_fingerprint
-from ..core.scanner import VideoScanner
-from .compare_worker import build_duplicate_groups
+from .scan_engine import ScanEngine, ScanSink
 
 
-def _read_signature(path: Path) -> tuple[Path, float, int] | None:
-    try:
-        stat = path.stat()
-    except OSError:
-        return None
-    return (path, stat.st_mtime, stat.st_size)
+class _SignalSink(ScanSink):
+    def __init__(self, worker: "ScanWorker") -> None:
+        self._worker = worker
 
+    def on_progress(self, current: int, total: int) -> None:
+        self._worker.progress.emit(current, total)
 
-def _compute_fingerprint_workers(cpu_count: int, profile: str) -> int:
-    cpu = max(1, cpu_count)
-    if profile == "low":
-        return 1
-    if profile == "high":
-        # 控制峰值，避免线程过多导致瞬时卡顿
-        return max(2, min(6, cpu // 2))
-    # medium: 保守策略，视频解码有内部多线程，worker 不宜过多
-    return max(1, min(3, cpu // 6))
+    def on_remaining(self, fraction: float, remaining_seconds: float) -> None:
+        self._worker.remaining.emit(fraction, remaining_seconds)
 
+    def on_status(self, text: str) -> None:
+        self._worker.status.emit(text)
 
-def _compute_metadata_workers(cpu_count: int, profile: str, total_files: int) -> int:
-    cpu = max(1, cpu_count)
-    base_by_profile = {
-        "low": 2,
-        "medium": 2,
-        "high": 4,
-    }
-    cap_by_profile = {
-        "low": 3,
-        "medium": 4,
-        "high": max(5, cpu // 3),
-    }
+    def on_task(self, text: str) -> None:
+        self._worker.current_task.emit(text)
 
-    if total_files < 500:
-        scale = 1
-    elif total_files < 5000:
-        scale = 2
-    else:
-        scale = 3
-
-    base = base_by_profile.get(profile, 4)
-    cap = cap_by_profile.get(profile, 8)
-    planned = base + scale - 1
-    return max(1, min(planned, cap, cpu, max(1, total_files)))
-
-
-def _compute_opencv_threads(profile: str) -> int:
-    if profile in {"low", "medium"}:
-        return 1
-    return 2
-
-
-def _compute_inflight_limit(max_workers: int, profile: str) -> int:
-    multiplier_by_profile = {
-        "low": 1,
-        "medium": 2,
-        "high": 3,
-    }
-    multiplier = multiplier_by_profile.get(profile, 2)
-    return max_workers * multiplier
-
-
-def _compute_stat_batch_size(profile: str) -> int:
-    batch_by_profile = {
-        "low": 80,
-        "medium": 200,
-        "high": 400,
-    }
-    return batch_by_profile.get(profile, 200)
-
-
-def _compute_batch_pause_seconds(profile: str) -> float:
-    pause_by_profile = {
-        "low": 0.02,
-        "medium": 0.01,
-        "high": 0.0,
-    }
-    return pause_by_profile.get(profile, 0.01)
+    def on_partial_groups(
+        self,
+        groups: list[DuplicateGroup],
+        processed: int,
+        total: int,
+    ) -> None:
+        self._worker.partial_groups.emit(groups, processed, total)
 
+    def on_finished(self, groups: list[DuplicateGroup]) -> None:
+        self._worker.finished.emit(groups)
 
-def _compute_yield_settings(profile: str) -> tuple[int, float]:
-    settings = {
-        "low": (2, 0.03),
-        "medium": (4, 0.01),
-        "high": (0, 0.0),
-    }
-    return settings.get(profile, (4, 0.01))
+    def on_stopped(self) -> None:
+        self._worker.stopped.emit()
 
 
 class ScanWorker(QObject):
     progress = Signal(int, int)
+    remaining = Signal(float, float)
     status = Signal(str)
     current_task = Signal(str)
     partial_groups = Signal(list, int, int)
@@ -112,299 +48,31 @@ class ScanWorker(QObject):
     stopped = Signal()
     failed = Signal(str)
 
-    def __init__(self, root_dir: Path, config: AppConfig) -> None:
+    def __init__(
+        self,
+        root_dir: Path | list[Path],
+        config: AppConfig,
+        *,
+        resume: bool = True,
+    ) -> None:
         super().__init__()
-        self._root_dir = root_dir
-        self._config = config
-        self._pause_event = threading.Event()
-        self._pause_event.set()
-        self._stop_event = threading.Event()
-        self._last_partial_emit_time = 0.0
-        self._last_progress_emit_time = 0.0
-        self._last_progress_value: tuple[int, int] | None = None
-        self._last_task_emit_time = 0.0
-        self._last_task_text = ""
+        # 扫描流程全部在 ScanEngine 中，这里只把事件转成 Qt 信号
+        self._engine = ScanEngine(root_dir, config, _SignalSink(self), resume=resume)
 
     def request_pause(self) -> None:
-        self._pause_event.clear()
-        self.status.emit("任务已暂停")
+        self._engine.request_pause()
 
     def request_resume(self) -> None:
-        self._pause_event.set()
-        self.status.emit("任务继续执行")
+        self._engine.request_resume()
 
     def request_stop(self) -> None:
-        self._stop_event.set()
-        self._pause_event.set()
-        self.status.emit("正在终止任务...")
+        self._engine.request_stop()
 
     def is_paused(self) -> bool:
-        return not self._pause_event.is_set()
-
-    def _wait_if_paused(self) -> bool:
-        while not self._pause_event.is_set():
-            if self._stop_event.is_set():
-                return False
-            time.sleep(0.1)
-        return not self._stop_event.is_set()
-
-    def _assert_not_stopped(self) -> bool:
-        if self._stop_event.is_set():
-            self.status.emit("任务已终止")
-            self.stopped.emit()
-            return False
-        return True
-
-    def _maybe_emit_partial_groups(
-        self,
-        fingerprints: list[VideoFingerprint],
-        processed: int,
-        total: int,
-        *,
-        force: bool = False,
-    ) -> None:
-        if total <= 0:
-            return
-        if len(fingerprints) < 2:
-            return
-
-        batch_size = max(1, self._config.partial_result_batch_size)
-        if not force and processed % batch_size != 0:
-            return
-
-        now = time.monotonic()
-        min_interval = max(0.0, self._config.partial_result_min_interval_seconds)
-        if not force and now - self._last_partial_emit_time < min_interval:
-            return
-
-        groups = build_duplicate_groups(
-            fingerprints,
-            similarity_threshold=self._config.similarity_threshold,
-            duration_tolerance_seconds=self._config.duration_tolerance_seconds,
-        )
-        self.partial_groups.emit(groups, processed, total)
-        self._last_partial_emit_time = now
-
-    def _emit_progress(self, current: int, total: int, *, force: bool = False) -> None:
-        if total <= 0:
-            return
-
-        state = (current, total)
-        if not force and self._last_progress_value == state:
-            return
-
-        now = time.monotonic()
-        min_interval = max(0.0, self._config.progress_emit_min_interval_seconds)
-        if not force and current < total and now - self._last_progress_emit_time < min_interval:
-            return
-
-        self.progress.emit(current, total)
-        self._last_progress_value = state
-        self._last_progress_emit_time = now
-
-    def _emit_task(self, text: str, *, force: bool = False) -> None:
-        if not force and text == self._last_task_text:
-            return
-
-        now = time.monotonic()
-        min_interval = max(0.0, self._config.task_emit_min_interval_seconds)
-        if not force and now - self._last_task_emit_time < min_interval:
-            return
-
-        self.current_task.emit(text)
-        self._last_task_text = text
-        self._last_task_emit_time = now
+        return self._engine.is_paused()
 
     def run(self) -> None:
         try:
-            if not self._assert_not_stopped():
-                return
-
-            self.status.emit("扫描目录中...")
-            self._emit_task("递归扫描目录", force=True)
-            cv2.setNumThreads(_compute_opencv_threads(self._config.performance_profile))
-            scanner = VideoScanner(self._config.supported_extensions)
-            files = scanner.scan(self._root_dir)
-            total = len(files)
-            self.status.emit(f"共发现 {total} 个视频文件")
-            self._emit_progress(0, total, force=True)
-
-            if not self._assert_not_stopped():
-                return
-
-            db = FingerprintDatabase(self._config.cache_db)
-            fingerprints: list[VideoFingerprint] = []
-            pending_paths: list[Path] = []
-            processed = 0
-            stat_batch_size = _compute_stat_batch_size(self._config.performance_profile)
-            batch_pause_seconds = _compute_batch_pause_seconds(self._config.performance_profile)
-            metadata_workers = _compute_metadata_workers(
-                os.cpu_count() or 1,
-                self._config.performance_profile,
-                total,
-            )
-
-            self.status.emit("缓存校验中...")
-            with ThreadPoolExecutor(max_workers=metadata_workers) as stat_pool:
-                for batch_start in range(0, total, stat_batch_size):
-                    if not self._wait_if_paused() or not self._assert_not_stopped():
-                        db.close()
-                        return
-
-                    batch = files[batch_start : batch_start + stat_batch_size]
-                    batch_end = min(total, batch_start + len(batch))
-                    self._emit_task(f"缓存校验: {batch_end}/{total}")
-
-                    signatures = [
-                        sig for sig in stat_pool.map(_read_signature, batch) if sig is not None
-                    ]
-                    cached_map = db.get_cached_bulk(signatures)
-
-                    for file_path in batch:
-                        if not self._wait_if_paused() or not self._assert_not_stopped():
-                            db.close()
-                            return
-
-                        cached = cached_map.get(str(file_path))
-                        if cached is None:
-                            pending_paths.append(file_path)
-                        else:
-                            fingerprints.append(
-                                VideoFingerprint(
-                                    path=cached.path,
-                                    size_bytes=cached.size_bytes,
-                                    duration_seconds=cached.duration_seconds,
-                                    width=cached.width,
-                                    height=cached.height,
-                                    bitrate=cached.bitrate,
-                                    d_hash=cached.d_hash,
-                                    p_hash=cached.p_hash,
-                                )
-                            )
-                            processed += 1
-                            self._emit_progress(processed, total)
-                            self._maybe_emit_partial_groups(fingerprints, processed, total)
-
-                    missing = len(batch) - len(signatures)
-                    if missing > 0:
-                        processed += missing
-                        self._emit_progress(processed, total)
-                        self.status.emit(f"跳过无法读取元数据文件: {missing} 个")
-
-                    if batch_pause_seconds > 0:
-                        time.sleep(batch_pause_seconds)
-
-            self.status.emit(f"开始多线程提取指纹: {len(pending_paths)} 个文件待处理")
-            if pending_paths:
-                max_workers = _compute_fingerprint_workers(
-                    os.cpu_count() or 1,
-                    self._config.performance_profile,
-                )
-                max_workers = min(max_workers, len(pending_paths))
-                inflight_limit = _compute_inflight_limit(
-                    max_workers,
-                    self._config.performance_profile,
-                )
-                yield_every, yield_sleep = _compute_yield_settings(
-                    self._config.performance_profile,
-                )
-                yield_counter = 0
-                self._emit_task(
-                    "指纹提取线程数: "
-                    f"{max_workers} (档位: {self._config.performance_profile}, "
-                    f"并发窗口: {inflight_limit}, OpenCV线程: {cv2.getNumThreads()})",
-                    force=True,
-                )
-
-                with ThreadPoolExecutor(max_workers=max_workers) as pool:
-                    pending_iter = iter(pending_paths)
-                    future_map: dict[Future[VideoFingerprint], Path] = {}
-
-                    def submit_next() -> bool:
-                        try:
-                            source_path = next(pending_iter)
-                        except StopIteration:
-                            return False
-                        future = pool.submit(
-                            extract_fingerprint,
-                            source_path,
-                            self._config.frame_interval_seconds,
-                        )
-                        future_map[future] = source_path
-                        return True
-
-                    for _ in range(min(inflight_limit, len(pending_paths))):
-                        submit_next()
-
-                    while future_map:
-                        if not self._wait_if_paused():
-                            for future in future_map:
-                                future.cancel()
-                            db.close()
-                            self.stopped.emit()
-                            return
-
-                        done, _ = wait(
-                            set(future_map.keys()),
-                            timeout=0.2,
-                            return_when=FIRST_COMPLETED,
-                        )
-                        if not done:
-                            continue
-
-                        for future in done:
-                            source_path = future_map.pop(future)
-                            if self._stop_event.is_set():
-                                for remaining in future_map:
-                                    remaining.cancel()
-                                db.close()
-                                self.stopped.emit()
-                                return
-
-                            self._emit_task(f"提取指纹: {source_path.name}")
-                            try:
-                                fp = future.result()
-                            except Exception as exc:  # noqa: BLE001
-                                self.status.emit(f"跳过失败文件: {source_path.name} ({exc})")
-                            else:
-                                try:
-                                    stat = source_path.stat()
-                                except OSError as exc:
-                                    self.status.emit(f"跳过缓存写入: {source_path.name} ({exc})")
-                                else:
-                                    db.upsert(fp, stat.st_mtime)
-                                    fingerprints.append(fp)
-
-                            processed += 1
-                            self._emit_progress(processed, total)
-                            self._maybe_emit_partial_groups(fingerprints, processed, total)
-
-                            if yield_every > 0 and yield_sleep > 0:
-                                yield_counter += 1
-                                if yield_counter >= yield_every:
-                                    time.sleep(yield_sleep)
-                                    yield_counter = 0
-
-                            while len(future_map) < inflight_limit and submit_next():
-                                continue
-
-            db.flush()
-            db.close()
-
-            if not self._assert_not_stopped():
-                return
-
-            self._emit_progress(total, total, force=True)
-            self._maybe_emit_partial_groups(fingerprints, processed, total, force=True)
-
-            self.status.emit("正在进行相似度比较...")
-            self._emit_task("比较指纹并聚类分组", force=True)
-            groups: list[DuplicateGroup] = build_duplicate_groups(
-                fingerprints,
-                similarity_threshold=self._config.similarity_threshold,
-                duration_tolerance_seconds=self._config.duration_tolerance_seconds,
-            )
-            self.status.emit(f"发现 {len(groups)} 组重复/近似视频")
-            self.finished.emit(groups)
+            self._engine.run()
         except Exception as exc:  # noqa: BLE001
             self.failed.emit(str(exc))
@@ -0,0 +1,98 @@
+# 各性能档位的并发与节流参数；不依赖 Qt，命令行入口同样使用
+
+
+def _compute_fingerprint_workers(cpu_count: int, profile: str) -> int:
+    cpu = max(1, cpu_count)
+    if profile == "low":
+        return 1
+    if profile == "high":
+        # 控制峰值，避免线程过多导致瞬时卡顿
+        return max(2, min(6, cpu // 2))
+    # medium: 保守策略，视频解码有内部多线程，worker 不宜过多
+    return max(1, min(3, cpu // 6))
+
+
+def _compute_max_fingerprint_workers(cpu_count: int, profile: str) -> int:
+    # 自适应调整的上限；静态表的取值只作为起点
+    cpu = max(1, cpu_count)
+    if profile == "low":
+        return max(1, min(2, cpu // 4))
+    if profile == "high":
+        return max(2, cpu)
+    return max(1, cpu // 2)
+
+
+def _compute_cpu_ceiling(profile: str) -> float:
+    ceiling_by_profile = {
+        "low": 0.5,
+        "medium": 0.75,
+        "high": 0.95,
+    }
+    return ceiling_by_profile.get(profile, 0.75)
+
+
+def _compute_walker_workers(cpu_count: int, profile: str) -> int:
+    # 目录遍历以等待 I/O 为主，NAS 上并发越高越能掩盖往返延迟
+    cpu = max(1, cpu_count)
+    workers_by_profile = {
+        "low": 2,
+        "medium": 4,
+        "high": max(8, min(16, cpu)),
+    }
+    return workers_by_profile.get(profile, 4)
+
+
+def _compute_opencv_threads(profile: str) -> int:
+    if profile in {"low", "medium"}:
+        return 1
+    return 2
+
+
+def _compute_inflight_multiplier(profile: str) -> int:
+    multiplier_by_profile = {
+        "low": 1,
+        "medium": 2,
+        "high": 3,
+    }
+    return multiplier_by_profile.get(profile, 2)
+
+
+def _compute_inflight_limit(max_workers: int, profile: str) -> int:
+    return max_workers * _compute_inflight_multiplier(profile)
+
+
+def _compute_stat_batch_size(profile: str) -> int:
+    batch_by_profile = {
+        "low": 80,
+        "medium": 200,
+        "high": 400,
+    }
+    return batch_by_profile.get(profile, 200)
+
+
+def _compute_pending_limit(profile: str) -> int:
+    # 待提取队列上限，超过后暂停遍历，避免超大目录一次性堆积在内存中
+    limit_by_profile = {
+        "low": 2000,
+        "medium": 5000,
+        "high": 10000,
+    }
+    return limit_by_profile.get(profile, 5000)
+
+
+def _compute_batch_pause_seconds(profile: str) -> float:
+    pause_by_profile = {
+        "low": 0.02,
+        "medium": 0.01,
+        "high": 0.0,
+    }
+    return pause_by_profile.get(profile, 0.01)
+
+
+def _compute_yield_settings(profile: str) -> tuple[int, float]:
+    settings = {
+        "low": (2, 0.03),
+        "medium": (4, 0.01),
+        "high": (0, 0.0),
+    }
+    return settings.get(profile, (4, 0.01))
@@ -0,0 +1,203 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+
+import cv2
+from PySide6.QtCore import QObject, Signal
+
+from ..config import AppConfig
+from ..core.cancellation import CancellationToken, ExtractionCancelledError
+from ..core.comparator import make_group
+from ..core.database import FingerprintDatabase
+from ..core.fingerprint import ExtractionBudget, ExtractionTimeoutError, VideoFingerprint
+from ..core.index import FingerprintIndex
+from ..core.library import library_snapshot_path, load_library_index
+from ..core.scanner import FileRecord
+from ..core.watchdog import ExtractionWatchdog
+from ..core.watcher import StabilityTracker, create_watcher
+from ..utils.video_info import VideoDecodeError
+from .scan_engine import _compute_watchdog_seconds, _timed_extract
+from .tuning import _compute_opencv_threads
+
+
+class WatchWorker(QObject):
+    status = Signal(str)
+    current_task = Signal(str)
+    new_groups = Signal(list)
+    stopped = Signal()
+    failed = Signal(str)
+
+    def __init__(self, root_dir: Path, config: AppConfig) -> None:
+        super().__init__()
+        self._root_dir = root_dir
+        self._config = config
+        self._pause_event = threading.Event()
+        self._pause_event.set()
+        self._stop_event = threading.Event()
+        self._token = CancellationToken(self._stop_event, self._pause_event)
+        self._watchdog = ExtractionWatchdog(
+            _compute_watchdog_seconds(config.extraction_timeout_seconds)
+        )
+        # 提取放到单独的线程里，卡死在单次 read() 上（例如仍在写入的文件）时由看门狗放弃
+        self._pool: ThreadPoolExecutor | None = None
+
+    def request_pause(self) -> None:
+        self._pause_event.clear()
+        self.status.emit("监控已暂停")
+
+    def request_resume(self) -> None:
+        self._pause_event.set()
+        self.status.emit("监控继续")
+
+    def request_stop(self) -> None:
+        self._stop_event.set()
+        self._pause_event.set()
+        self.status.emit("正在停止监控...")
+
+    def is_paused(self) -> bool:
+        return not self._pause_event.is_set()
+
+    def _wait_if_paused(self) -> bool:
+        while not self._pause_event.is_set():
+            if self._stop_event.is_set():
+                return False
+            time.sleep(0.1)
+        return not self._stop_event.is_set()
+
+    def run(self) -> None:
+        try:
+            cv2.setNumThreads(_compute_opencv_threads(self._config.performance_profile))
+            db = FingerprintDatabase(self._config.cache_db)
+            try:
+                self._watch(db)
+            finally:
+                db.close()
+        except Exception as exc:  # noqa: BLE001
+            self.failed.emit(str(exc))
+
+    def _watch(self, db: FingerprintDatabase) -> None:
+        self.status.emit("加载已缓存的指纹库...")
+        # 与比对模式共用整个缓存库的持久化检索索引，启动时只增量合并新增的行
+        index = load_library_index(db, [], library_snapshot_path(self._config.cache_db, []))
+
+        watcher = create_watcher(
+            self._root_dir,
+            self._config.supported_extensions,
+            self._config.watch_poll_interval_seconds,
+        )
+        tracker = StabilityTracker(
+            self._config.supported_extensions,
+            self._config.watch_settle_seconds,
+        )
+        budget = ExtractionBudget(
+            max_seconds=self._config.extraction_timeout_seconds,
+            max_frames=self._config.extraction_max_frames,
+            seconds_per_media_second=self._config.extraction_timeout_per_media_second,
+        )
+        self.status.emit(f"监控中：{self._root_dir}（指纹库 {len(index)} 条）")
+        self.current_task.emit(f"监控方式: {type(watcher).__name__}")
+        reported_skips = 0
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        try:
+            while True:
+                if not self._wait_if_paused():
+                    self.status.emit("监控已停止")
+                    self.stopped.emit()
+                    return
+
+                for path in watcher.poll(timeout=0.5):
+                    tracker.touch(path)
+                for skipped in watcher.skipped_directories[reported_skips:]:
+                    self.status.emit(f"无法监听目录，已跳过: {skipped}")
+                reported_skips = len(watcher.skipped_directories)
+                # 文件仍在写入时大小/mtime 会变化，稳定一段时间后才提取
+                stable, removed = tracker.poll()
+                for path in removed:
+                    index.remove(path)
+                for record in stable:
+                    if self._stop_event.is_set():
+                        break
+                    self._process(db, index, record, budget)
+                db.flush()
+        finally:
+            watcher.close()
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _process(
+        self,
+        db: FingerprintDatabase,
+        index: FingerprintIndex,
+        record: FileRecord,
+        budget: ExtractionBudget,
+    ) -> None:
+        fp = self._load_or_extract(db, record, budget)
+        if fp is None:
+            return
+
+        matches = index.query(
+            fp,
+            similarity_threshold=self._config.similarity_threshold,
+            duration_tolerance_seconds=self._config.duration_tolerance_seconds,
+        )
+        index.add(fp)
+        if not matches:
+            self.current_task.emit(f"新文件无重复: {record.path.name}")
+            return
+
+        group = make_group(
+            [fp, *(item for item, _ in matches)],
+            min(similarity for _, similarity in matches),
+        )
+        self.status.emit(f"发现重复: {record.path.name} 与 {len(matches)} 个已有文件相似")
+        self.new_groups.emit([group])
+
+    def _load_or_extract(
+        self,
+        db: FingerprintDatabase,
+        record: FileRecord,
+        budget: ExtractionBudget,
+    ) -> VideoFingerprint | None:
+        cached = db.get_cached(record.path, record.mtime, record.size_bytes)
+        if cached is not None:
+            return cached.to_fingerprint()
+
+        signature = (record.path, record.mtime, record.size_bytes)
+        if not self._config.retry_failed_files and db.get_failed_bulk([signature]):
+            return None
+
+        self.current_task.emit(f"提取指纹: {record.path.name}")
+        future = self._pool.submit(
+            _timed_extract,
+            self._watchdog,
+            record.path,
+            self._config.frame_interval_seconds,
+            budget,
+            self._token,
+            readahead_bytes=self._config.readahead_window_mb * 1024 * 1024,
+        )
+        while not wait([future], timeout=0.2).done:
+            if self._stop_event.is_set() or any(
+                key == record.path for key, _ in self._watchdog.expired()
+            ):
+                # 卡住的线程无法强制结束，换新线程继续监控；超时不写入失败记录，下次重试
+                elapsed = self._watchdog.mark_finished(record.path)
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = ThreadPoolExecutor(max_workers=1)
+                if not self._stop_event.is_set():
+                    self.status.emit(f"提取超时已放弃: {record.path.name} (耗时 {elapsed:.1f} 秒)")
+                return None
+        try:
+            fp = future.result()
+        except ExtractionCancelledError:
+            return None
+        except ExtractionTimeoutError as exc:
+            self.status.emit(f"提取超时: {record.path.name} (耗时 {exc.elapsed_seconds:.1f} 秒)")
+            return None
+        except Exception as exc:  # noqa: BLE001
+            self.status.emit(f"跳过失败文件: {record.path.name} ({exc})")
+            if isinstance(exc, VideoDecodeError):
+                db.record_failure(record.path, record.mtime, record.size_bytes, exc)
+            return None
+        db.upsert(fp, record.mtime)
+        return fp
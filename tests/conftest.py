@@ -1,7 +1,26 @@
 import sys
 from pathlib import Path
 
+import cv2
+import numpy as np
+import pytest
+
 
 ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def make_video():
+    def _make(path: Path, frames: int = 30, fps: float = 10.0, seed: int = 0) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, (64, 48))
+        for idx in range(frames):
+            frame = np.full((48, 64, 3), (idx * 8 + seed * 40) % 256, dtype=np.uint8)
+            frame[:, : ((idx + seed * 7) % 64)] = 255
+            writer.write(frame)
+        writer.release()
+        return path
+
+    return _make
@@ -0,0 +1,59 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from src.config import AppConfig
+from src.workers.async_scan import scan_async
+
+
+def _config(tmp_path: Path) -> AppConfig:
+    config = AppConfig(cache_db=tmp_path / "cache.sqlite3", frame_interval_seconds=1)
+    config.supported_extensions = {".avi"}
+    return config
+
+
+def test_scan_async_yields_fingerprints_and_groups(tmp_path: Path, make_video) -> None:
+    make_video(tmp_path / "videos" / "a.avi")
+    make_video(tmp_path / "videos" / "copy" / "a.avi")
+
+    async def collect() -> list:
+        with ThreadPoolExecutor(max_workers=2) as shared:
+            return [
+                event
+                async for event in scan_async(
+                    tmp_path / "videos",
+                    _config(tmp_path),
+                    extract_executor=shared,
+                )
+            ]
+
+    events = asyncio.run(collect())
+
+    assert len([event for event in events if event.kind == "fingerprint"]) == 2
+    assert events[-1].kind == "finished"
+    assert len(events[-1].payload[0]) == 1
+
+
+def test_scan_async_stops_engine_on_task_cancellation(tmp_path: Path, make_video) -> None:
+    for idx in range(6):
+        make_video(tmp_path / "videos" / f"{idx}.avi", frames=60, seed=idx)
+
+    async def consume(seen: list) -> None:
+        async for event in scan_async(tmp_path / "videos", _config(tmp_path)):
+            seen.append(event)
+
+    async def main() -> list:
+        seen: list = []
+        task = asyncio.create_task(consume(seen))
+        while not seen:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return seen
+
+    seen = asyncio.run(main())
+
+    assert all(event.kind != "finished" for event in seen)
@@ -0,0 +1,98 @@
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from src.config import AppConfig
+from src.core.background import CpuThrottle, lower_current_thread_priority
+from src.core.cancellation import CancellationToken
+from src.core.concurrency import ResourceSample, ResourceSampler
+from src.workers.scan_engine import ScanEngine
+
+
+class _FakeSampler(ResourceSampler):
+    def __init__(self, cpu_busy: float, process_busy: float) -> None:
+        super().__init__()
+        self._sample = ResourceSample(cpu_busy, 0.0, None, process_busy)
+
+    @property
+    def system_wide(self) -> bool:
+        return True
+
+    def sample(self) -> ResourceSample:
+        return self._sample
+
+
+def _throttle(sampler: ResourceSampler, now: list[float], cpu: list[float], slept: list[float]):
+    return CpuThrottle(
+        0.5,
+        check_interval_seconds=0.0,
+        sampler=sampler,
+        clock=lambda: now[0],
+        cpu_time=lambda: cpu[0],
+        sleep=slept.append,
+    )
+
+
+def test_throttle_sleeps_when_cpu_share_exceeded(monkeypatch) -> None:
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    now, cpu, slept = [0.0], [0.0], []
+    # 其他进程占用 40%，机器不空闲
+    throttle = _throttle(_FakeSampler(0.9, 0.5), now, cpu, slept)
+
+    # 上限 0.5 × 2 核 = 每秒 1 CPU 秒；1 秒内用了 1.2 CPU 秒，透支 0.2
+    now[0], cpu[0] = 1.0, 1.2
+    assert throttle.throttle() == pytest.approx(0.2)
+    assert slept == [pytest.approx(0.2)]
+
+    now[0], cpu[0] = 2.2, 2.0
+    assert throttle.throttle() == 0.0
+
+
+def test_throttle_lifts_limit_when_machine_is_idle(monkeypatch) -> None:
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    now, cpu, slept = [0.0], [0.0], []
+    throttle = _throttle(_FakeSampler(0.95, 0.9), now, cpu, slept)
+
+    now[0], cpu[0] = 1.0, 1.9
+    assert throttle.throttle() == 0.0
+    assert throttle.idle
+    assert slept == []
+
+
+def test_throttled_token_reports_wait_as_paused_time() -> None:
+    token = CancellationToken().throttled(lambda: 0.25)
+    assert token.checkpoint() == 0.25
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="线程级 nice 仅 Linux 支持")
+def test_priority_is_lowered_only_for_calling_thread() -> None:
+    niceness: list[int] = []
+
+    def worker() -> None:
+        lower_current_thread_priority()
+        niceness.append(os.getpriority(os.PRIO_PROCESS, threading.get_native_id()))
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+
+    assert niceness[0] >= 10
+    assert os.getpriority(os.PRIO_PROCESS, threading.get_native_id()) < niceness[0]
+
+
+def test_background_scan_still_finds_duplicates(tmp_path: Path, make_video) -> None:
+    make_video(tmp_path / "videos" / "a.avi")
+    make_video(tmp_path / "videos" / "copy" / "a.avi")
+    config = AppConfig(
+        cache_db=tmp_path / "cache.sqlite3",
+        frame_interval_seconds=1,
+        background_mode=True,
+    )
+    config.supported_extensions = {".avi"}
+
+    groups = ScanEngine(tmp_path / "videos", config).run()
+
+    assert groups is not None and len(groups) == 1
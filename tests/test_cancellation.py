@@ -0,0 +1,37 @@
+import threading
+import time
+
+import pytest
+
+from src.core.cancellation import CancellationToken, ExtractionCancelledError
+
+
+def test_checkpoint_passes_when_running() -> None:
+    assert CancellationToken().checkpoint() == 0.0
+
+
+def test_checkpoint_raises_after_cancel() -> None:
+    token = CancellationToken()
+    token.cancel()
+    with pytest.raises(ExtractionCancelledError):
+        token.checkpoint()
+
+
+def test_checkpoint_blocks_while_paused_and_reports_pause_time() -> None:
+    token = CancellationToken()
+    token.pause()
+    threading.Timer(0.15, token.resume).start()
+
+    started = time.monotonic()
+    paused_seconds = token.checkpoint()
+
+    assert paused_seconds >= 0.1
+    assert time.monotonic() - started >= 0.1
+
+
+def test_cancel_releases_paused_checkpoint() -> None:
+    token = CancellationToken()
+    token.pause()
+    threading.Timer(0.05, token.cancel).start()
+    with pytest.raises(ExtractionCancelledError):
+        token.checkpoint()
@@ -0,0 +1,122 @@
+import json
+import shutil
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+from src import cli
+from src.cli import build_parser, main
+from src.core.database import FingerprintDatabase
+from src.core.fingerprint import extract_fingerprint
+
+
+def test_cli_does_not_import_qt() -> None:
+    code = "import sys, src.cli; sys.exit('PySide6' in sys.modules)"
+    root = Path(__file__).resolve().parents[1]
+    assert subprocess.run([sys.executable, "-c", code], cwd=root, check=False).returncode == 0
+
+
+def test_cli_lookup_prints_json_lines(tmp_path: Path, make_video, capsys) -> None:
+    source = make_video(tmp_path / "a.avi")
+    copy = tmp_path / "b.avi"
+    shutil.copy(source, copy)
+    db = FingerprintDatabase(tmp_path / "cache.sqlite3")
+    db.upsert(extract_fingerprint(copy, 1), copy.stat().st_mtime)
+    db.close()
+
+    code = main(
+        [
+            "--cache-db",
+            str(tmp_path / "cache.sqlite3"),
+            "--frame-interval",
+            "1",
+            "lookup",
+            str(source),
+        ]
+    )
+
+    lines = capsys.readouterr().out.splitlines()
+    assert code == 0
+    assert [json.loads(line)["path"] for line in lines] == [str(copy)]
+
+
+def test_cli_scan_writes_groups_as_json_lines(tmp_path: Path, make_video, capsys) -> None:
+    make_video(tmp_path / "videos" / "a.avi")
+    make_video(tmp_path / "videos" / "copy" / "a.avi")
+    output = tmp_path / "groups.jsonl"
+
+    code = main(
+        [
+            "--cache-db",
+            str(tmp_path / "cache.sqlite3"),
+            "--frame-interval",
+            "1",
+            "--extensions",
+            "avi",
+            "scan",
+            str(tmp_path / "videos"),
+            "--output",
+            str(output),
+        ]
+    )
+
+    groups = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert code == 0
+    assert len(groups) == 1
+    assert len(groups[0]["items"]) == 2
+    assert "共发现 2 个视频文件" in capsys.readouterr().err
+
+
+def test_cli_flags_toggle_checkpoint_index_and_maintenance() -> None:
+    args = build_parser().parse_args(
+        ["--no-checkpoint", "--no-directory-index", "--cache-maintenance", "scan", "/data"]
+    )
+    config = cli._config_from_args(args)
+
+    assert not config.scan_checkpoint_enabled
+    assert not config.directory_index_enabled
+    assert config.cache_maintenance_enabled
+
+
+class _EngineUntilStopped:
+    def __init__(self) -> None:
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        self.stopped.wait(5)
+
+    def request_stop(self) -> None:
+        self.stopped.set()
+
+
+class _InterruptedWait(threading.Thread):
+    # 模拟主线程等待扫描时用户按下 Ctrl+C
+    interrupted = False
+
+    def join(self, timeout: float | None = None) -> None:
+        if timeout is not None and not _InterruptedWait.interrupted:
+            _InterruptedWait.interrupted = True
+            raise KeyboardInterrupt
+        super().join(timeout)
+
+
+def test_cli_interrupt_requests_engine_stop(monkeypatch) -> None:
+    monkeypatch.setattr(cli.threading, "Thread", _InterruptedWait)
+    engine = _EngineUntilStopped()
+
+    groups, interrupted = cli._run_engine(engine)
+
+    assert (groups, interrupted) == (None, True)
+    assert engine.stopped.is_set()
+
+
+def test_cli_lookup_reports_missing_file(tmp_path: Path, capsys) -> None:
+    missing = tmp_path / "missing.avi"
+
+    code = main(["--cache-db", str(tmp_path / "cache.sqlite3"), "lookup", str(missing)])
+
+    captured = capsys.readouterr()
+    assert code == 1
+    assert captured.out == ""
+    assert f"查找失败: {missing}" in captured.err
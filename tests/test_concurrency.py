@@ -0,0 +1,221 @@
+import threading
+import time
+
+import pytest
+
+from src.core.cancellation import CancellationToken, ExtractionCancelledError
+from src.core.concurrency import (
+    AdaptiveConcurrency,
+    MemoryBudget,
+    ResourceSample,
+    ResourceSampler,
+    estimate_decode_bytes,
+)
+
+
+class _FakeSampler(ResourceSampler):
+    def __init__(self) -> None:
+        self.next = ResourceSample(cpu_busy=0.3, io_wait=0.0, memory_available=0.5)
+
+    def sample(self) -> ResourceSample:
+        return self.next
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _controller(
+    sampler: _FakeSampler,
+    clock: _FakeClock,
+    initial: int = 2,
+) -> AdaptiveConcurrency:
+    return AdaptiveConcurrency(
+        initial,
+        1,
+        6,
+        inflight_multiplier=2,
+        cpu_ceiling=0.8,
+        interval_seconds=1.0,
+        sampler=sampler,
+        clock=clock,
+    )
+
+
+def _complete(controller: AdaptiveConcurrency, clock: _FakeClock, files: int) -> None:
+    # 每个窗口 1 秒，吞吐即 files 个/秒
+    for index in range(files):
+        with controller.slot(index):
+            pass
+    clock.now += 1.0
+
+
+def test_controller_grows_while_throughput_improves() -> None:
+    sampler, clock = _FakeSampler(), _FakeClock()
+    controller = _controller(sampler, clock)
+
+    _complete(controller, clock, 4)
+    assert controller.adjust()
+    assert controller.limit == 3
+
+    _complete(controller, clock, 8)
+    assert controller.adjust()
+    assert controller.limit == 4
+    assert controller.throughput == 8.0
+
+
+def test_controller_reverses_when_throughput_drops() -> None:
+    sampler, clock = _FakeSampler(), _FakeClock()
+    controller = _controller(sampler, clock)
+
+    _complete(controller, clock, 8)
+    controller.adjust()
+    assert controller.limit == 3
+
+    _complete(controller, clock, 4)
+    assert controller.adjust()
+    assert controller.limit == 2
+
+
+def test_controller_shrinks_above_cpu_ceiling_or_low_memory() -> None:
+    sampler, clock = _FakeSampler(), _FakeClock()
+    controller = _controller(sampler, clock, initial=6)
+
+    sampler.next = ResourceSample(cpu_busy=0.95, io_wait=0.0, memory_available=0.5)
+    _complete(controller, clock, 6)
+    assert controller.adjust()
+    assert controller.limit == 5
+
+    sampler.next = ResourceSample(cpu_busy=0.2, io_wait=0.0, memory_available=0.05)
+    _complete(controller, clock, 6)
+    assert controller.adjust()
+    assert controller.limit == 4
+
+
+def test_controller_waits_for_enough_samples() -> None:
+    sampler, clock = _FakeSampler(), _FakeClock()
+    controller = _controller(sampler, clock, initial=3)
+
+    _complete(controller, clock, 2)
+    assert not controller.adjust()
+    assert controller.limit == 3
+
+
+def test_fast_decodes_deepen_inflight_window() -> None:
+    sampler, clock = _FakeSampler(), _FakeClock()
+    controller = _controller(sampler, clock)
+    assert controller.inflight_limit == 4
+
+    _complete(controller, clock, 4)
+    controller.adjust()
+    assert controller.decode_seconds == 0.0
+    assert controller.inflight_limit == controller.limit * 4
+
+
+def test_slot_limits_concurrent_decodes_and_abandon_frees_it() -> None:
+    controller = AdaptiveConcurrency(
+        1,
+        1,
+        4,
+        inflight_multiplier=1,
+        cpu_ceiling=0.9,
+        sampler=_FakeSampler(),
+    )
+    release = threading.Event()
+    entered: list[str] = []
+
+    def hold(key: str) -> None:
+        with controller.slot(key):
+            entered.append(key)
+            release.wait(2)
+
+    stuck = threading.Thread(target=hold, args=("stuck",))
+    stuck.start()
+    while not entered:
+        time.sleep(0.01)
+    waiting = threading.Thread(target=hold, args=("next",))
+    waiting.start()
+    time.sleep(0.05)
+    assert entered == ["stuck"]
+
+    controller.abandon("stuck")
+    waiting.join(0.05)
+    assert entered == ["stuck", "next"]
+    release.set()
+    stuck.join()
+    waiting.join()
+
+
+def test_waiting_for_a_slot_responds_to_cancellation() -> None:
+    controller = AdaptiveConcurrency(
+        1,
+        1,
+        4,
+        inflight_multiplier=1,
+        cpu_ceiling=0.9,
+        sampler=_FakeSampler(),
+    )
+    token = CancellationToken()
+    errors: list[BaseException] = []
+
+    def wait_for_slot() -> None:
+        try:
+            with controller.slot("waiting", token):
+                pass
+        except ExtractionCancelledError as exc:
+            errors.append(exc)
+
+    with controller.slot("busy"):
+        waiting = threading.Thread(target=wait_for_slot)
+        waiting.start()
+        waiting.join(0.1)
+        assert waiting.is_alive()
+        token.cancel()
+        waiting.join(2)
+        assert not waiting.is_alive()
+    assert len(errors) == 1
+
+
+def test_decode_estimate_scales_with_resolution() -> None:
+    assert estimate_decode_bytes(3840, 2160) > 4 * estimate_decode_bytes(1280, 720)
+    assert estimate_decode_bytes(0, 0) == estimate_decode_bytes(-1, 5)
+
+
+def test_memory_budget_blocks_until_reservation_released() -> None:
+    memory = MemoryBudget(100, rss_reader=lambda: 20)
+    admitted: list[str] = []
+
+    def take(key: str) -> None:
+        with memory.reserve(key, 50):
+            admitted.append(key)
+
+    with memory.reserve("first", 60):
+        waiting = threading.Thread(target=take, args=("second",))
+        waiting.start()
+        waiting.join(0.3)
+        assert admitted == []
+        assert memory.waits == 1
+    waiting.join(2)
+    assert admitted == ["second"]
+    assert memory.reserved_bytes == 0
+
+
+def test_memory_budget_always_admits_one_job_and_tracks_observed_rss() -> None:
+    rss = [10]
+    memory = MemoryBudget(100, rss_reader=lambda: rss[0])
+
+    with memory.reserve("huge", 500):
+        assert memory.reserved_bytes == 500
+
+    # 实际占用比预估多出的部分计入后续准入
+    with memory.reserve("a", 10):
+        rss[0] = 95
+        assert memory.observe() == 95
+        token = CancellationToken()
+        token.cancel()
+        with pytest.raises(ExtractionCancelledError), memory.reserve("b", 10, token):
+            pass
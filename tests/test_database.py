@@ -1,7 +1,16 @@
+import sqlite3
 from pathlib import Path
 
-from src.core.database import FingerprintDatabase
+from src.core.database import (
+    MANIFEST_DONE,
+    MANIFEST_FAILED,
+    MANIFEST_PENDING,
+    MANIFEST_SKIPPED,
+    FingerprintDatabase,
+    ManifestEntry,
+)
 from src.core.fingerprint import VideoFingerprint
+from src.core.scanner import DirectoryEntry, DirectoryIndex, FileRecord
 
 
 def _build_fingerprint(path: Path) -> VideoFingerprint:
@@ -57,3 +66,188 @@ def test_database_uses_wal_mode(tmp_path: Path) -> None:
         assert int(busy_timeout) == 5000
     finally:
         db.close()
+
+
+def test_database_prune_missing_removes_deleted_files(tmp_path: Path) -> None:
+    kept = tmp_path / "kept.mp4"
+    gone = tmp_path / "gone.mp4"
+    outside = tmp_path.parent / "outside.mp4"
+    kept.write_text("x", encoding="utf-8")
+
+    db = FingerprintDatabase(tmp_path / "cache.sqlite3")
+    try:
+        for path in (kept, gone, outside):
+            db.upsert(_build_fingerprint(path), 1.0)
+
+        assert db.prune_missing(tmp_path) == 1
+        assert db.get_cached(kept, 1.0, 123) is not None
+        assert db.get_cached(gone, 1.0, 123) is None
+        assert db.get_cached(outside, 1.0, 123) is not None
+    finally:
+        db.close()
+
+
+def test_database_expire_older_than_keeps_scanned_root(tmp_path: Path) -> None:
+    root = tmp_path / "root"
+    inside = root / "a.mp4"
+    elsewhere = tmp_path / "other" / "b.mp4"
+
+    db = FingerprintDatabase(tmp_path / "cache.sqlite3")
+    try:
+        db.upsert(_build_fingerprint(inside), 1.0)
+        db.upsert(_build_fingerprint(elsewhere), 1.0)
+        db.flush()
+        db._conn.execute("UPDATE fingerprints SET updated_at = datetime('now', '-30 days')")
+        db._conn.commit()
+
+        assert db.expire_older_than(7, exclude_root=root) == 1
+        assert db.get_cached(inside, 1.0, 123) is not None
+        assert db.get_cached(elsewhere, 1.0, 123) is None
+    finally:
+        db.close()
+
+
+def test_database_scheduling_hints_are_limited_to_roots(tmp_path: Path) -> None:
+    inside = tmp_path / "root" / "a.mp4"
+    elsewhere = tmp_path / "other" / "b.mp4"
+
+    db = FingerprintDatabase(tmp_path / "cache.sqlite3")
+    try:
+        db.upsert(_build_fingerprint(inside), 1.0)
+        db.upsert(_build_fingerprint(elsewhere), 1.0)
+        db.flush()
+
+        assert list(db.iter_scheduling_hints([tmp_path / "root"])) == [(inside, 123, 9.5)]
+    finally:
+        db.close()
+
+
+def test_database_run_maintenance_reports_stats(tmp_path: Path) -> None:
+    db = FingerprintDatabase(tmp_path / "cache.sqlite3")
+    try:
+        present = tmp_path / "present.mp4"
+        db.upsert(_build_fingerprint(present), 1.0)
+        db.upsert(_build_fingerprint(tmp_path / "missing.mp4"), 1.0)
+        db.get_cached_bulk([(present, 1.0, 123), (tmp_path / "new.mp4", 1.0, 123)])
+
+        report = db.run_maintenance(tmp_path, existing_paths={str(present)})
+
+        assert report.pruned == 1
+        assert report.before.row_count == 2
+        assert report.after.row_count == 1
+        assert report.after.hit_rate == 0.5
+        assert report.after.wal_bytes == 0
+        assert int(db._conn.execute("PRAGMA auto_vacuum").fetchone()[0]) == 2
+    finally:
+        db.close()
+
+
+def test_database_failures_match_signature_and_count_attempts(tmp_path: Path) -> None:
+    video_path = tmp_path / "broken.mp4"
+    db = FingerprintDatabase(tmp_path / "cache.sqlite3")
+    try:
+        assert db.record_failure(video_path, 1.0, 10, ValueError("bad header")) == 1
+        assert db.record_failure(video_path, 1.0, 10, ValueError("bad header")) == 2
+
+        failed = db.get_failed_bulk([(video_path, 1.0, 10)])
+        entry = failed[str(video_path)]
+        assert entry.error_class == "ValueError"
+        assert entry.error_message == "bad header"
+        assert entry.attempts == 2
+
+        assert db.get_failed_bulk([(video_path, 2.0, 10)]) == {}
+        assert db.record_failure(video_path, 2.0, 10, OSError("io")) == 1
+
+        db.upsert(_build_fingerprint(video_path), 2.0)
+        assert db.get_failed_bulk([(video_path, 2.0, 10)]) == {}
+    finally:
+        db.close()
+
+
+def test_database_manifest_round_trip(tmp_path: Path) -> None:
+    db = FingerprintDatabase(tmp_path / "cache.sqlite3")
+    try:
+        manifest_id = db.create_manifest("root", "hash")
+        db.add_manifest_entries(
+            manifest_id,
+            [
+                ManifestEntry(tmp_path / "a.mp4", 1.0, 10, MANIFEST_PENDING),
+                ManifestEntry(tmp_path / "b.mp4", 2.0, 20, MANIFEST_DONE),
+                ManifestEntry(tmp_path / "c.mp4", 1.0, 10, MANIFEST_SKIPPED, tmp_path / "a.mp4"),
+            ],
+        )
+        db.set_manifest_state(manifest_id, tmp_path / "a.mp4", MANIFEST_FAILED)
+        db.flush()
+
+        assert db.load_manifest("root", "hash").walk_complete is False
+        db.complete_manifest_walk(manifest_id)
+        manifest = db.load_manifest("root", "hash")
+
+        assert manifest is not None
+        assert manifest.walk_complete is True
+        assert [(e.path.name, e.state) for e in manifest.entries] == [
+            ("a.mp4", MANIFEST_FAILED),
+            ("b.mp4", MANIFEST_DONE),
+            ("c.mp4", MANIFEST_SKIPPED),
+        ]
+        assert manifest.entries[2].alias_of == tmp_path / "a.mp4"
+        assert manifest.entries[0].alias_of is None
+        assert db.load_manifest("root", "other") is None
+
+        db.delete_manifest(manifest_id)
+        assert db.load_manifest("root", "hash") is None
+    finally:
+        db.close()
+
+
+def test_database_directory_index_round_trip(tmp_path: Path) -> None:
+    root = tmp_path / "root"
+    (root / "sub").mkdir(parents=True)
+    index = DirectoryIndex()
+    index.record(
+        str(root),
+        DirectoryEntry(mtime=1.0, subdirs=["sub"], files=[FileRecord(root / "a.mp4", 2.0, 3)]),
+    )
+    index.record(str(root / "gone"), DirectoryEntry(mtime=1.0, subdirs=[], files=[]))
+
+    db = FingerprintDatabase(tmp_path / "cache.sqlite3")
+    try:
+        db.save_directory_index(root, index, ".mp4")
+        loaded = db.load_directory_index(root, ".mp4")
+        assert loaded.known_directories == {str(root), str(root / "gone")}
+        assert loaded.lookup(str(root), 1.0).files == [FileRecord(root / "a.mp4", 2.0, 3)]
+        assert db.load_directory_index(root, ".mkv").known_directories == set()
+
+        # 第二次遍历未访问到 gone 目录，保存时应删除其索引
+        db.save_directory_index(root, loaded, ".mp4")
+        assert db.load_directory_index(root, ".mp4").known_directories == {str(root)}
+    finally:
+        db.close()
+
+
+def test_database_adds_bucket_columns_to_existing_cache(tmp_path: Path) -> None:
+    db_path = tmp_path / "cache.sqlite3"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        """
+        CREATE TABLE fingerprints (
+            path TEXT PRIMARY KEY, mtime REAL NOT NULL, size_bytes INTEGER NOT NULL,
+            duration_seconds REAL NOT NULL, width INTEGER NOT NULL, height INTEGER NOT NULL,
+            bitrate INTEGER NOT NULL, d_hash TEXT NOT NULL, p_hash TEXT NOT NULL,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.execute(
+        "INSERT INTO fingerprints VALUES ('/v/a.mp4', 1, 1000, 10, 640, 360, 1, '0', '0', '2024-01-01')"
+    )
+    conn.commit()
+    conn.close()
+
+    db = FingerprintDatabase(db_path)
+    try:
+        candidates = db.find_candidates(_build_fingerprint(Path("/v/b.mp4")), 100.0)
+    finally:
+        db.close()
+
+    assert [fp.path for fp in candidates] == [Path("/v/a.mp4")]
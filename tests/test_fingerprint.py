@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import pytest
+
+from src.core.cancellation import CancellationToken, ExtractionCancelledError
+from src.core.fingerprint import (
+    ExtractionBudget,
+    ExtractionTimeoutError,
+    extract_fingerprint,
+)
+
+
+def test_extract_fingerprint_reads_metadata(tmp_path: Path, make_video) -> None:
+    video = make_video(tmp_path / "clip.avi")
+
+    fp = extract_fingerprint(video, frame_interval_seconds=1)
+
+    assert fp.path == video
+    assert fp.width == 64
+    assert fp.height == 48
+    assert fp.duration_seconds == pytest.approx(3.0)
+
+
+def test_extract_fingerprint_raises_when_time_budget_exceeded(tmp_path: Path, make_video) -> None:
+    video = make_video(tmp_path / "clip.avi")
+
+    with pytest.raises(ExtractionTimeoutError) as excinfo:
+        extract_fingerprint(video, 1, ExtractionBudget(max_seconds=1e-9))
+
+    assert excinfo.value.path == video
+    assert excinfo.value.elapsed_seconds > 0
+
+
+def test_time_budget_scales_with_duration() -> None:
+    budget = ExtractionBudget(max_seconds=300, seconds_per_media_second=2.0)
+
+    assert budget.time_limit(3600) == 7500
+    assert budget.time_limit(-1) == 300
+    assert ExtractionBudget(seconds_per_media_second=2.0).time_limit(3600) == 0.0
+
+
+def test_extract_fingerprint_frame_budget_limits_sampling(tmp_path: Path, make_video) -> None:
+    video = make_video(tmp_path / "clip.avi")
+
+    full = extract_fingerprint(video, 1)
+    first_frame_only = extract_fingerprint(video, 1, ExtractionBudget(max_frames=1))
+
+    assert first_frame_only.d_hash != full.d_hash or first_frame_only.p_hash != full.p_hash
+
+
+def test_extract_fingerprint_discards_partial_work_on_cancel(tmp_path: Path, make_video) -> None:
+    video = make_video(tmp_path / "clip.avi")
+    token = CancellationToken()
+    token.cancel()
+
+    with pytest.raises(ExtractionCancelledError):
+        extract_fingerprint(video, 1, token=token)
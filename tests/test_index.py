@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import pytest
+
+from src.core.comparator import combined_similarity
+from src.core.fingerprint import VideoFingerprint
+from src.core.index import FingerprintIndex
+
+
+def _fp(
+    name: str,
+    d_hash: int,
+    p_hash: int,
+    dur: float = 10.0,
+    size_bytes: int = 100,
+) -> VideoFingerprint:
+    return VideoFingerprint(
+        path=Path(name),
+        size_bytes=size_bytes,
+        duration_seconds=dur,
+        width=1920,
+        height=1080,
+        bitrate=1000,
+        d_hash=d_hash,
+        p_hash=p_hash,
+    )
+
+
+def test_index_query_matches_comparator_similarity() -> None:
+    source = _fp("new.mp4", 0, 0)
+    near = _fp("near.mp4", 1, 3, dur=10.5)
+    far = _fp("far.mp4", (1 << 64) - 1, (1 << 64) - 1)
+    other_length = _fp("long.mp4", 0, 0, dur=60.0)
+    other_size = _fp("big.mp4", 0, 0, size_bytes=100 * 1024 * 1024)
+
+    index = FingerprintIndex()
+    index.extend([near, far, other_length, other_size])
+    index.rebuild()
+
+    matches = index.query(source, similarity_threshold=0.9, duration_tolerance_seconds=2.0)
+
+    assert [item.path.name for item, _ in matches] == ["near.mp4"]
+    assert matches[0][1] == pytest.approx(combined_similarity(source, near))
+
+
+def test_index_sees_recent_additions_and_removals() -> None:
+    index = FingerprintIndex(merge_threshold=2)
+    index.extend([_fp("a.mp4", 0, 0), _fp("b.mp4", 0, 0)])
+    index.rebuild()
+    index.add(_fp("c.mp4", 0, 0))
+    index.remove(Path("a.mp4"))
+
+    names = {item.path.name for item, _ in index.query(_fp("q.mp4", 0, 0), 0.9, 2.0)}
+    assert names == {"b.mp4", "c.mp4"}
+
+    index.add(_fp("b.mp4", (1 << 64) - 1, (1 << 64) - 1))
+    names = {item.path.name for item, _ in index.query(_fp("q.mp4", 0, 0), 0.9, 2.0)}
+    assert names == {"c.mp4"}
+    assert len(index) == 2
+
+
+def test_index_query_excludes_the_query_path_itself() -> None:
+    index = FingerprintIndex()
+    index.add(_fp("a.mp4", 0, 0))
+    assert index.query(_fp("a.mp4", 0, 0), 0.9, 2.0) == []
+
+
+def test_index_snapshot_round_trip(tmp_path: Path) -> None:
+    index = FingerprintIndex()
+    index.extend([_fp("a.mp4", 1, (1 << 64) - 1), _fp("目录/b.mp4", 0, 0, dur=12.0)])
+    index.save(tmp_path / "index.npz", {"roots": "x"})
+
+    loaded, metadata = FingerprintIndex.load(tmp_path / "index.npz")
+
+    assert metadata == {"roots": "x"}
+    assert loaded.get(Path("a.mp4")) == index.get(Path("a.mp4"))
+    assert loaded.get(Path("目录/b.mp4")) == index.get(Path("目录/b.mp4"))
+    assert [item.path.name for item, _ in loaded.query(_fp("q.mp4", 0, 0), 0.9, 2.0)] == ["b.mp4"]
+    assert FingerprintIndex.load(tmp_path / "missing.npz") is None
@@ -0,0 +1,92 @@
+from pathlib import Path
+
+from src.core.database import FingerprintDatabase
+from src.core.fingerprint import VideoFingerprint
+from src.core.library import library_snapshot_path, load_library_index
+
+
+def _fp(path: Path, d_hash: int = 0) -> VideoFingerprint:
+    return VideoFingerprint(
+        path=path,
+        size_bytes=100,
+        duration_seconds=10.0,
+        width=640,
+        height=360,
+        bitrate=1000,
+        d_hash=d_hash,
+        p_hash=0,
+    )
+
+
+def test_library_index_is_persisted_and_updated_incrementally(tmp_path: Path) -> None:
+    archive = tmp_path / "archive"
+    snapshot = library_snapshot_path(tmp_path / "cache.sqlite3", [archive])
+    db = FingerprintDatabase(tmp_path / "cache.sqlite3")
+    try:
+        db.upsert(_fp(archive / "a.mp4"), 1.0)
+        db.upsert(_fp(tmp_path / "elsewhere" / "b.mp4"), 1.0)
+
+        assert len(load_library_index(db, [archive], snapshot)) == 1
+        assert snapshot.exists()
+
+        db.upsert(_fp(archive / "c.mp4"), 1.0)
+        index = load_library_index(db, [archive], snapshot)
+        assert archive / "c.mp4" in index
+        assert len(index) == 2
+
+        db.prune_missing(archive, existing_paths={str(archive / "c.mp4")})
+        index = load_library_index(db, [archive], snapshot)
+        assert archive / "a.mp4" not in index
+        assert len(index) == 1
+
+        assert len(load_library_index(db, [], tmp_path / "all.npz")) == 2
+    finally:
+        db.close()
+
+
+def test_library_index_rebuilds_when_rows_are_replaced_without_changing_count(
+    tmp_path: Path,
+) -> None:
+    archive = tmp_path / "archive"
+    snapshot = library_snapshot_path(tmp_path / "cache.sqlite3", [archive])
+    db = FingerprintDatabase(tmp_path / "cache.sqlite3")
+    try:
+        db.upsert(_fp(archive / "a.mp4"), 1.0)
+        assert archive / "a.mp4" in load_library_index(db, [archive], snapshot)
+
+        # 删掉一行再加一行，行数不变
+        db.prune_missing(archive, existing_paths=set())
+        db.upsert(_fp(archive / "b.mp4"), 1.0)
+        index = load_library_index(db, [archive], snapshot)
+
+        assert archive / "a.mp4" not in index
+        assert archive / "b.mp4" in index
+    finally:
+        db.close()
+
+
+def test_library_index_picks_up_merged_rows_with_older_timestamps(tmp_path: Path) -> None:
+    archive = tmp_path / "archive"
+    snapshot = library_snapshot_path(tmp_path / "cache.sqlite3", [archive])
+    shard = FingerprintDatabase(tmp_path / "shard.sqlite3")
+    shard.upsert(_fp(archive / "a.mp4", d_hash=7), 2.0)
+    shard.flush()
+    shard._conn.execute("UPDATE fingerprints SET updated_at = datetime('now', '-1 day')")
+    shard._conn.commit()
+    shard.close()
+    db = FingerprintDatabase(tmp_path / "cache.sqlite3")
+    try:
+        db.upsert(_fp(archive / "a.mp4"), 1.0)
+        db.flush()
+        db._conn.execute("UPDATE fingerprints SET updated_at = datetime('now', '-2 days')")
+        db._conn.commit()
+        # 快照的水位线是这一行的当前时间，晚于分片上那一行的 updated_at
+        db.upsert(_fp(archive / "b.mp4"), 1.0)
+        assert load_library_index(db, [archive], snapshot).get(archive / "a.mp4").d_hash == 0
+
+        assert db.merge_from(tmp_path / "shard.sqlite3") == 1
+        index = load_library_index(db, [archive], snapshot)
+
+        assert index.get(archive / "a.mp4").d_hash == 7
+    finally:
+        db.close()
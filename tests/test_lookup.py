@@ -0,0 +1,93 @@
+import shutil
+from pathlib import Path
+
+from src.core.database import FingerprintDatabase
+from src.core.fingerprint import VideoFingerprint, extract_fingerprint
+from src.core.lookup import lookup_similar
+
+
+def _fp(name: str, dur: float, size_bytes: int = 1000) -> VideoFingerprint:
+    return VideoFingerprint(
+        path=Path(name),
+        size_bytes=size_bytes,
+        duration_seconds=dur,
+        width=640,
+        height=360,
+        bitrate=1000,
+        d_hash=0,
+        p_hash=0,
+    )
+
+
+def test_find_candidates_prefilters_on_duration_size_and_resolution(tmp_path: Path) -> None:
+    db = FingerprintDatabase(tmp_path / "cache.sqlite3")
+    try:
+        db.upsert(_fp("near.mp4", 10.5), 1.0)
+        db.upsert(_fp("long.mp4", 30.0), 1.0)
+        db.upsert(_fp("big.mp4", 10.0, size_bytes=10**9), 1.0)
+
+        names = {fp.path.name for fp in db.find_candidates(_fp("q.mp4", 10.0), 2.0)}
+    finally:
+        db.close()
+
+    assert names == {"near.mp4"}
+
+
+def test_lookup_similar_reuses_cache_and_ranks_matches(tmp_path: Path, make_video) -> None:
+    source = make_video(tmp_path / "a.avi")
+    copy = tmp_path / "b.avi"
+    shutil.copy(source, copy)
+    db = FingerprintDatabase(tmp_path / "cache.sqlite3")
+    try:
+        db.upsert(extract_fingerprint(copy, 1), copy.stat().st_mtime)
+
+        first = lookup_similar(
+            db,
+            source,
+            frame_interval_seconds=1,
+            similarity_threshold=0.9,
+            duration_tolerance_seconds=2.0,
+        )
+        second = lookup_similar(
+            db,
+            source,
+            frame_interval_seconds=1,
+            similarity_threshold=0.9,
+            duration_tolerance_seconds=2.0,
+        )
+    finally:
+        db.close()
+
+    assert not first.from_cache
+    assert second.from_cache
+    assert [item.path for item, _ in second.matches] == [copy]
+    assert second.matches[0][1] == 1.0
+
+
+def test_lookup_similar_reads_only_prefiltered_candidates(
+    tmp_path: Path, make_video, monkeypatch
+) -> None:
+    source = make_video(tmp_path / "a.avi")
+    copy = tmp_path / "b.avi"
+    shutil.copy(source, copy)
+    db = FingerprintDatabase(tmp_path / "cache.sqlite3")
+    try:
+        db.upsert(_fp(str(tmp_path / "unrelated.mp4"), 500.0), 1.0)
+        db.upsert(extract_fingerprint(copy, 1), copy.stat().st_mtime)
+
+        def full_scan(*args, **kwargs):
+            raise AssertionError("单文件查找不应读取整个缓存库")
+
+        monkeypatch.setattr(db, "iter_fingerprints", full_scan)
+        result = lookup_similar(
+            db,
+            source,
+            frame_interval_seconds=1,
+            similarity_threshold=0.9,
+            duration_tolerance_seconds=2.0,
+        )
+    finally:
+        db.close()
+
+    assert [item.path for item, _ in result.matches] == [copy]
+    assert not list(tmp_path.glob("*.npz"))
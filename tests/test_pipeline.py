@@ -0,0 +1,63 @@
+import threading
+import time
+
+import pytest
+
+from src.core.pipeline import BoundedFeed
+
+
+def test_bounded_feed_yields_all_items_in_batches() -> None:
+    feed = BoundedFeed(range(10), maxsize=4).start()
+    items: list[int] = []
+    while not feed.exhausted:
+        items.extend(feed.get_batch(3, timeout=0.1))
+
+    assert items == list(range(10))
+
+
+def test_bounded_feed_applies_backpressure_to_producer() -> None:
+    produced: list[int] = []
+
+    def source():
+        for idx in range(100):
+            produced.append(idx)
+            yield idx
+
+    feed = BoundedFeed(source(), maxsize=5).start()
+    time.sleep(0.2)
+    # 队列容量 5，生产者最多再多取出一个阻塞在 put 上
+    assert len(produced) <= 6
+
+    first = feed.get_batch(2, timeout=0.1)
+    assert first == [0, 1]
+    feed.close()
+
+
+def test_bounded_feed_close_stops_source() -> None:
+    closed = threading.Event()
+
+    def source():
+        try:
+            idx = 0
+            while True:
+                yield idx
+                idx += 1
+        finally:
+            closed.set()
+
+    feed = BoundedFeed(source(), maxsize=2).start()
+    assert feed.get_batch(1, timeout=0.5) == [0]
+    feed.close()
+
+    assert closed.wait(1.0)
+
+
+def test_bounded_feed_reraises_source_error() -> None:
+    def source():
+        yield 1
+        raise OSError("walk failed")
+
+    feed = BoundedFeed(source(), maxsize=4).start()
+    assert feed.get_batch(1, timeout=0.5) == [1]
+    with pytest.raises(OSError, match="walk failed"):
+        feed.get_batch(1, timeout=0.5)
@@ -0,0 +1,156 @@
+import io
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from src.cli import main
+from src.core.database import FingerprintDatabase
+from src.core.fingerprint import VideoFingerprint, extract_fingerprint
+from src.core.portable import (
+    MAGIC,
+    PortableFormatError,
+    PortableReader,
+    PortableWriter,
+    export_fingerprints,
+    import_fingerprints,
+    prefix_remap,
+)
+
+
+def _fingerprint(path: Path, d_hash: int = 2**64 - 1) -> VideoFingerprint:
+    return VideoFingerprint(
+        path=path,
+        size_bytes=123,
+        duration_seconds=9.5,
+        width=1920,
+        height=1080,
+        bitrate=2048,
+        d_hash=d_hash,
+        p_hash=22,
+    )
+
+
+def test_round_trip_is_relative_to_root(tmp_path: Path) -> None:
+    root = tmp_path / "library"
+    stream = io.BytesIO()
+    with PortableWriter(stream, root, block_records=2) as writer:
+        assert writer.write(_fingerprint(root / "a" / "clip.mp4"), 10.5)
+        assert writer.write(_fingerprint(root / "电影.mkv", d_hash=7), 11.0)
+        assert writer.write(_fingerprint(root / "b.mp4"), 12.0)
+        assert not writer.write(_fingerprint(tmp_path / "elsewhere.mp4"), 1.0)
+    assert (writer.written, writer.skipped) == (3, 1)
+
+    stream.seek(0)
+    reader = PortableReader(stream)
+    records = list(reader)
+
+    assert reader.root == root
+    assert [record.relative_path for record in records] == ["a/clip.mp4", "电影.mkv", "b.mp4"]
+    assert (records[0].mtime, records[0].d_hash, records[1].d_hash) == (10.5, 2**64 - 1, 7)
+    assert records[0].to_cached(Path("/other")).path == Path("/other/a/clip.mp4")
+
+
+def test_reader_rejects_foreign_and_truncated_files() -> None:
+    with pytest.raises(PortableFormatError):
+        PortableReader(io.BytesIO(b"SQLite format 3\0"))
+    with pytest.raises(PortableFormatError):
+        PortableReader(io.BytesIO(MAGIC + b"\x01\x00\x01\x00\x00\x00\x00\x00"))
+
+    stream = io.BytesIO()
+    writer = PortableWriter(stream, Path("/library"))
+    writer.write(_fingerprint(Path("/library/a.mp4")), 1.0)
+    writer.close()
+    truncated = io.BytesIO(stream.getvalue()[:-4])
+    with pytest.raises(PortableFormatError):
+        list(PortableReader(truncated))
+
+
+def test_import_keeps_exported_mtime_unless_size_is_trusted(tmp_path: Path, make_video) -> None:
+    source_root = tmp_path / "site_a"
+    video = make_video(source_root / "sub" / "clip.avi")
+    changed = make_video(source_root / "changed.avi")
+    os.utime(video, (1000.0, 1000.0))
+    db = FingerprintDatabase(tmp_path / "a.sqlite3")
+    for path in (video, changed):
+        db.upsert(extract_fingerprint(path, 1), path.stat().st_mtime)
+    assert export_fingerprints(db, source_root, tmp_path / "a.vdfp") == (2, 0)
+    db.close()
+
+    # 另一台机器：复制时没有保留 mtime，其中一个文件已被修改
+    target_root = tmp_path / "site_b"
+    shutil.copytree(source_root, target_root)
+    (target_root / "changed.avi").write_bytes(b"edited")
+    os.utime(target_root / "sub" / "clip.avi", (2000.0, 2000.0))
+
+    target = FingerprintDatabase(tmp_path / "b.sqlite3")
+    try:
+        copied = target_root / "sub" / "clip.avi"
+        size = copied.stat().st_size
+
+        # 默认不信任大小：本地 mtime 不同，扫描时会重新提取
+        report = import_fingerprints(target, tmp_path / "a.vdfp", target_root)
+        assert (report.imported, report.stale) == (1, 1)
+        assert target.get_cached(copied, 2000.0, size) is None
+        assert target.get_cached(copied, 1000.0, size) is not None
+
+        trusted = import_fingerprints(target, tmp_path / "a.vdfp", target_root, trust_size=True)
+        cached = target.get_cached(copied, 2000.0, size)
+        assert (trusted.imported, trusted.stale) == (1, 1)
+        assert cached is not None
+        assert cached.d_hash == extract_fingerprint(copied, 1).d_hash
+    finally:
+        target.close()
+
+
+def test_prefix_remap_uses_longest_prefix_and_fallback_root(tmp_path: Path) -> None:
+    remap = prefix_remap([("movies", tmp_path / "films"), ("movies/4k/", tmp_path / "uhd")])
+    with_root = prefix_remap([("movies", tmp_path / "films")], tmp_path / "rest")
+
+    assert remap("movies/a.mp4") == tmp_path / "films" / "a.mp4"
+    assert remap("movies/4k/b.mp4") == tmp_path / "uhd" / "b.mp4"
+    assert remap("movies_old/c.mp4") is None
+    assert with_root("shows/d.mp4") == tmp_path / "rest" / "shows" / "d.mp4"
+
+
+def test_cli_export_and_import(tmp_path: Path) -> None:
+    db = FingerprintDatabase(tmp_path / "a.sqlite3")
+    db.upsert(_fingerprint(tmp_path / "lib" / "a.mp4"), 1.0)
+    db.upsert(_fingerprint(tmp_path / "lib" / "movies" / "b.mp4"), 1.0)
+    db.close()
+    exported = tmp_path / "lib.vdfp"
+
+    export_code = main(
+        [
+            "--cache-db",
+            str(tmp_path / "a.sqlite3"),
+            "export",
+            str(tmp_path / "lib"),
+            "--output",
+            str(exported),
+        ]
+    )
+    import_code = main(
+        [
+            "--cache-db",
+            str(tmp_path / "b.sqlite3"),
+            "import",
+            str(exported),
+            "--root",
+            "/mnt/lib",
+            "--remap",
+            "movies=/mnt/films",
+        ]
+    )
+
+    assert (export_code, import_code) == (0, 0)
+
+    db = FingerprintDatabase(tmp_path / "b.sqlite3")
+    try:
+        assert sorted(fp.path for fp in db.iter_fingerprints()) == [
+            Path("/mnt/films/b.mp4"),
+            Path("/mnt/lib/a.mp4"),
+        ]
+    finally:
+        db.close()
@@ -0,0 +1,36 @@
+import shutil
+from pathlib import Path
+
+from src.config import AppConfig
+from src.core.database import FingerprintDatabase
+from src.core.fingerprint import extract_fingerprint
+from src.workers.query_worker import QueryWorker
+
+
+def test_query_worker_reports_incoming_files_already_in_archive(
+    tmp_path: Path,
+    make_video,
+) -> None:
+    archived = make_video(tmp_path / "archive" / "movie.avi")
+    incoming = tmp_path / "incoming"
+    incoming.mkdir()
+    shutil.copy(archived, incoming / "copy.avi")
+    make_video(incoming / "new.avi", frames=80, seed=3)
+    config = AppConfig(cache_db=tmp_path / "cache.sqlite3", frame_interval_seconds=1)
+    config.supported_extensions = {".avi"}
+
+    db = FingerprintDatabase(config.cache_db)
+    db.upsert(extract_fingerprint(archived, 1), archived.stat().st_mtime)
+    db.close()
+
+    worker = QueryWorker(incoming, [tmp_path / "archive"], config)
+    results: list = []
+    statuses: list[str] = []
+    worker.finished.connect(results.append)
+    worker.failed.connect(lambda error: statuses.append(f"failed: {error}"))
+    worker.status.connect(statuses.append)
+    worker.run()
+
+    assert results, statuses
+    assert len(results[0]) == 1
+    assert {item.path.name for item in results[0][0].items} == {"movie.avi", "copy.avi"}
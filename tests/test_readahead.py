@@ -0,0 +1,65 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from src.core.fingerprint import extract_fingerprint
+from src.core.readahead import ReadAheadAdvisor
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "posix_fadvise"),
+    reason="posix_fadvise 仅在 POSIX 平台可用",
+)
+
+
+def _record_advice(monkeypatch) -> list[tuple[int, int, int]]:
+    calls: list[tuple[int, int, int]] = []
+    monkeypatch.setattr(
+        os,
+        "posix_fadvise",
+        lambda _fd, offset, length, advice: calls.append((offset, length, advice)),
+    )
+    return calls
+
+
+def test_advisor_prefetches_ahead_and_drops_behind(tmp_path: Path, monkeypatch) -> None:
+    path = tmp_path / "video.bin"
+    path.write_bytes(b"\0" * 1000)
+    calls = _record_advice(monkeypatch)
+
+    with ReadAheadAdvisor(path, 1000, 100) as advisor:
+        assert advisor.active
+        advisor.advance(0.06)
+        advisor.advance(0.3)
+
+    assert calls == [
+        (0, 100, os.POSIX_FADV_WILLNEED),
+        (100, 100, os.POSIX_FADV_WILLNEED),
+        (300, 100, os.POSIX_FADV_WILLNEED),
+        (0, 200, os.POSIX_FADV_DONTNEED),
+        (0, 0, os.POSIX_FADV_DONTNEED),
+    ]
+    assert not advisor.active
+
+
+def test_zero_window_disables_hints(tmp_path: Path, monkeypatch) -> None:
+    path = tmp_path / "video.bin"
+    path.write_bytes(b"\0" * 10)
+    calls = _record_advice(monkeypatch)
+
+    with ReadAheadAdvisor(path, 10, 0) as advisor:
+        advisor.advance(0.5)
+
+    assert calls == []
+    assert not advisor.active
+
+
+def test_extraction_issues_hints(tmp_path: Path, make_video, monkeypatch) -> None:
+    video = make_video(tmp_path / "clip.avi")
+    calls = _record_advice(monkeypatch)
+
+    extract_fingerprint(video, 1, readahead_bytes=1024)
+
+    advices = {advice for _, _, advice in calls}
+    assert {os.POSIX_FADV_WILLNEED, os.POSIX_FADV_DONTNEED} <= advices
+    assert calls[-1] == (0, 0, os.POSIX_FADV_DONTNEED)
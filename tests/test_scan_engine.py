@@ -0,0 +1,224 @@
+import os
+import queue
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from src.config import AppConfig
+from src.core.cancellation import CancellationToken
+from src.core.database import FingerprintDatabase
+from src.core.fingerprint import ExtractionBudget
+from src.core.scanner import VideoScanner
+from src.core.watchdog import ExtractionWatchdog
+from src.utils.video_info import read_video_info
+from src.workers import scan_engine
+from src.workers.scan_engine import QueueSink, ScanEngine, ScanSink
+
+
+def _drain(events: queue.Queue) -> list[tuple[str, tuple]]:
+    drained = []
+    while not events.empty():
+        drained.append(events.get_nowait())
+    return drained
+
+
+def test_scan_engine_reports_events_through_queue_sink(tmp_path: Path, make_video) -> None:
+    make_video(tmp_path / "videos" / "a.avi")
+    make_video(tmp_path / "videos" / "copy" / "a.avi")
+    config = AppConfig(cache_db=tmp_path / "cache.sqlite3", frame_interval_seconds=1)
+    config.supported_extensions = {".avi"}
+    events: queue.Queue = queue.Queue()
+
+    groups = ScanEngine(tmp_path / "videos", config, QueueSink(events)).run()
+
+    drained = _drain(events)
+    kinds = [kind for kind, _ in drained]
+    assert groups is not None and len(groups) == 1
+    assert kinds[-1] == "finished"
+    assert drained[-1][1] == (groups,)
+    # 最终结果的每个组先单独送出
+    assert ("group", (groups[0],)) in drained[:-1]
+    assert ("progress", (2, 2)) in drained
+
+
+def test_scan_engine_returns_none_when_stopped(tmp_path: Path) -> None:
+    config = AppConfig(cache_db=tmp_path / "cache.sqlite3")
+    events: queue.Queue = queue.Queue()
+    engine = ScanEngine(tmp_path, config, QueueSink(events))
+    engine.request_stop()
+
+    assert engine.run() is None
+    assert [kind for kind, _ in _drain(events)][-1] == "stopped"
+
+
+def test_only_decode_failures_are_negatively_cached(
+    tmp_path: Path, make_video, monkeypatch
+) -> None:
+    root = tmp_path / "videos"
+    flaky = make_video(root / "flaky.avi")
+    broken = root / "broken.avi"
+    broken.write_bytes(b"not a video")
+    config = AppConfig(cache_db=tmp_path / "cache.sqlite3", frame_interval_seconds=1)
+    config.supported_extensions = {".avi"}
+    original = scan_engine._timed_extract
+
+    def extract(watchdog, path, *args):
+        if path == flaky:
+            raise OSError("网络盘暂时不可用")
+        return original(watchdog, path, *args)
+
+    monkeypatch.setattr(scan_engine, "_timed_extract", extract)
+    ScanEngine(root, config).run()
+
+    db = FingerprintDatabase(config.cache_db)
+    try:
+        signatures = [(path, path.stat().st_mtime, path.stat().st_size) for path in (flaky, broken)]
+        failed = db.get_failed_bulk(signatures)
+    finally:
+        db.close()
+    # 暂时性错误不进入失败记录，下次扫描会重试
+    assert list(failed) == [str(broken)]
+    assert failed[str(broken)].error_class == "VideoDecodeError"
+
+
+def test_watchdog_covers_the_metadata_probe(tmp_path: Path, make_video, monkeypatch) -> None:
+    video = make_video(tmp_path / "a.avi")
+    probing = threading.Event()
+    release = threading.Event()
+
+    def hanging_probe(path: Path):
+        probing.set()
+        release.wait(5)
+        return read_video_info(path)
+
+    monkeypatch.setattr(scan_engine, "read_video_info", hanging_probe)
+    watchdog = ExtractionWatchdog(0.01)
+    thread = threading.Thread(
+        target=scan_engine._timed_extract,
+        args=(watchdog, video, 1, ExtractionBudget(), CancellationToken()),
+    )
+    thread.start()
+    try:
+        assert probing.wait(5)
+        time.sleep(0.05)
+        # 卡在打开容器时看门狗已在计时，扫描可以放弃该文件
+        assert [key for key, _ in watchdog.expired()] == [video]
+    finally:
+        release.set()
+        thread.join(5)
+    assert watchdog.expired() == []
+
+
+def test_timed_out_files_are_retried_on_next_scan(tmp_path: Path, make_video) -> None:
+    video = make_video(tmp_path / "videos" / "a.avi")
+    config = AppConfig(
+        cache_db=tmp_path / "cache.sqlite3",
+        frame_interval_seconds=1,
+        extraction_timeout_seconds=1e-9,
+        extraction_timeout_per_media_second=0.0,
+    )
+    config.supported_extensions = {".avi"}
+
+    for _ in range(2):
+        events: queue.Queue = queue.Queue()
+        ScanEngine(tmp_path / "videos", config, QueueSink(events)).run()
+        statuses = [args[0] for kind, args in _drain(events) if kind == "status"]
+        assert any(text.startswith("提取超时: a.avi") for text in statuses)
+
+    db = FingerprintDatabase(config.cache_db)
+    try:
+        stat = video.stat()
+        assert db.get_failed_bulk([(video, stat.st_mtime, stat.st_size)]) == {}
+    finally:
+        db.close()
+
+
+class _StopAfterFirstFingerprint(ScanSink):
+    def __init__(self) -> None:
+        self.engine: ScanEngine | None = None
+
+    def on_fingerprint(self, fingerprint) -> None:
+        self.engine.request_stop()
+
+
+def test_resumed_scan_keeps_hardlink_alias_groups(tmp_path: Path, make_video, monkeypatch) -> None:
+    root = tmp_path / "videos"
+    source = make_video(root / "a.avi")
+    os.link(source, root / "b.avi")
+    config = AppConfig(cache_db=tmp_path / "cache.sqlite3", frame_interval_seconds=1)
+    config.supported_extensions = {".avi"}
+    original = scan_engine._timed_extract
+
+    def slow_extract(watchdog, path, *args):
+        # 保证目录遍历先完成，检查点可以续扫
+        time.sleep(0.3)
+        return original(watchdog, path, *args)
+
+    monkeypatch.setattr(scan_engine, "_timed_extract", slow_extract)
+    sink = _StopAfterFirstFingerprint()
+    sink.engine = ScanEngine(root, config, sink)
+    assert sink.engine.run() is None
+
+    monkeypatch.setattr(scan_engine, "_timed_extract", original)
+    events: queue.Queue = queue.Queue()
+    groups = ScanEngine(root, config, QueueSink(events)).run()
+
+    statuses = [args[0] for kind, args in _drain(events) if kind == "status"]
+    assert any(text.startswith("从检查点恢复") for text in statuses)
+    assert groups is not None and len(groups) == 1
+    assert groups[0].is_alias
+    assert {item.path.name for item in groups[0].items} == {"a.avi", "b.avi"}
+
+
+def test_rescan_detects_file_rewritten_in_place_under_directory_index(
+    tmp_path: Path, make_video
+) -> None:
+    root = tmp_path / "videos"
+    source = make_video(root / "a.avi")
+    target = make_video(root / "b.avi", frames=80, seed=3)
+    stamp = time.time() - 100
+    os.utime(root, (stamp, stamp))
+    config = AppConfig(cache_db=tmp_path / "cache.sqlite3", frame_interval_seconds=1)
+    config.supported_extensions = {".avi"}
+    assert ScanEngine(root, config).run() == []
+
+    shutil.copyfile(source, target)
+    os.utime(root, (stamp, stamp))
+    groups = ScanEngine(root, config).run()
+
+    assert groups is not None and len(groups) == 1
+    assert {item.path.name for item in groups[0].items} == {"a.avi", "b.avi"}
+
+
+def test_maintenance_keeps_rows_under_directory_unreadable_during_walk(
+    tmp_path: Path, make_video, monkeypatch
+) -> None:
+    root = tmp_path / "videos"
+    kept = make_video(root / "locked" / "a.avi")
+    gone = make_video(root / "b.avi", frames=80, seed=3)
+    config = AppConfig(
+        cache_db=tmp_path / "cache.sqlite3",
+        frame_interval_seconds=1,
+        cache_maintenance_enabled=True,
+        directory_index_enabled=False,
+    )
+    config.supported_extensions = {".avi"}
+    assert ScanEngine(root, config).run() == []
+
+    gone.unlink()
+    read_directory = VideoScanner._read_directory
+
+    def flaky_read(self, directory: str):
+        if directory.endswith("locked"):
+            raise PermissionError(13, "Permission denied", directory)
+        return read_directory(self, directory)
+
+    monkeypatch.setattr(VideoScanner, "_read_directory", flaky_read)
+    assert ScanEngine(root, config).run() == []
+
+    db = FingerprintDatabase(config.cache_db)
+    try:
+        assert [fp.path for fp in db.iter_fingerprints()] == [kept]
+    finally:
+        db.close()
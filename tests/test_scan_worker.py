@@ -1,7 +1,15 @@
-from src.workers.scan_worker import (
+import os
+from pathlib import Path
+
+from src.config import AppConfig
+from src.core.database import MANIFEST_PENDING, FingerprintDatabase, ManifestEntry
+from src.workers import scan_engine
+from src.workers.scan_engine import _compute_config_hash, _compute_watchdog_seconds
+from src.workers.scan_worker import ScanWorker
+from src.workers.tuning import (
     _compute_fingerprint_workers,
     _compute_inflight_limit,
-    _compute_metadata_workers,
+    _compute_walker_workers,
 )
 
 
@@ -12,13 +20,123 @@ def test_compute_fingerprint_workers_profiles() -> None:
     assert _compute_fingerprint_workers(32, "high") == 6
 
 
-def test_compute_metadata_workers_high_profile_is_capped() -> None:
-    workers = _compute_metadata_workers(24, "high", 20000)
-    assert workers <= 8
-    assert workers >= 1
+def test_compute_walker_workers_profiles() -> None:
+    assert _compute_walker_workers(8, "low") == 2
+    assert _compute_walker_workers(8, "medium") == 4
+    assert _compute_walker_workers(4, "high") == 8
+    assert _compute_walker_workers(64, "high") == 16
 
 
 def test_compute_inflight_limit_profiles() -> None:
     assert _compute_inflight_limit(4, "low") == 4
     assert _compute_inflight_limit(4, "medium") == 8
     assert _compute_inflight_limit(4, "high") == 12
+
+
+def test_compute_watchdog_seconds_adds_grace_period() -> None:
+    assert _compute_watchdog_seconds(0) == 0.0
+    assert _compute_watchdog_seconds(60) == 90.0
+    assert _compute_watchdog_seconds(900) == 1125.0
+
+
+def _run_worker(root: Path | list[Path], config: AppConfig, **kwargs) -> tuple[list, list[str]]:
+    worker = ScanWorker(root, config, **kwargs)
+    results: list = []
+    statuses: list[str] = []
+    worker.finished.connect(results.append)
+    worker.failed.connect(lambda error: statuses.append(f"failed: {error}"))
+    worker.status.connect(statuses.append)
+    worker.run()
+    return results, statuses
+
+
+def test_scan_worker_finds_duplicate_copies(tmp_path: Path, make_video) -> None:
+    root = tmp_path / "videos"
+    make_video(root / "a.avi")
+    make_video(root / "copy" / "a.avi")
+    config = AppConfig(cache_db=tmp_path / "cache.sqlite3", frame_interval_seconds=1)
+    config.supported_extensions = {".avi"}
+
+    results, statuses = _run_worker(root, config)
+
+    assert results, statuses
+    assert len(results[0]) == 1
+    assert len(results[0][0].items) == 2
+
+
+def test_scan_worker_compares_across_roots_and_skips_nested_roots(
+    tmp_path: Path,
+    make_video,
+) -> None:
+    make_video(tmp_path / "drive_a" / "a.avi")
+    make_video(tmp_path / "drive_b" / "inner" / "a.avi")
+    make_video(tmp_path / "unrelated" / "a.avi")
+    config = AppConfig(cache_db=tmp_path / "cache.sqlite3", frame_interval_seconds=1)
+    config.supported_extensions = {".avi"}
+    roots = [tmp_path / "drive_a", tmp_path / "drive_b", tmp_path / "drive_b" / "inner"]
+
+    results, statuses = _run_worker(roots, config)
+
+    assert results, statuses
+    assert any(status.startswith("共发现 2 个视频文件") for status in statuses)
+    assert len(results[0]) == 1
+    assert {item.path.parent.name for item in results[0][0].items} == {"drive_a", "inner"}
+
+
+def test_scan_worker_reports_hardlinks_separately_without_decoding(
+    tmp_path: Path,
+    make_video,
+    monkeypatch,
+) -> None:
+    root = tmp_path / "videos"
+    source = make_video(root / "a.avi")
+    os.link(source, root / "b.avi")
+    config = AppConfig(cache_db=tmp_path / "cache.sqlite3", frame_interval_seconds=1)
+    config.supported_extensions = {".avi"}
+    decoded: list[Path] = []
+    original = scan_engine._timed_extract
+    monkeypatch.setattr(
+        scan_engine,
+        "_timed_extract",
+        lambda watchdog, path, *args: decoded.append(path) or original(watchdog, path, *args),
+    )
+
+    results, statuses = _run_worker(root, config)
+
+    assert results, statuses
+    assert len(decoded) == 1
+    assert len(results[0]) == 1
+    assert results[0][0].is_alias
+    assert {item.path.name for item in results[0][0].items} == {"a.avi", "b.avi"}
+
+
+def test_scan_worker_resumes_from_checkpoint_without_walking(
+    tmp_path: Path,
+    make_video,
+) -> None:
+    root = tmp_path / "videos"
+    listed = make_video(root / "a.avi")
+    make_video(root / "unlisted.avi", seed=3)
+    config = AppConfig(cache_db=tmp_path / "cache.sqlite3", frame_interval_seconds=1)
+    config.supported_extensions = {".avi"}
+
+    db = FingerprintDatabase(config.cache_db)
+    manifest_id = db.create_manifest(str(root), _compute_config_hash(config))
+    stat = listed.stat()
+    db.add_manifest_entries(
+        manifest_id,
+        [ManifestEntry(listed, stat.st_mtime, stat.st_size, MANIFEST_PENDING)],
+    )
+    db.complete_manifest_walk(manifest_id)
+    db.close()
+
+    results, statuses = _run_worker(root, config)
+
+    assert results == [[]]
+    assert any("从检查点恢复" in text for text in statuses)
+    db = FingerprintDatabase(config.cache_db)
+    try:
+        assert db.load_manifest(str(root), _compute_config_hash(config)) is None
+        assert db.get_cached(listed, stat.st_mtime, stat.st_size) is not None
+    finally:
+        db.close()
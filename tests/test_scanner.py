@@ -1,6 +1,9 @@
+import os
+import threading
+import time
 from pathlib import Path
 
-from src.core.scanner import VideoScanner
+from src.core.scanner import DirectoryIndex, VideoScanner, collapse_roots, split_aliases
 
 
 def test_scan_only_video_files(tmp_path: Path) -> None:
@@ -12,3 +15,137 @@ def test_scan_only_video_files(tmp_path: Path) -> None:
     files = scanner.scan(tmp_path)
 
     assert [f.name for f in files] == ["a.mp4", "b.mkv"]
+
+
+def test_scan_records_walks_nested_directories_with_stat_data(tmp_path: Path) -> None:
+    for idx in range(20):
+        nested = tmp_path / f"dir{idx}" / "inner"
+        nested.mkdir(parents=True)
+        (nested / f"v{idx}.MP4").write_bytes(b"x" * idx)
+        (nested / "notes.txt").write_text("x", encoding="utf-8")
+
+    scanner = VideoScanner({".mp4"}, max_workers=4)
+    records = scanner.scan_records(tmp_path)
+
+    assert len(records) == 20
+    assert [r.path for r in records] == sorted(r.path for r in records)
+    by_name = {r.path.name: r for r in records}
+    assert by_name["v7.MP4"].size_bytes == 7
+    assert by_name["v7.MP4"].mtime == (tmp_path / "dir7" / "inner" / "v7.MP4").stat().st_mtime
+
+
+def test_scan_records_on_missing_root_is_empty(tmp_path: Path) -> None:
+    assert VideoScanner({".mp4"}).scan_records(tmp_path / "missing") == []
+
+
+def _age(path: Path, seconds_ago: float) -> None:
+    stamp = time.time() - seconds_ago
+    os.utime(path, (stamp, stamp))
+
+
+def test_unexpected_error_in_walker_reaches_consumer(tmp_path: Path, monkeypatch) -> None:
+    for name in ["good", "bad"]:
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "a.mp4").write_bytes(b"x")
+    scanner = VideoScanner({".mp4"}, max_workers=2)
+    original = scanner._visit_directory
+
+    def visit(directory: str, index):
+        if directory.endswith("bad"):
+            raise UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+        return original(directory, index)
+
+    monkeypatch.setattr(scanner, "_visit_directory", visit)
+    outcome: list[BaseException] = []
+
+    def consume() -> None:
+        try:
+            list(scanner.iter_records(tmp_path))
+        except BaseException as exc:  # noqa: BLE001
+            outcome.append(exc)
+
+    thread = threading.Thread(target=consume, daemon=True)
+    thread.start()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert [type(exc) for exc in outcome] == [UnicodeDecodeError]
+
+
+def test_scan_records_reuses_unchanged_directories_from_index(tmp_path: Path) -> None:
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / f"{name}.mp4").write_text("x", encoding="utf-8")
+        _age(tmp_path / name, 100)
+    _age(tmp_path, 100)
+    scanner = VideoScanner({".mp4"})
+
+    first = DirectoryIndex()
+    expected = scanner.scan_records(tmp_path, first)
+    assert first.rescanned == 3
+    assert set(first.updates) == {str(tmp_path), str(tmp_path / "a"), str(tmp_path / "b")}
+
+    (tmp_path / "b" / "new.mp4").write_text("x", encoding="utf-8")
+    _age(tmp_path / "b", 50)
+    second = DirectoryIndex(dict(first.updates))
+    records = scanner.scan_records(tmp_path, second)
+
+    assert second.reused == 2
+    assert second.rescanned == 1
+    assert [r.path for r in records] == sorted(
+        [r.path for r in expected] + [tmp_path / "b" / "new.mp4"]
+    )
+
+
+def test_index_reuse_still_sees_files_rewritten_in_place(tmp_path: Path) -> None:
+    video = tmp_path / "a.mp4"
+    video.write_bytes(b"x")
+    stamp = time.time() - 100
+    os.utime(tmp_path, (stamp, stamp))
+    scanner = VideoScanner({".mp4"})
+    first = DirectoryIndex()
+    scanner.scan_records(tmp_path, first)
+
+    # 原地改写不改变目录 mtime
+    video.write_bytes(b"rewritten")
+    os.utime(tmp_path, (stamp, stamp))
+    second = DirectoryIndex(dict(first.updates))
+    records = scanner.scan_records(tmp_path, second)
+
+    assert second.reused == 1
+    assert [(r.path, r.size_bytes, r.mtime) for r in records] == [(video, 9, video.stat().st_mtime)]
+
+
+def test_directory_index_does_not_store_freshly_modified_directories(tmp_path: Path) -> None:
+    (tmp_path / "a.mp4").write_text("x", encoding="utf-8")
+    index = DirectoryIndex()
+
+    VideoScanner({".mp4"}).scan_records(tmp_path, index)
+
+    assert index.rescanned == 1
+    assert index.updates == {}
+
+
+def test_split_aliases_maps_hardlinks_and_symlinks_to_one_file(tmp_path: Path) -> None:
+    source = tmp_path / "a.mp4"
+    source.write_bytes(b"x")
+    os.link(source, tmp_path / "hard.mp4")
+    (tmp_path / "soft.mp4").symlink_to(source)
+
+    records = VideoScanner({".mp4"}).scan_records(tmp_path)
+    unique, aliases = split_aliases(records, {})
+
+    assert [record.path for record in unique] == [source]
+    assert aliases == {tmp_path / "hard.mp4": source, tmp_path / "soft.mp4": source}
+
+
+def test_collapse_roots_drops_nested_and_duplicate_roots(tmp_path: Path) -> None:
+    (tmp_path / "a" / "nested").mkdir(parents=True)
+    (tmp_path / "b").mkdir()
+    (tmp_path / "link").symlink_to(tmp_path / "a")
+
+    roots = collapse_roots(
+        [tmp_path / "a" / "nested", tmp_path / "b", tmp_path / "a", tmp_path / "link"]
+    )
+
+    assert roots == [tmp_path / "a", tmp_path / "b"]
@@ -0,0 +1,156 @@
+from pathlib import Path
+
+from src.core.scanner import FileRecord
+from src.core.scheduler import (
+    DEVICE_HDD,
+    DEVICE_KIND_NAMES,
+    DEVICE_SSD,
+    ORDER_LIKELY_DUPLICATES,
+    ORDER_LONGEST_FIRST,
+    ExtractionScheduler,
+    detect_device_kind,
+    normalized_stem,
+)
+
+
+def _record(path: str, device: int) -> FileRecord:
+    return FileRecord(Path(path), 0.0, 1, device=device)
+
+
+def _detect(_: Path, device: int) -> str:
+    return DEVICE_HDD if device == 1 else DEVICE_SSD
+
+
+def test_rotational_device_is_limited_and_read_in_path_order() -> None:
+    scheduler = ExtractionScheduler(detect=_detect)
+    for name in ["/hdd/c.mp4", "/hdd/a.mp4", "/hdd/b.mp4"]:
+        scheduler.add(_record(name, 1))
+    for name in ["/ssd/y.mp4", "/ssd/x.mp4"]:
+        scheduler.add(_record(name, 2))
+
+    taken = []
+    while (path := scheduler.pop()) is not None:
+        taken.append(path)
+
+    # 机械盘同时只放出一个，其余名额交给固态盘
+    assert taken == [Path("/hdd/a.mp4"), Path("/ssd/x.mp4"), Path("/ssd/y.mp4")]
+    assert len(scheduler) == 2
+
+    scheduler.release(Path("/hdd/a.mp4"))
+    assert scheduler.pop() == Path("/hdd/b.mp4")
+    assert scheduler.pop() is None
+
+
+def test_path_limits_override_detection(tmp_path: Path) -> None:
+    nas = tmp_path / "nas"
+    scheduler = ExtractionScheduler(path_limits={str(nas): 2}, detect=_detect)
+    for name in ["a.mp4", "b.mp4", "c.mp4"]:
+        scheduler.add(_record(str(nas / name), 1))
+    scheduler.add(_record(str(tmp_path / "other.mp4"), 1))
+
+    labels = {queue.label: queue.limit for queue in scheduler.queues}
+    assert labels[str(nas)] == 2
+    taken = [scheduler.pop() for _ in range(4)]
+    assert taken[:3] == [nas / "a.mp4", tmp_path / "other.mp4", nas / "b.mp4"]
+    assert taken[3] is None
+
+
+def test_disabled_grouping_uses_single_unlimited_queue() -> None:
+    scheduler = ExtractionScheduler(group_by_device=False, detect=_detect)
+    for index in range(3):
+        scheduler.add(_record(f"/hdd/{index}.mp4", 1))
+
+    assert [scheduler.pop() for _ in range(3)] == [Path(f"/hdd/{i}.mp4") for i in range(3)]
+    assert len(scheduler.queues) == 1
+
+
+def test_detect_device_kind_handles_real_paths(tmp_path: Path) -> None:
+    assert detect_device_kind(tmp_path, tmp_path.stat().st_dev) in DEVICE_KIND_NAMES
+
+
+def test_longest_first_orders_parallel_devices_by_cost() -> None:
+    scheduler = ExtractionScheduler(order=ORDER_LONGEST_FIRST, detect=_detect)
+    for name, size in [("a.mp4", 10), ("b.mp4", 500), ("c.mp4", 50)]:
+        scheduler.add(FileRecord(Path("/ssd") / name, 0.0, size, device=2))
+    for name, size in [("a.mp4", 10), ("b.mp4", 500)]:
+        scheduler.add(FileRecord(Path("/hdd") / name, 0.0, size, device=1))
+
+    taken = [scheduler.pop() for _ in range(4)]
+
+    # 机械盘串行读取，保持路径顺序；固态盘上大文件先开始
+    assert taken == [Path("/ssd/b.mp4"), Path("/hdd/a.mp4"), Path("/ssd/c.mp4"), Path("/ssd/a.mp4")]
+
+
+def test_remaining_time_is_weighted_by_cost() -> None:
+    now = [0.0]
+    scheduler = ExtractionScheduler(
+        order=ORDER_LONGEST_FIRST,
+        group_by_device=False,
+        clock=lambda: now[0],
+    )
+    scheduler.add(FileRecord(Path("/big.mp4"), 0.0, 300))
+    scheduler.add(FileRecord(Path("/small.mp4"), 0.0, 100))
+    assert scheduler.remaining_seconds() is None
+
+    big = scheduler.pop()
+    now[0] = 30.0
+    scheduler.release(big)
+
+    assert scheduler.fraction_done == 0.75
+    assert scheduler.remaining_seconds() == 10.0
+
+
+def test_likely_duplicates_are_promoted_when_a_match_arrives() -> None:
+    scheduler = ExtractionScheduler(
+        order=ORDER_LIKELY_DUPLICATES,
+        group_by_device=False,
+    )
+    scheduler.note([(Path("/lib/Holiday.mp4"), 999, 0.0)])
+    scheduler.add(FileRecord(Path("/new/a.mp4"), 0.0, 700))
+    scheduler.add(FileRecord(Path("/new/big.mp4"), 0.0, 900))
+    scheduler.add(FileRecord(Path("/new/holiday (1080p).mkv"), 0.0, 100))
+    scheduler.add(FileRecord(Path("/new/b.mp4"), 0.0, 200))
+    scheduler.add(FileRecord(Path("/new/c.mp4"), 0.0, 700))
+
+    taken = [scheduler.pop() for _ in range(5)]
+
+    # 与缓存同名、与先入队文件同大小的先提取，其余仍按大文件优先
+    assert taken == [
+        Path("/new/a.mp4"),
+        Path("/new/c.mp4"),
+        Path("/new/holiday (1080p).mkv"),
+        Path("/new/big.mp4"),
+        Path("/new/b.mp4"),
+    ]
+    assert len(scheduler) == 0
+
+
+def test_stale_cache_entry_of_same_path_is_not_a_duplicate_hint() -> None:
+    scheduler = ExtractionScheduler(order=ORDER_LIKELY_DUPLICATES, group_by_device=False)
+    scheduler.note([(Path("/lib/clip.mp4"), 10, 0.0)])
+    scheduler.add(FileRecord(Path("/lib/clip.mp4"), 0.0, 20))
+    scheduler.add(FileRecord(Path("/lib/other.mp4"), 0.0, 30))
+
+    assert scheduler.pop() == Path("/lib/other.mp4")
+
+
+def test_cached_duration_of_rewritten_file_is_a_duplicate_hint() -> None:
+    scheduler = ExtractionScheduler(order=ORDER_LIKELY_DUPLICATES, group_by_device=False)
+    # 改写前的旧记录排在前面，另一个缓存文件时长相同
+    scheduler.note(
+        [
+            (Path("/lib/a_retagged.mp4"), 10, 120.2),
+            (Path("/lib/b_original.mp4"), 11, 119.8),
+        ]
+    )
+    scheduler.add(FileRecord(Path("/lib/big.mp4"), 0.0, 500))
+    scheduler.add(FileRecord(Path("/lib/a_retagged.mp4"), 0.0, 20))
+
+    assert scheduler.pop() == Path("/lib/a_retagged.mp4")
+
+
+def test_normalized_stem_ignores_copy_and_quality_tags() -> None:
+    assert normalized_stem(Path("Trip_2019 (1).mp4")) == normalized_stem(
+        Path("trip 2019 - 副本.mp4")
+    )
+    assert normalized_stem(Path("Trip.1080p.x264.mkv")) == "trip"
@@ -0,0 +1,182 @@
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.cli import main
+from src.core.database import FingerprintDatabase
+from src.core.fingerprint import ExtractionTimeoutError, VideoFingerprint
+from src.core.scanner import FileRecord
+from src.core.sharding import ShardFilter, read_file_list, relative_key
+from src.utils.video_info import VideoDecodeError
+
+
+def _fingerprint(path: Path, d_hash: int) -> VideoFingerprint:
+    return VideoFingerprint(
+        path=path,
+        size_bytes=123,
+        duration_seconds=9.5,
+        width=1920,
+        height=1080,
+        bitrate=2048,
+        d_hash=d_hash,
+        p_hash=22,
+    )
+
+
+def test_hash_shards_partition_files_independent_of_mount_point() -> None:
+    names = [f"dir{i % 3}/clip{i}.mp4" for i in range(40)]
+    owners = []
+    for name in names:
+        here = [
+            index
+            for index in range(3)
+            if ShardFilter([Path("/mnt/a")], index=index, count=3)(
+                FileRecord(Path("/mnt/a") / name, 0.0, 1)
+            )
+        ]
+        elsewhere = [
+            index
+            for index in range(3)
+            if ShardFilter([Path("/media/b")], index=index, count=3)(
+                FileRecord(Path("/media/b") / name, 0.0, 1)
+            )
+        ]
+        assert len(here) == 1
+        assert here == elsewhere
+        owners.append(here[0])
+
+    assert set(owners) == {0, 1, 2}
+    with pytest.raises(ValueError):
+        ShardFilter([Path("/mnt/a")], index=3, count=3)
+
+
+def test_file_list_shard_accepts_relative_and_absolute_entries(tmp_path: Path) -> None:
+    listing = tmp_path / "shard.txt"
+    listing.write_text(f"# 第一批\nsub/a.mp4\n\n{tmp_path / 'b.mp4'}\n", encoding="utf-8")
+    shard = ShardFilter([tmp_path], file_list=read_file_list(listing))
+
+    assert shard(FileRecord(tmp_path / "sub" / "a.mp4", 0.0, 1))
+    assert shard(FileRecord(tmp_path / "b.mp4", 0.0, 1))
+    assert not shard(FileRecord(tmp_path / "c.mp4", 0.0, 1))
+    assert shard.key.startswith("list:")
+    assert relative_key(tmp_path / "sub" / "a.mp4", [tmp_path]) == "sub/a.mp4"
+
+
+def test_merge_keeps_newer_rows(tmp_path: Path) -> None:
+    shared = tmp_path / "shared.mp4"
+    only_shard = tmp_path / "only.mp4"
+    main_db = FingerprintDatabase(tmp_path / "main.sqlite3")
+    shard_db = FingerprintDatabase(tmp_path / "shard.sqlite3")
+    try:
+        main_db.upsert(_fingerprint(shared, 1), 1.0)
+        shard_db.upsert(_fingerprint(shared, 2), 2.0)
+        shard_db.upsert(_fingerprint(only_shard, 3), 1.0)
+        shard_db._conn.execute(
+            "UPDATE fingerprints SET updated_at = datetime('now', '+1 minute') WHERE path = ?",
+            (str(shared),),
+        )
+        shard_db._conn.commit()
+        shard_db.close()
+
+        assert main_db.merge_from(tmp_path / "shard.sqlite3") == 2
+        merged = {fp.path: fp.d_hash for fp in main_db.iter_fingerprints()}
+        assert merged == {shared: 2, only_shard: 3}
+
+        # 再次合并时本地记录不比分片旧，不会被覆盖
+        main_db.upsert(_fingerprint(shared, 4), 3.0)
+        main_db._conn.execute("UPDATE fingerprints SET updated_at = datetime('now', '+1 hour')")
+        main_db._conn.commit()
+        assert main_db.merge_from(tmp_path / "shard.sqlite3") == 0
+        assert {fp.path: fp.d_hash for fp in main_db.iter_fingerprints()}[shared] == 4
+
+        with pytest.raises(FileNotFoundError):
+            main_db.merge_from(tmp_path / "missing.sqlite3")
+    finally:
+        main_db.close()
+
+
+def test_merge_keeps_failures_only_when_no_fingerprint_supersedes_them(tmp_path: Path) -> None:
+    fixed = tmp_path / "fixed.mp4"
+    broken = tmp_path / "broken.mp4"
+    slow = tmp_path / "slow.mp4"
+    main_db = FingerprintDatabase(tmp_path / "main.sqlite3")
+    shard_db = FingerprintDatabase(tmp_path / "shard.sqlite3")
+    try:
+        # 本地只有旧版本的指纹，分片上新版本的文件解码失败
+        main_db.upsert(_fingerprint(broken, 1), 1.0)
+        main_db.record_failure(fixed, 1.0, 123, VideoDecodeError("bad header"))
+        main_db.flush()
+        shard_db.upsert(_fingerprint(fixed, 2), 2.0)
+        shard_db.record_failure(broken, 2.0, 123, VideoDecodeError("no frames"))
+        shard_db.record_failure(slow, 1.0, 123, ExtractionTimeoutError(slow, 900.0))
+        shard_db.close()
+
+        main_db.merge_from(tmp_path / "shard.sqlite3")
+        failures = main_db.get_failed_bulk(
+            [(fixed, 1.0, 123), (broken, 2.0, 123), (slow, 1.0, 123)]
+        )
+
+        assert set(failures) == {str(broken)}
+    finally:
+        main_db.close()
+
+
+def test_shards_extracted_in_separate_processes_merge_into_groups(
+    tmp_path: Path, make_video
+) -> None:
+    videos = tmp_path / "videos"
+    source = make_video(videos / "a.avi")
+    (videos / "copy").mkdir()
+    shutil.copy(source, videos / "copy" / "a.avi")
+    make_video(videos / "other.avi", frames=80, seed=3)
+    repo = Path(__file__).resolve().parents[1]
+
+    shard_dbs = [tmp_path / f"shard{index}.sqlite3" for index in range(2)]
+    processes = [
+        subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "src.cli",
+                "--cache-db",
+                str(shard_db),
+                "--frame-interval",
+                "1",
+                "--extensions",
+                "avi",
+                "shard",
+                str(videos),
+                "--index",
+                str(index),
+                "--count",
+                "2",
+            ],
+            cwd=repo,
+            stderr=subprocess.DEVNULL,
+        )
+        for index, shard_db in enumerate(shard_dbs)
+    ]
+    assert [process.wait(timeout=120) for process in processes] == [0, 0]
+
+    output = tmp_path / "groups.jsonl"
+    code = main(
+        [
+            "--cache-db",
+            str(tmp_path / "merged.sqlite3"),
+            "merge",
+            *map(str, shard_dbs),
+            "--output",
+            str(output),
+        ]
+    )
+
+    groups = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert code == 0
+    assert len(groups) == 1
+    assert sorted(item["path"] for item in groups[0]["items"]) == sorted(
+        [str(source), str(videos / "copy" / "a.avi")]
+    )
@@ -0,0 +1,105 @@
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from src.config import AppConfig
+from src.core.database import FingerprintDatabase
+from src.core.fingerprint import extract_fingerprint
+from src.utils.video_info import read_video_info
+from src.workers import scan_engine, watch_worker
+from src.workers.watch_worker import WatchWorker
+
+
+def test_watch_worker_reports_new_duplicate_of_cached_file(tmp_path: Path, make_video) -> None:
+    library = make_video(tmp_path / "library" / "movie.avi")
+    ingest = tmp_path / "ingest"
+    ingest.mkdir()
+    config = AppConfig(cache_db=tmp_path / "cache.sqlite3", frame_interval_seconds=1)
+    config.supported_extensions = {".avi"}
+    config.watch_settle_seconds = 0.0
+    config.watch_poll_interval_seconds = 0.1
+
+    db = FingerprintDatabase(config.cache_db)
+    db.upsert(extract_fingerprint(library, 1), library.stat().st_mtime)
+    db.close()
+
+    worker = WatchWorker(ingest, config)
+    groups: list = []
+    stopped: list[bool] = []
+    worker.new_groups.connect(groups.extend)
+    worker.stopped.connect(lambda: stopped.append(True))
+    worker.failed.connect(groups.append)
+
+    def drive() -> None:
+        time.sleep(0.3)
+        shutil.copy(library, ingest / "copy.avi")
+        deadline = time.monotonic() + 5.0
+        while not groups and time.monotonic() < deadline:
+            time.sleep(0.05)
+        worker.request_stop()
+
+    # 信号在 run() 所在线程直接回调，监控循环放在主线程里跑
+    driver = threading.Thread(target=drive)
+    driver.start()
+    worker.run()
+    driver.join()
+
+    assert stopped == [True]
+    assert len(groups) == 1
+    assert {item.path.name for item in groups[0].items} == {"movie.avi", "copy.avi"}
+
+
+def test_watch_worker_abandons_hung_extraction_and_keeps_watching(
+    tmp_path: Path, make_video, monkeypatch
+) -> None:
+    library = make_video(tmp_path / "library" / "movie.avi")
+    ingest = tmp_path / "ingest"
+    ingest.mkdir()
+    config = AppConfig(cache_db=tmp_path / "cache.sqlite3", frame_interval_seconds=1)
+    config.supported_extensions = {".avi"}
+    config.watch_settle_seconds = 0.0
+    config.watch_poll_interval_seconds = 0.1
+
+    db = FingerprintDatabase(config.cache_db)
+    db.upsert(extract_fingerprint(library, 1), library.stat().st_mtime)
+    db.close()
+
+    release = threading.Event()
+
+    def hanging_probe(path: Path):
+        # 模拟打开仍在写入的文件时卡死
+        if path.name == "stuck.avi":
+            release.wait(10)
+        return read_video_info(path)
+
+    monkeypatch.setattr(scan_engine, "read_video_info", hanging_probe)
+    monkeypatch.setattr(watch_worker, "_compute_watchdog_seconds", lambda seconds: 0.3)
+    worker = WatchWorker(ingest, config)
+    groups: list = []
+    statuses: list[str] = []
+    worker.new_groups.connect(groups.extend)
+    worker.status.connect(statuses.append)
+    worker.failed.connect(groups.append)
+
+    def drive() -> None:
+        time.sleep(0.3)
+        make_video(ingest / "stuck.avi", frames=80, seed=3)
+        time.sleep(0.3)
+        shutil.copy(library, ingest / "copy.avi")
+        deadline = time.monotonic() + 5.0
+        while not groups and time.monotonic() < deadline:
+            time.sleep(0.05)
+        worker.request_stop()
+
+    driver = threading.Thread(target=drive)
+    driver.start()
+    try:
+        worker.run()
+    finally:
+        release.set()
+        driver.join()
+
+    assert any("提取超时已放弃: stuck.avi" in status for status in statuses)
+    assert len(groups) == 1
+    assert {item.path.name for item in groups[0].items} == {"movie.avi", "copy.avi"}
@@ -0,0 +1,33 @@
+import time
+
+from src.core.watchdog import ExtractionWatchdog
+
+
+def test_watchdog_reports_only_jobs_over_limit() -> None:
+    watchdog = ExtractionWatchdog(0.01)
+    watchdog.mark_started("slow")
+    time.sleep(0.02)
+    watchdog.mark_started("fresh")
+
+    expired = watchdog.expired()
+
+    assert [key for key, _ in expired] == ["slow"]
+    assert expired[0][1] >= 0.01
+    assert watchdog.mark_finished("slow") >= 0.01
+    assert watchdog.mark_finished("slow") == 0.0
+
+
+def test_disabled_watchdog_never_expires() -> None:
+    watchdog = ExtractionWatchdog(0)
+    watchdog.mark_started("job")
+    assert watchdog.expired() == []
+
+
+def test_watchdog_can_extend_a_single_job() -> None:
+    watchdog = ExtractionWatchdog(0.01)
+    watchdog.mark_started("throttled")
+    watchdog.mark_started("other")
+    watchdog.extend(10.0, "throttled")
+    time.sleep(0.02)
+
+    assert [key for key, _ in watchdog.expired()] == ["other"]
@@ -0,0 +1,107 @@
+import ctypes
+import errno
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from src.core import watcher as watcher_module
+from src.core.scanner import VideoScanner
+from src.core.watcher import InotifyWatcher, PollingWatcher, StabilityTracker
+
+
+def test_stability_tracker_waits_until_file_stops_changing(tmp_path: Path) -> None:
+    video = tmp_path / "incoming.mp4"
+    video.write_bytes(b"x")
+    tracker = StabilityTracker({".mp4"}, settle_seconds=5.0)
+
+    tracker.touch(video, now=0.0)
+    tracker.touch(tmp_path / "notes.txt", now=0.0)
+    assert len(tracker) == 1
+    assert tracker.poll(now=1.0) == ([], [])
+
+    video.write_bytes(b"xx")
+    assert tracker.poll(now=4.0) == ([], [])
+    assert tracker.poll(now=6.0) == ([], [])
+
+    stable, removed = tracker.poll(now=9.5)
+    assert [record.path for record in stable] == [video]
+    assert stable[0].size_bytes == 2
+    assert removed == []
+
+
+def test_stability_tracker_reports_removed_files(tmp_path: Path) -> None:
+    tracker = StabilityTracker({".mp4"}, settle_seconds=0.0)
+    tracker.touch(tmp_path / "gone.mp4", now=0.0)
+    assert tracker.poll(now=1.0) == ([], [tmp_path / "gone.mp4"])
+
+
+def test_polling_watcher_reports_new_changed_and_removed_files(tmp_path: Path) -> None:
+    (tmp_path / "kept.mp4").write_bytes(b"x")
+    (tmp_path / "gone.mp4").write_bytes(b"x")
+    watcher = PollingWatcher(tmp_path, VideoScanner({".mp4"}), interval_seconds=0.1)
+
+    (tmp_path / "gone.mp4").unlink()
+    (tmp_path / "new.mp4").write_bytes(b"x")
+    time.sleep(0.15)
+
+    assert watcher.poll(timeout=0.0) == {tmp_path / "gone.mp4", tmp_path / "new.mp4"}
+    assert watcher.poll(timeout=0.0) == set()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+def test_inotify_watcher_reports_files_in_new_subdirectories(tmp_path: Path) -> None:
+    watcher = InotifyWatcher(tmp_path, VideoScanner({".mp4"}))
+    try:
+        (tmp_path / "a.mp4").write_bytes(b"x")
+        nested = tmp_path / "new_dir"
+        nested.mkdir()
+        changed = watcher.poll(timeout=1.0)
+        (nested / "b.mp4").write_bytes(b"x")
+        deadline = time.monotonic() + 2.0
+        while nested / "b.mp4" not in changed and time.monotonic() < deadline:
+            changed |= watcher.poll(timeout=0.2)
+
+        assert tmp_path / "a.mp4" in changed
+        assert nested / "b.mp4" in changed
+    finally:
+        watcher.close()
+
+
+class _LibcDenying:
+    # 对指定目录的 inotify_add_watch 返回 EACCES，其余调用转给真正的 libc
+    def __init__(self, libc, denied: bytes) -> None:
+        self._libc = libc
+        self._denied = denied
+
+    def __getattr__(self, name: str):
+        return getattr(self._libc, name)
+
+    def inotify_add_watch(self, fd: int, path: bytes, mask: int) -> int:
+        if path.endswith(self._denied):
+            ctypes.set_errno(errno.EACCES)
+            return -1
+        return self._libc.inotify_add_watch(fd, path, mask)
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+def test_inotify_watcher_skips_unwatchable_subdirectory(tmp_path: Path, monkeypatch) -> None:
+    (tmp_path / "locked").mkdir()
+    (tmp_path / "open").mkdir()
+    real_cdll = ctypes.CDLL
+    monkeypatch.setattr(
+        watcher_module.ctypes,
+        "CDLL",
+        lambda *args, **kwargs: _LibcDenying(real_cdll(*args, **kwargs), b"locked"),
+    )
+
+    watcher = watcher_module.create_watcher(tmp_path, {".mp4"}, 10.0)
+    try:
+        assert isinstance(watcher, InotifyWatcher)
+        assert len(watcher.skipped_directories) == 1
+        assert "locked" in watcher.skipped_directories[0]
+        (tmp_path / "open" / "a.mp4").write_bytes(b"x")
+        assert tmp_path / "open" / "a.mp4" in watcher.poll(timeout=1.0)
+    finally:
+        watcher.close()